@@ -1,31 +1,12 @@
-import json
-import numpy as np
-import pandas as pd
-import yfinance as yf
+from utilities import resources  # en premier : référence du temps de démarrage
 import streamlit as st
-from data.data_loader import tickerf, get_fundamental_info
+from data.data_loader import prefetch_fundamentals
+from utilities.metrics import METRICS
 from utilities.search_bar import get_top10_assets
-from sentence_transformers import SentenceTransformer
 from widgets.asset_informations import show_stock_informations
 from widgets.sidebar import sidebar_widgets
 
 
-
-@st.cache_resource
-def load_embedder():
-    return SentenceTransformer('all-MiniLM-L6-v2')
-
-EMBEDDER = load_embedder()
-
-@st.cache_data
-def load_tickers_data():
-    tickers_df = pd.read_csv('data/tickers_data.csv')
-    tickers_df['embeddings'] = tickers_df['embeddings'].apply(lambda s: np.array(json.loads(s)))
-    return tickers_df
-
-TICKERS_DATA = load_tickers_data()
-
-
 def home_page():
     st.title("Bienvenue sur l'application d'actifs financiers")
     st.write(
@@ -52,9 +33,15 @@ def asset_selection_page():
     # Bouton de recherche
     if st.button("Rechercher"):
         # Appel à la fonction de recherche et affichage des 10 premiers résultats
-        top_assets = get_top10_assets(asset_name, TICKERS_DATA, EMBEDDER)
+        # Le modèle n'est chargé que si la recherche lexicale ne suffit pas
+        with st.spinner("Recherche en cours..."):
+            top_assets = get_top10_assets(asset_name, resources.ASSET_INDEX.get(), resources.EMBEDDER, asset_type=asset_type)
+        if top_assets.empty:
+            st.warning(f"Aucun actif de type {asset_type} dans la base.")
         # On ne garde que les colonnes Ticker et Name
         resultats = top_assets[['Ticker', 'Name']]
+        # Les fondamentaux des résultats sont chargés en arrière-plan pendant que l'utilisateur choisit
+        prefetch_fundamentals(resultats['Ticker'])
         # Sauvegarde des résultats dans la session pour les conserver entre les réexécutions
         st.session_state['resultats'] = resultats
 
@@ -63,9 +50,9 @@ def asset_selection_page():
 
 
 def main():
-    # Ajout de la sidebar avec des widgets
-    sidebar_widgets()
-    
+    # Journal des opérations instrumentées de cette exécution
+    METRICS.begin_rerun()
+
     # Création des onglets pour la navigation entre les pages
     tabs = st.tabs(["Accueil", "Recherche d'actif"])
     
@@ -75,5 +62,13 @@ def main():
     with tabs[1]:
         asset_selection_page()
 
+    # Le modèle et l'index sont préchargés en arrière-plan une fois la première page affichée
+    resources.mark_first_render()
+    resources.warm_up()
+
+    # Panneau de performances écrit en dernier (la sidebar s'affiche quand même à gauche) :
+    # il montre le détail complet de l'exécution qui vient de se terminer
+    sidebar_widgets(METRICS.end_rerun())
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,357 @@
+"""
+Calcul de risque en lot, sans Streamlit : VaR / ES historiques de chaque position d'un fichier de
+positions (ticker, quantité) et du portefeuille complet, écrites par blocs en CSV ou Parquet.
+
+    python batch_risk.py positions.csv --output runs/2024-12-31
+    python batch_risk.py positions.parquet --output runs/nightly --format parquet --chunk-size 1000
+    python batch_risk.py positions.csv --output runs/test --source data/prices   # historiques locaux, sans réseau
+
+Les historiques passent par data.data_loader (store local incrémental, téléchargements concurrents avec
+reprise sur erreur). Les tickers sont traités par blocs : un bloc est écrit dans <output>/assets/part-NNNNN
+avant que le suivant ne soit chargé, et la mémoire ne dépend que de la taille d'un bloc. Le portefeuille
+n'est jamais aligné en entier : seul le P&L historique agrégé par date est conservé.
+
+Après chaque bloc, <output>/checkpoint.json enregistre les tickers traités et l'état du P&L agrégé ;
+relancer la même commande après un arrêt reprend au bloc suivant (--restart pour repartir de zéro).
+Les tickers en échec sont retentés à la reprise : la ligne du part le plus récent fait foi. Une exécution
+terminée n'est pas reprise : relancer la commande (ex: le lendemain) recalcule tout.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import pandas as pd
+from data import data_loader
+from data.price_store import DEFAULT_PRICE_DIR, LocalFileProvider, PriceStore
+from utilities.base_tools import compute_returns
+from utilities.metrics import METRICS, span
+from utilities.parametric_var import RISKMETRICS_LAMBDA, EWMACovariance, parametric_var
+from utilities.var_methods import DEFAULT_CONFIDENCE_LEVELS, historical_var_es
+
+CHECKPOINT_FILE = 'checkpoint.json'
+FORMATS = ('csv', 'parquet')
+
+
+class CheckpointMismatchError(ValueError):
+    """
+    Le checkpoint du répertoire de sortie a été écrit pour d'autres positions ou d'autres paramètres.
+    """
+
+
+def read_positions(path):
+    """
+    Lit un fichier de positions CSV ou Parquet avec les colonnes ticker et quantity (casse indifférente).
+    Les lignes d'un même ticker sont additionnées.
+
+    Paramètres:
+        path (str): Chemin du fichier.
+
+    Retour:
+        pd.Series: Quantité par ticker, dans l'ordre de première apparition.
+    """
+    positions = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    positions.columns = [str(c).strip().lower() for c in positions.columns]
+    missing = {'ticker', 'quantity'} - set(positions.columns)
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {path} : {', '.join(sorted(missing))}.")
+    positions['ticker'] = positions['ticker'].astype(str).str.strip()
+    positions['quantity'] = pd.to_numeric(positions['quantity'], errors='raise').astype(float)
+    return positions.groupby('ticker', sort=False)['quantity'].sum()
+
+
+def _fingerprint(positions, params):
+    """
+    Empreinte des positions et des paramètres : un checkpoint n'est repris que pour le même calcul.
+    """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    digest.update(pd.util.hash_pandas_object(positions.reset_index(), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _write_frame(df, path, fmt):
+    tmp = path + '.tmp'
+    if fmt == 'parquet':
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _write_json(obj, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def asset_risk(ticker, quantity, hist, confidence_levels, horizons):
+    """
+    VaR / ES historiques d'une position, en rendement de l'actif et en montant. Les montants sont calculés
+    sur le P&L de la position (valeur x rendement) : pour une vente à découvert, la perte vient de la queue
+    droite des rendements.
+
+    Paramètres:
+        ticker (str): Le symbole boursier.
+        quantity (float): Quantité détenue.
+        hist (pd.DataFrame): Historique au format de tickerf.
+        confidence_levels (tuple): Niveaux de confiance α.
+        horizons (tuple): Horizons en jours.
+
+    Retour:
+        tuple: (ligne de résultats (dict), P&L quotidien de la position indexé par date calendaire (pd.Series)).
+    """
+    returns = compute_returns(hist)
+    log_returns = returns['log_return'].to_numpy()
+    last_close = float(hist['Close'].dropna().iloc[-1])
+    value = quantity * last_close
+    row = {
+        'ticker': ticker, 'status': 'ok', 'error': None, 'quantity': quantity, 'last_close': last_close,
+        'value': value, 'n_obs': int(np.isfinite(log_returns).sum()),
+        'start': returns['Date'].iloc[0], 'end': returns['Date'].iloc[-1],
+    }
+    # P&L de la position à quantité constante, comme dans PortfolioAccumulator
+    position_pnl = value * np.expm1(log_returns)
+    result = historical_var_es(log_returns, confidence_levels, horizons)
+    amounts = historical_var_es(position_pnl, confidence_levels, horizons)
+    for measure in ('var', 'es'):
+        for i, h in enumerate(horizons):
+            for j, a in enumerate(confidence_levels):
+                row[f"{measure}_{h}d_{a:g}"] = float(result[measure][i, j])
+                row[f"{measure}_{h}d_{a:g}_amount"] = float(amounts[measure][i, j])
+
+    # Aligné comme dans align_returns (date calendaire, sans fuseau)
+    pnl = data_loader.daily_series(returns.assign(pnl=position_pnl), 'pnl')
+    return row, pnl
+
+
+class PortfolioAccumulator:
+    """
+    P&L historique du portefeuille agrégé par date au fil des blocs : somme des P&L des positions
+    et nombre de positions cotées à chaque date. La mémoire est proportionnelle au nombre de dates,
+    pas au nombre d'actifs.
+    """
+
+    def __init__(self, pnl=None, count=None):
+        self.pnl = pnl if pnl is not None else pd.Series(dtype=float)
+        self.count = count if count is not None else pd.Series(dtype=np.int64)
+
+    def add(self, pnl):
+        pnl = pnl.dropna()
+        self.pnl = self.pnl.add(pnl, fill_value=0.0)
+        self.count = self.count.add(pd.Series(1, index=pnl.index), fill_value=0).astype(np.int64)
+
+    def series(self, n_assets, min_coverage=1.0):
+        """
+        P&L du portefeuille sur les dates où au moins min_coverage des positions cotent
+        (1.0 : dates communes à toutes les positions, comme align_returns).
+        """
+        keep = self.count >= np.ceil(min_coverage * n_assets - 1e-9)
+        return self.pnl[keep].sort_index()
+
+    def save(self, path):
+        frame = pd.DataFrame({'date': self.pnl.index, 'pnl': self.pnl.to_numpy(),
+                              'count': self.count.reindex(self.pnl.index).to_numpy()})
+        _write_frame(frame, path, 'parquet')
+
+    @classmethod
+    def load(cls, path):
+        frame = pd.read_parquet(path)
+        index = pd.DatetimeIndex(frame['date'])
+        return cls(pd.Series(frame['pnl'].to_numpy(), index=index), pd.Series(frame['count'].to_numpy(), index=index))
+
+
+def portfolio_risk(pnl, confidence_levels, horizons, lam=RISKMETRICS_LAMBDA):
+    """
+    VaR / ES du portefeuille en montant : historiques sur la série de P&L agrégée, et paramétriques EWMA.
+    La variance EWMA de la série de P&L du portefeuille est w'Σw pour la covariance EWMA des P&L des
+    positions : la VaR paramétrique ne demande donc pas la matrice n x n.
+
+    Retour:
+        pd.DataFrame: Une ligne par (méthode, horizon, niveau de confiance).
+    """
+    rows = []
+    historical = historical_var_es(pnl.to_numpy(), confidence_levels, horizons)
+    model = EWMACovariance.from_returns(pnl.to_frame('portfolio'), lam=lam)
+    for i, h in enumerate(horizons):
+        parametric = parametric_var(model.cov, np.ones(1), confidence_levels, horizon=h)
+        for j, a in enumerate(confidence_levels):
+            rows.append({'method': 'historical', 'horizon': h, 'confidence': a,
+                         'var': float(historical['var'][i, j]), 'es': float(historical['es'][i, j])})
+            rows.append({'method': 'parametric_ewma', 'horizon': h, 'confidence': a,
+                         'var': float(parametric['var'][j]), 'es': float(parametric['es'][j])})
+    return pd.DataFrame(rows)
+
+
+def run_batch(positions, output, fmt='csv', chunk_size=500, confidence_levels=DEFAULT_CONFIDENCE_LEVELS,
+              horizons=(1, 10), max_workers=8, retries=3, min_coverage=1.0, restart=False, log=print):
+    """
+    Calcule le risque de chaque position puis du portefeuille, en écrivant les résultats par blocs
+    et un checkpoint après chaque bloc.
+
+    Paramètres:
+        positions (pd.Series): Quantité par ticker (read_positions).
+        output (str): Répertoire de sortie.
+        fmt (str): 'csv' ou 'parquet'.
+        chunk_size (int): Tickers chargés et écrits par bloc.
+        confidence_levels (tuple): Niveaux de confiance α.
+        horizons (tuple): Horizons en jours.
+        max_workers (int): Téléchargements simultanés.
+        retries (int): Nouvelles tentatives par ticker après une erreur réseau.
+        min_coverage (float): Part minimale des positions cotées pour retenir une date du P&L du portefeuille.
+        restart (bool): Ignore un checkpoint existant.
+        log (callable): Sortie des messages de progression.
+
+    Retour:
+        dict: Résumé de l'exécution (débit, durées, échecs).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt doit être l'un de {FORMATS}.")
+    params = {'fmt': fmt, 'confidence_levels': list(confidence_levels), 'horizons': list(horizons)}
+    fingerprint = _fingerprint(positions, params)
+    checkpoint_path = os.path.join(output, CHECKPOINT_FILE)
+    parts_dir = os.path.join(output, 'assets')
+
+    checkpoint = None
+    if not restart and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint['fingerprint'] != fingerprint:
+            raise CheckpointMismatchError(f"Le checkpoint de {output} correspond à d'autres positions ou paramètres ; "
+                                          f"utiliser --restart.")
+        if checkpoint['completed']:
+            log(f"L'exécution précédente dans {output} est terminée : nouveau calcul.")
+            checkpoint = None
+    if checkpoint is None:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        checkpoint = {'fingerprint': fingerprint, 'parts': 0, 'done': [], 'failed': {}, 'state': None, 'value': 0.0,
+                      'elapsed_s': 0.0, 'completed': False}
+    os.makedirs(parts_dir, exist_ok=True)
+
+    accumulator = PortfolioAccumulator()
+    if checkpoint['state']:
+        accumulator = PortfolioAccumulator.load(os.path.join(output, checkpoint['state']))
+    # Les tickers en échec lors d'une exécution interrompue sont retentés
+    done = set(checkpoint['done'])
+    todo = [t for t in positions.index if t not in done]
+    if done or checkpoint['failed']:
+        log(f"Reprise : {len(done)} tickers déjà traités, {len(todo)} restants "
+            f"(dont {len(checkpoint['failed'])} échecs retentés).")
+
+    start = time.perf_counter()
+    processed = 0
+    for offset in range(0, len(todo), chunk_size):
+        chunk = todo[offset:offset + chunk_size]
+        rows = []
+        with span('batch.chunk'):
+            for ticker, hist, error in data_loader.iter_tickers_bulk(chunk, max_workers, retries):
+                if error is None:
+                    try:
+                        with span('batch.asset_risk'):
+                            row, pnl = asset_risk(ticker, positions[ticker], hist, confidence_levels, horizons)
+                        accumulator.add(pnl)
+                    except Exception as e:
+                        error = str(e)
+                if error is not None:
+                    row = {'ticker': ticker, 'status': 'error', 'error': error, 'quantity': positions[ticker]}
+                    checkpoint['failed'][ticker] = error
+                else:
+                    checkpoint['failed'].pop(ticker, None)
+                    checkpoint['done'].append(ticker)
+                    checkpoint['value'] += row['value']
+                rows.append(row)
+
+            with span('batch.write'):
+                part = checkpoint['parts']
+                _write_frame(pd.DataFrame(rows), os.path.join(parts_dir, f'part-{part:05d}.{fmt}'), fmt)
+                # Nouvel état avant le checkpoint qui le référence : un arrêt entre les deux laisse l'ancien valide
+                state = f'portfolio_state-{part:05d}.parquet'
+                accumulator.save(os.path.join(output, state))
+                previous, checkpoint['state'], checkpoint['parts'] = checkpoint['state'], state, part + 1
+                _write_json(checkpoint, checkpoint_path)
+                if previous:
+                    os.remove(os.path.join(output, previous))
+
+        processed += len(chunk)
+        elapsed = time.perf_counter() - start
+        log(f"[{len(done) + processed}/{len(positions)}] bloc {part} écrit, {processed / elapsed:.1f} tickers/s")
+
+    n_ok = len(checkpoint['done'])
+    portfolio, portfolio_dates = None, 0
+    if n_ok:
+        with span('batch.portfolio'):
+            pnl = accumulator.series(n_ok, min_coverage)
+            portfolio_dates = len(pnl)
+            if len(pnl) > max(horizons):
+                portfolio = portfolio_risk(pnl, confidence_levels, horizons)
+                _write_frame(portfolio, os.path.join(output, f'portfolio.{fmt}'), fmt)
+                _write_frame(pnl.rename_axis('date').rename('pnl').reset_index(), os.path.join(output, f'portfolio_pnl.{fmt}'), fmt)
+            else:
+                log(f"P&L du portefeuille trop court ({len(pnl)} dates communes) : VaR du portefeuille non calculée.")
+
+    elapsed = time.perf_counter() - start
+    checkpoint['elapsed_s'] += elapsed
+    checkpoint['completed'] = True
+    _write_json(checkpoint, checkpoint_path)
+
+    operations = METRICS.snapshot()['operations']
+    summary = {
+        'positions': len(positions),
+        'processed_this_run': processed,
+        'succeeded': n_ok,
+        'failed': len(checkpoint['failed']),
+        'parts': checkpoint['parts'],
+        'elapsed_s': elapsed,
+        'total_elapsed_s': checkpoint['elapsed_s'],
+        'tickers_per_s': processed / elapsed if elapsed > 0 else None,
+        'portfolio_dates': portfolio_dates,
+        'portfolio_value': checkpoint['value'],
+        'operations': {name: {k: op[k] for k in ('count', 'errors', 'mean_ms', 'p95_ms', 'total_s')}
+                       for name, op in operations.items()},
+    }
+    _write_json(summary, os.path.join(output, 'summary.json'))
+    if portfolio is not None:
+        log(portfolio.to_string(index=False))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VaR / ES historiques et paramétriques d'un fichier de positions, sans Streamlit.")
+    parser.add_argument('positions', help="Fichier CSV ou Parquet avec les colonnes ticker et quantity.")
+    parser.add_argument('--output', required=True, help="Répertoire de sortie (résultats, checkpoint, résumé).")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--confidence', nargs='+', type=float, default=list(DEFAULT_CONFIDENCE_LEVELS))
+    parser.add_argument('--horizons', nargs='+', type=int, default=[1, 10])
+    parser.add_argument('--workers', type=int, default=8, help="Téléchargements simultanés.")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--min-coverage', type=float, default=1.0,
+                        help="Part minimale des positions cotées pour retenir une date du P&L du portefeuille.")
+    parser.add_argument('--store', default=DEFAULT_PRICE_DIR, help="Répertoire du store local des historiques.")
+    parser.add_argument('--source', help="Répertoire de fichiers <ticker>.parquet lus à la place de yfinance.")
+    parser.add_argument('--restart', action='store_true', help="Ignore le checkpoint existant.")
+    args = parser.parse_args(argv)
+
+    if args.source or args.store != DEFAULT_PRICE_DIR:
+        provider = LocalFileProvider(args.source) if args.source else None
+        data_loader.PRICE_STORE = PriceStore(args.store, provider=provider)
+
+    positions = read_positions(args.positions)
+    try:
+        summary = run_batch(positions, args.output, args.format, args.chunk_size, tuple(args.confidence),
+                            tuple(args.horizons), args.workers, args.retries, args.min_coverage, args.restart)
+    except CheckpointMismatchError as e:
+        parser.error(str(e))
+    print(f"{summary['processed_this_run']} tickers traités en {summary['elapsed_s']:.1f} s "
+          f"({summary['tickers_per_s'] or 0:.1f} tickers/s), {summary['failed']} échecs ; résumé dans "
+          f"{os.path.join(args.output, 'summary.json')}")
+    for name, op in sorted(summary['operations'].items()):
+        print(f"  {name:<24} {op['count']:>7} appels  {op['mean_ms']:>9.2f} ms moy.  {op['p95_ms']:>9.2f} ms p95  {op['total_s']:>8.2f} s")
+    return 0 if summary['succeeded'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
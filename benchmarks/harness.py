@@ -0,0 +1,119 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# En dessous de ce nombre d'exécutions, le p99 n'est que le maximum : il n'est pas rapporté
+P99_MIN_REPEAT = 100
+
+
+def measure(name, fn, repeat=5, warmup=1, memory=True, **info):
+    """
+    Mesure un chemin critique : percentiles de latence sur repeat exécutions (après warmup exécutions
+    non mesurées), puis pic mémoire Python / NumPy d'une exécution supplémentaire sous tracemalloc.
+
+    Paramètres:
+        name (str): Identifiant stable du benchmark (clé de comparaison avec la référence).
+        fn (callable): Fonction sans argument à mesurer.
+        repeat (int): Nombre d'exécutions chronométrées.
+        warmup (int): Exécutions préalables non chronométrées.
+        memory (bool): Mesurer le pic mémoire (tracemalloc ralentit l'exécution, elle n'est pas chronométrée).
+        **info: Paramètres décrivant le cas (taille, fenêtre...), recopiés dans le résultat.
+
+    Retour:
+        dict: name, repeat, p50_ms, p90_ms, p99_ms (None si repeat < P99_MIN_REPEAT), min_ms, max_ms,
+              peak_mb et les paramètres.
+    """
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    durations = np.asarray(durations)
+    result = {
+        'name': name,
+        'repeat': repeat,
+        'p50_ms': float(np.percentile(durations, 50)),
+        'p90_ms': float(np.percentile(durations, 90)),
+        'p99_ms': float(np.percentile(durations, 99)) if repeat >= P99_MIN_REPEAT else None,
+        'min_ms': float(durations.min()),
+        'max_ms': float(durations.max()),
+        'peak_mb': peak_mb,
+        **info,
+    }
+    print(f"{name:<48} min {result['min_ms']:10.2f} ms   p50 {result['p50_ms']:10.2f} ms"
+          + (f"   pic {peak_mb:8.1f} Mo" if peak_mb is not None else ""))
+    return result
+
+
+def environment():
+    """
+    Description de la machine et des versions, enregistrée avec les résultats.
+    """
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'timestamp': pd.Timestamp.now('UTC').isoformat(),
+    }
+
+
+def write_results(path, results, args):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'args': args, 'results': results}, f, indent=2)
+
+
+def compare(results, baseline_path, tolerance=0.25):
+    """
+    Compare les latences minimales et pics mémoire à une référence enregistrée. Sur quelques exécutions,
+    le minimum est bien plus stable que la médiane : le bruit de la machine (autres processus, fréquence
+    du processeur) ne fait qu'allonger certaines exécutions.
+
+    Paramètres:
+        results (list): Résultats de measure.
+        baseline_path (str): Fichier JSON de référence (écrit par write_results).
+        tolerance (float): Hausse relative tolérée avant de signaler une régression.
+
+    Retour:
+        pd.DataFrame: Une ligne par benchmark commun, avec les ratios et une colonne 'regression'.
+    """
+    with open(baseline_path) as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    rows = []
+    for r in results:
+        base = baseline.get(r['name'])
+        if base is None:
+            continue
+        time_ratio = r['min_ms'] / base['min_ms'] if base['min_ms'] else np.nan
+        memory_ratio = (r['peak_mb'] / base['peak_mb']
+                        if r.get('peak_mb') is not None and base.get('peak_mb') else np.nan)
+        rows.append({
+            'name': r['name'],
+            'min_ms': r['min_ms'],
+            'baseline_min_ms': base['min_ms'],
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': bool(time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance),
+        })
+    return pd.DataFrame(rows, columns=['name', 'min_ms', 'baseline_min_ms', 'time_ratio', 'memory_ratio', 'regression'])
@@ -0,0 +1,271 @@
+"""
+Suite de benchmarks hors ligne : univers de tickers synthétique (embeddings aléatoires) et historiques
+GBM lus par LocalFileProvider à la place de yfinance. Aucun accès réseau ni modèle n'est nécessaire.
+
+    python -m benchmarks.run                                  # tailles 10k et 100k
+    python -m benchmarks.run --sizes 10000 100000 1000000     # ajoute 1M lignes (~1.5 Go en float32)
+    python -m benchmarks.run --save-baseline                  # enregistre la référence
+    python -m benchmarks.run --suites var --repeat 3          # une partie de la suite seulement
+
+Les résultats sont écrits en JSON ; si une référence existe, chaque benchmark est comparé à sa
+latence médiane et à son pic mémoire, et le code de sortie vaut 1 en cas de régression.
+"""
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+from benchmarks.harness import compare, measure, write_results
+from benchmarks.synthetic import HashingEncoder, gbm_history, synthetic_universe, write_price_files
+
+SUITES = ('search', 'data', 'returns', 'charts', 'var', 'options')
+DEFAULT_RESULTS = 'benchmarks/results/latest.json'
+DEFAULT_BASELINE = 'benchmarks/results/baseline.json'
+
+
+def bench_search(sizes, dim, repeat, workdir, dtype):
+    from data.ticker_store import load_ticker_store, write_ticker_store
+    from utilities.search_bar import QUERY_EMBEDDING_CACHE, AssetIndex, get_top10_assets
+
+    encoder = HashingEncoder(dim)
+    results = []
+    for n in sizes:
+        metadata, embeddings = synthetic_universe(n, dim)
+        store = os.path.join(workdir, f'store_{n}')
+        results.append(measure(f'store.write[{n}]', lambda: write_ticker_store(metadata, embeddings, store, dtype=dtype),
+                               repeat=1, warmup=0, memory=False, rows=n))
+        del embeddings
+        results.append(measure(f'store.load[{n}]', lambda: load_ticker_store(store), repeat=repeat, rows=n))
+
+        index = AssetIndex.from_store(store)
+        rng = np.random.default_rng(n)
+        queries = itertools.cycle(rng.standard_normal((64, dim)).astype(np.float32))
+        results.append(measure(f'search.exact[{n}]', lambda: index.search_vector(next(queries)), repeat=repeat * 4, rows=n))
+        results.append(measure(f'search.exact_typed[{n}]', lambda: index.search_vector(next(queries), asset_type='ETF'),
+                               repeat=repeat * 4, rows=n))
+
+        # Requêtes texte distinctes à chaque appel : le cache d'embeddings de requêtes ne les sert pas
+        names = itertools.cycle(metadata['Name'].sample(256, random_state=0, replace=True).str.lower().str[::-1])
+
+        def top10():
+            QUERY_EMBEDDING_CACHE.clear()
+            return get_top10_assets(next(names), index, encoder, asset_type='STOCK')
+        results.append(measure(f'search.get_top10_assets[{n}]', top10, repeat=repeat * 4, rows=n))
+        results.append(measure(f'search.lexical[{n}]', lambda: index.lexical.lookup(metadata['Ticker'].iloc[n // 2], 10),
+                               repeat=repeat * 4, rows=n))
+
+        if n >= 20_000:
+            results.append(measure(f'search.ivf_build[{n}]', lambda: AssetIndex.from_store(store, approximate=True),
+                                   repeat=1, warmup=0, memory=False, rows=n))
+            approximate = AssetIndex.from_store(store, approximate=True)
+            results.append(measure(f'search.approximate[{n}]', lambda: approximate.search_vector(next(queries)),
+                                   repeat=repeat * 4, rows=n))
+        del index
+        shutil.rmtree(store)
+    return results
+
+
+def bench_data(n_tickers, n_days, repeat, workdir):
+    from data import data_loader
+    from data.market_data import SharedMarketData
+    from data.price_store import LocalFileProvider, PriceStore
+
+    tickers = [f'T{i:04d}' for i in range(n_tickers)]
+    source = os.path.join(workdir, 'prices')
+    write_price_files(source, tickers, n_days)
+    provider = LocalFileProvider(source)
+    results = []
+
+    def cold():
+        root = os.path.join(workdir, 'cold_store')
+        shutil.rmtree(root, ignore_errors=True)
+        store = PriceStore(root, provider=provider)
+        for ticker in tickers[:20]:
+            store.get(ticker)
+    results.append(measure('data.price_store_cold[20]', cold, repeat=repeat, memory=False, days=n_days))
+
+    warm_store = PriceStore(os.path.join(workdir, 'warm_store'), provider=provider)
+    for ticker in tickers:
+        warm_store.get(ticker)
+    results.append(measure('data.price_store_warm', lambda: warm_store.get(tickers[0]), repeat=repeat * 4, days=n_days))
+
+    shared = SharedMarketData(warm_store)
+    shared.get(tickers[0])
+    results.append(measure('data.shared_market_data_hit', lambda: shared.get(tickers[0]), repeat=repeat * 4, memory=False))
+
+    # tickers_bulk lit le store du module : on lui substitue le store local synthétique
+    data_loader.PRICE_STORE = warm_store
+    results.append(measure(f'data.tickers_bulk[{n_tickers}]', lambda: data_loader.tickers_bulk(tickers),
+                           repeat=repeat, tickers=n_tickers, days=n_days))
+    return results
+
+
+def bench_returns(n_tickers, n_days, repeat):
+    from utilities.base_tools import align_returns, compute_returns
+    from utilities.return_panel import ReturnPanel
+
+    histories = {f'T{i:04d}': gbm_history(n_days, seed=i) for i in range(n_tickers)}
+    history = histories['T0000']
+    results = [measure('returns.compute_returns', lambda: compute_returns(history), repeat=repeat * 4, days=n_days)]
+
+    def build_panel():
+        panel = ReturnPanel()
+        for ticker, hist in histories.items():
+            panel.add_asset(ticker, hist, quantity=1)
+        return panel
+    results.append(measure(f'returns.panel_build[{n_tickers}]', build_panel, repeat=repeat, tickers=n_tickers))
+    panel = build_panel()
+    results.append(measure(f'returns.align_panel[{n_tickers}]', lambda: align_returns(panel), repeat=repeat, tickers=n_tickers))
+    assets = {ticker: {'df': hist, 'quantity': 1} for ticker, hist in histories.items()}
+    results.append(measure(f'returns.align_frames[{n_tickers}]', lambda: align_returns(assets), repeat=repeat, tickers=n_tickers))
+    return results
+
+
+def bench_charts(n_points, repeat):
+    from utilities.base_tools import compute_returns
+    from utilities.chart_data import histogram, lttb_indices, moving_averages
+
+    # Série intraday (une barre par minute) : le cas où le nombre de points explose
+    history = gbm_history(n_points, seed=1, tz='UTC', freq='min')
+    returns = compute_returns(history)
+    close = history['Close'].to_numpy()
+    results = [
+        measure(f'charts.histogram[{n_points}]', lambda: histogram(returns['simple_return'], 300), repeat=repeat * 4),
+        measure(f'charts.moving_averages[{n_points}]', lambda: moving_averages(close, (20, 50, 100)), repeat=repeat * 4),
+        measure(f'charts.lttb[{n_points}]', lambda: lttb_indices(np.arange(n_points), close, 1000), repeat=repeat * 4),
+    ]
+    try:
+        from utilities.graphs_plots import plot_price_evolution, plot_return_distribution
+    except ImportError as e:
+        print(f"charts : figures Plotly ignorées ({e})")
+        return results
+    results.append(measure(f'charts.plot_return_distribution[{n_points}]',
+                           lambda: plot_return_distribution(returns, nbins=300).to_json(), repeat=repeat))
+    results.append(measure(f'charts.plot_price_evolution[{n_points}]',
+                           lambda: plot_price_evolution(history, n_points, (20, 50, 100)).to_json(), repeat=repeat))
+    return results
+
+
+def bench_var(n_assets, n_days, repeat):
+    from utilities.backtesting import backtest_historical
+    from utilities.monte_carlo import monte_carlo_var
+    from utilities.parametric_var import EWMACovariance, parametric_var
+    from utilities.rolling_quantile import rolling_var_es_series
+    from utilities.var_methods import historical_var_es
+
+    rng = np.random.default_rng(0)
+    returns = (0.01 * rng.standard_t(4, (n_assets, n_days))).astype(np.float32)
+    results = [
+        measure(f'var.historical[{n_assets}x{n_days}]', lambda: historical_var_es(returns, horizons=(1, 10)), repeat=repeat),
+        measure(f'var.historical_rolling252[{n_assets}x{n_days}]', lambda: historical_var_es(returns, window=252), repeat=repeat),
+        measure(f'var.rolling_skiplist252[{n_days}]', lambda: rolling_var_es_series(returns[0], 252), repeat=repeat),
+        measure(f'var.backtest_historical[{n_assets}x{n_days}]', lambda: backtest_historical(returns, 252), repeat=repeat),
+    ]
+
+    import pandas as pd
+    panel = pd.DataFrame(returns[:50].T.astype(np.float64))
+    values = np.full(50, 1_000.0)
+    results.append(measure('var.monte_carlo[50 actifs, 200k chemins]',
+                           lambda: monte_carlo_var(panel, values, n_paths=200_000, n_workers=1), repeat=repeat))
+    results.append(measure(f'var.ewma_from_returns[{n_assets}]',
+                           lambda: EWMACovariance.from_returns(pd.DataFrame(returns.T.astype(np.float64))), repeat=repeat))
+    model = EWMACovariance.from_returns(pd.DataFrame(returns.T.astype(np.float64)))
+    day = returns[:, -1].astype(np.float64)
+    results.append(measure(f'var.ewma_update[{n_assets}]', lambda: model.update(day), repeat=repeat * 4, memory=False))
+    from utilities.volatility import fhs_var_es, fit_garch
+    results.append(measure(f'var.garch_fit[{n_assets}x{n_days}]', lambda: fit_garch(returns), repeat=repeat))
+    fit = fit_garch(returns)
+    results.append(measure(f'var.garch_fit_warm[{n_assets}x{n_days}]', lambda: fit_garch(returns, warm_start=fit), repeat=repeat))
+    results.append(measure(f'var.fhs[{n_assets}x{n_days}]', lambda: fhs_var_es(fit, horizons=(1, 10)), repeat=repeat))
+
+    weights = rng.uniform(0, 1_000, (n_assets, 100))
+    results.append(measure(f'var.parametric[{n_assets} actifs, 100 portefeuilles]',
+                           lambda: parametric_var(model.cov, weights), repeat=repeat * 4))
+    return results
+
+
+def bench_options(n_contracts, n_days, repeat):
+    import pandas as pd
+    from utilities.options import OptionBook, black_scholes, greeks, historical_shocks, implied_volatility
+
+    rng = np.random.default_rng(0)
+    n_quotes = 100_000
+    S, K = 100.0, rng.uniform(50, 150, n_quotes)
+    T, is_call = rng.uniform(0.02, 2.0, n_quotes), rng.random(n_quotes) < 0.5
+    prices = black_scholes(S, K, T, rng.uniform(0.1, 0.8, n_quotes), is_call, r=0.04)
+    results = [
+        measure(f'options.implied_vol[{n_quotes}]', lambda: implied_volatility(prices, S, K, T, is_call, r=0.04), repeat=repeat),
+        measure(f'options.greeks[{n_quotes}]', lambda: greeks(S, K, T, 0.3, is_call, r=0.04), repeat=repeat),
+    ]
+
+    underlyings = [f'U{i:02d}' for i in range(20)]
+    positions = pd.DataFrame({
+        'underlying': rng.choice(underlyings, n_contracts),
+        'strike': rng.uniform(50, 150, n_contracts),
+        'T': rng.uniform(0.02, 2.0, n_contracts),
+        'is_call': rng.random(n_contracts) < 0.5,
+        'quantity': rng.integers(-50, 50, n_contracts).astype(float),
+        'iv': rng.uniform(0.1, 0.8, n_contracts),
+    })
+    book = OptionBook(positions, dict.fromkeys(underlyings, 100.0), r=0.04)
+    shocks = historical_shocks(pd.DataFrame(0.02 * rng.standard_t(4, (n_days, len(underlyings))), columns=underlyings))
+    results += [
+        measure(f'options.delta_gamma[{n_contracts}x{n_days}]', lambda: book.delta_gamma_pnl(shocks), repeat=repeat),
+        measure(f'options.revaluation[{n_contracts}x{n_days}]', lambda: book.revaluation_pnl(shocks), repeat=repeat),
+        measure(f'options.ladder[{n_contracts}]', lambda: book.pnl_ladder(vol_shocks=(-0.05, 0.0, 0.05)), repeat=repeat),
+    ]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne des chemins critiques.")
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000], help="Tailles de l'univers de tickers.")
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32')
+    parser.add_argument('--tickers', type=int, default=200, help="Nombre d'historiques synthétiques.")
+    parser.add_argument('--days', type=int, default=1260, help="Longueur des historiques (5 ans de séances).")
+    parser.add_argument('--chart-points', type=int, default=100_000)
+    parser.add_argument('--var-assets', type=int, default=500)
+    parser.add_argument('--option-contracts', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=DEFAULT_RESULTS)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Écrit aussi les résultats comme nouvelle référence.")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='var-bench-') as workdir:
+        if 'search' in args.suites:
+            results += bench_search(args.sizes, args.dim, args.repeat, workdir, args.dtype)
+        if 'data' in args.suites:
+            results += bench_data(args.tickers, args.days, args.repeat, workdir)
+        if 'returns' in args.suites:
+            results += bench_returns(args.tickers, args.days, args.repeat)
+        if 'charts' in args.suites:
+            results += bench_charts(args.chart_points, args.repeat)
+        if 'var' in args.suites:
+            results += bench_var(args.var_assets, args.days, args.repeat)
+        if 'options' in args.suites:
+            results += bench_options(args.option_contracts, args.days, args.repeat)
+
+    write_results(args.output, results, vars(args))
+    print(f"Résultats écrits dans {args.output}")
+
+    if args.save_baseline:
+        write_results(args.baseline, results, vars(args))
+        print(f"Référence écrite dans {args.baseline}")
+    elif os.path.exists(args.baseline):
+        comparison = compare(results, args.baseline, args.tolerance)
+        print(comparison.to_string(index=False))
+        if comparison['regression'].any():
+            print("Régressions détectées :", ', '.join(comparison.loc[comparison['regression'], 'name']))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
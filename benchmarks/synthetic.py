@@ -0,0 +1,96 @@
+import os
+import zlib
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+
+ASSET_TYPES = ['STOCK', 'ETF', 'FOREX', 'FUTURE']
+_SYLLABLES = ['al', 'be', 'co', 'da', 'el', 'fi', 'go', 'ha', 'in', 'jo', 'ka', 'lu', 'ma', 'no', 'or',
+              'pa', 'qu', 'ri', 'so', 'tu', 'un', 've', 'wa', 'xi', 'yo', 'ze']
+_SUFFIXES = ['Corp', 'Inc', 'Holdings', 'Group', 'Fund', 'Trust', 'Energy', 'Capital', 'Systems', 'Bank']
+
+
+def synthetic_universe(n_rows, dim=384, seed=0, chunk=100_000):
+    """
+    Univers de tickers synthétique au format du store (colonnes Ticker, Name, Type) avec des
+    embeddings aléatoires normalisés, générés par blocs pour borner la mémoire.
+
+    Paramètres:
+        n_rows (int): Nombre d'actifs.
+        dim (int): Dimension des embeddings (384 comme all-MiniLM-L6-v2).
+        seed (int): Graine.
+        chunk (int): Lignes générées à la fois.
+
+    Retour:
+        tuple: (metadata DataFrame, embeddings float32 de forme (n_rows, dim)).
+    """
+    rng = np.random.default_rng(seed)
+    syllables = np.array(_SYLLABLES)
+    words = syllables[rng.integers(0, len(syllables), (n_rows, 3))]
+    names = pd.Series(np.char.add(np.char.add(words[:, 0], words[:, 1]), words[:, 2])).str.capitalize()
+    names = names + ' ' + pd.Series(np.array(_SUFFIXES)[rng.integers(0, len(_SUFFIXES), n_rows)])
+    metadata = pd.DataFrame({
+        'Ticker': [f'S{i:07d}' for i in range(n_rows)],
+        'Name': names,
+        'Type': np.array(ASSET_TYPES)[rng.choice(len(ASSET_TYPES), n_rows, p=[0.7, 0.2, 0.05, 0.05])],
+    })
+    embeddings = np.empty((n_rows, dim), dtype=np.float32)
+    for start in range(0, n_rows, chunk):
+        block = rng.standard_normal((min(chunk, n_rows - start), dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        embeddings[start:start + len(block)] = block
+    return metadata, embeddings
+
+
+class HashingEncoder:
+    """
+    Encodeur déterministe hors ligne remplaçant SentenceTransformer dans les benchmarks : les trigrammes
+    de caractères sont hachés dans un vecteur de dimension dim, puis normalisés. Même interface que
+    model.encode(texte) ; le coût est négligeable, le benchmark mesure donc la recherche elle-même.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, text, normalize_embeddings=True, **kwargs):
+        if not isinstance(text, str):
+            return np.stack([self.encode(t, normalize_embeddings) for t in text])
+        vector = np.zeros(self.dim, dtype=np.float32)
+        padded = f'  {text.casefold()} '
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode()) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if normalize_embeddings and norm else vector
+
+
+def gbm_history(n_days=1260, s0=100.0, mu=0.05, sigma=0.25, seed=0, end='2024-12-31', tz='America/New_York', freq='B'):
+    """
+    Historique synthétique au format de yf.Ticker(...).history(...).reset_index() : mouvement brownien
+    géométrique sur des jours ouvrés (ou à la fréquence freq, ex: 'min' pour une série intraday),
+    dates avec fuseau horaire. Le drift et la volatilité sont annualisés sur 252 pas.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1 / 252
+    log_returns = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(n_days)
+    close = s0 * np.exp(np.cumsum(log_returns))
+    spread = np.abs(rng.standard_normal(n_days)) * sigma * np.sqrt(dt) * close
+    return pd.DataFrame({
+        'Date': pd.date_range(end=end, periods=n_days, freq=freq, tz=tz),
+        'Open': close - spread * rng.uniform(-1, 1, n_days),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(100_000, 10_000_000, n_days),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    })
+
+
+def write_price_files(root, tickers, n_days=1260, seed=0):
+    """
+    Écrit un historique GBM par ticker dans <root>/<ticker>.parquet, lisible par LocalFileProvider.
+    """
+    os.makedirs(root, exist_ok=True)
+    for i, ticker in enumerate(tickers):
+        history = gbm_history(n_days, s0=50 + i % 200, sigma=0.15 + 0.3 * ((i * 7919) % 100) / 100, seed=seed + i)
+        history.to_parquet(os.path.join(root, quote(ticker, safe='') + '.parquet'), index=False)
@@ -0,0 +1,222 @@
+import time
+import numpy as np
+import pandas as pd
+from data.ticker_store import (DEFAULT_MODEL_NAME, DEFAULT_STORE_DIR, load_ticker_store, read_manifest, store_exists,
+                               write_ticker_store)
+
+# Dictionnaire associant tickers et noms complets pour le Forex
+FOREX = {
+    "EURUSD=X": "Euro / US Dollar",
+    "GBPUSD=X": "British Pound / US Dollar",
+    "USDJPY=X": "US Dollar / Japanese Yen",
+    "AUDUSD=X": "Australian Dollar / US Dollar",
+    "USDCAD=X": "US Dollar / Canadian Dollar",
+    "USDCHF=X": "US Dollar / Swiss Franc",
+    "NZDUSD=X": "New Zealand Dollar / US Dollar",
+    "EURGBP=X": "Euro / British Pound",
+    "EURJPY=X": "Euro / Japanese Yen",
+    "GBPJPY=X": "British Pound / Japanese Yen",
+    "AUDJPY=X": "Australian Dollar / Japanese Yen",
+    "EURAUD=X": "Euro / Australian Dollar",
+    "GBPCHF=X": "British Pound / Swiss Franc",
+    "CHFJPY=X": "Swiss Franc / Japanese Yen",
+    "CADJPY=X": "Canadian Dollar / Japanese Yen",
+    "NZDJPY=X": "New Zealand Dollar / Japanese Yen",
+    "EURCAD=X": "Euro / Canadian Dollar",
+    "GBPCAD=X": "British Pound / Canadian Dollar",
+    "AUDCAD=X": "Australian Dollar / Canadian Dollar",
+    "AUDCHF=X": "Australian Dollar / Swiss Franc",
+    "NZDCHF=X": "New Zealand Dollar / Swiss Franc"
+}
+
+# Dictionnaire associant tickers et noms complets des commodities
+COMMODITIES = {
+    "GC=F": "Gold Futures",
+    "SI=F": "Silver Futures",
+    "CL=F": "Crude Oil Futures",
+    "NG=F": "Natural Gas Futures",
+    "HG=F": "Copper Futures",
+    "ZC=F": "Corn Futures",
+    "ZW=F": "Wheat Futures",
+    "ZL=F": "Soybean Futures",
+    "KC=F": "Coffee Futures",
+    "CT=F": "Cotton Futures",
+    "SB=F": "Sugar Futures",
+    "LE=F": "Live Cattle Futures",
+    "HE=F": "Heating Oil Futures",
+    "RB=F": "RBOB Gasoline Futures",
+    "PL=F": "Platinum Futures",
+    "PA=F": "Palladium Futures",
+    "CC=F": "Cocoa Futures"
+}
+
+
+def _from_dict(mapping, asset_type):
+    df = pd.DataFrame(list(mapping.items()), columns=["Ticker", "Name"])
+    df["Type"] = asset_type
+    return df
+
+
+def forex_universe():
+    return _from_dict(FOREX, "FOREX")
+
+
+def commodities_universe():
+    return _from_dict(COMMODITIES, "FUTURE")
+
+
+def nasdaq_universe(csv_path='symbols_valid_meta.csv'):
+    """
+    Actions et ETF du fichier NASDAQ symbols_valid_meta.csv (colonne ETF = "Y" / "N").
+
+    Args:
+        csv_path (str): Chemin du fichier CSV.
+
+    Returns:
+        pd.DataFrame: Colonnes Ticker, Name, Type (STOCK ou ETF).
+    """
+    df = pd.read_csv(csv_path)[['Symbol', 'Security Name', 'ETF']]
+    df = df.rename(columns={'Symbol': 'Ticker', 'Security Name': 'Name'})
+    df['Type'] = np.where(df.pop('ETF') == 'Y', 'ETF', 'STOCK')
+    return df
+
+
+def financedatabase_universe():
+    """
+    Actions de la base financedatabase (import optionnel, uniquement si cette source est demandée).
+
+    Returns:
+        pd.DataFrame: Colonnes Ticker, Name, Type (STOCK).
+    """
+    import financedatabase as fd
+
+    equities = fd.Equities().select().reset_index()[["symbol", "name"]].dropna()
+    df = equities.rename(columns={'symbol': 'Ticker', 'name': 'Name'})
+    df['Type'] = 'STOCK'
+    return df
+
+
+def assemble_universe(frames):
+    """
+    Concatène les différentes sources ; en cas de ticker présent dans plusieurs sources, la première l'emporte.
+    """
+    df = pd.concat(frames, ignore_index=True).dropna(subset=['Ticker', 'Name'])
+    df['Ticker'] = df['Ticker'].astype(str)
+    df['Name'] = df['Name'].astype(str)
+    return df.drop_duplicates(subset='Ticker').reset_index(drop=True)
+
+
+def encode_names(model, names, batch_size=512):
+    """
+    Encode une liste de noms par lots, chaque nom distinct n'étant encodé qu'une seule fois.
+
+    Args:
+        model (SentenceTransformer): Modèle d'encodage.
+        names (array-like): Noms à encoder (avec doublons éventuels).
+        batch_size (int): Taille des lots passés au modèle.
+
+    Returns:
+        np.ndarray: Matrice (len(names), dim) d'embeddings normalisés, en float32.
+    """
+    codes, uniques = pd.factorize(pd.Series(names, dtype=str))
+    if len(uniques) == 0:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    unique_embeddings = model.encode(list(uniques), batch_size=batch_size, convert_to_numpy=True,
+                                     normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(unique_embeddings, dtype=np.float32)[codes]
+
+
+def previous_embeddings(store_dir, model_name):
+    """
+    Embeddings du build précédent indexés par nom, s'ils ont été produits par le même modèle.
+    L'embedding ne dépend que du nom : une paire (Ticker, Name) inchangée, comme un ticker
+    renommé vers un nom déjà connu, réutilise le vecteur existant. Un manifeste sans modèle (store
+    converti depuis le CSV avant que le modèle n'y soit enregistré) vaut DEFAULT_MODEL_NAME.
+
+    Returns:
+        tuple: (pd.Index des noms, np.ndarray des embeddings), ou (None, None) si rien n'est réutilisable.
+    """
+    if not store_exists(store_dir) or read_manifest(store_dir).get('model', DEFAULT_MODEL_NAME) != model_name:
+        return None, None
+    metadata, embeddings = load_ticker_store(store_dir)
+    names = pd.Index(metadata['Name'].astype(str))
+    keep = ~names.duplicated()
+    return names[keep], embeddings[np.flatnonzero(keep)]
+
+
+def build_universe(universe, store_dir=DEFAULT_STORE_DIR, model=None, model_name=DEFAULT_MODEL_NAME,
+                   dtype='float32', batch_size=512):
+    """
+    Construit (ou met à jour) le store binaire de l'univers de tickers.
+    Seuls les noms absents du build précédent sont encodés ; le modèle n'est chargé que s'il y en a.
+
+    Args:
+        universe (pd.DataFrame): Colonnes Ticker, Name, Type.
+        store_dir (str): Répertoire du store (lu pour la réutilisation, puis réécrit).
+        model (SentenceTransformer): Modèle déjà chargé ; chargé à la demande si None.
+        model_name (str): Nom du modèle, enregistré dans le manifeste.
+        dtype (str): 'float32' ou 'float16'.
+        batch_size (int): Taille des lots d'encodage.
+
+    Returns:
+        dict: Statistiques du build (lignes, réutilisées, encodées, noms distincts encodés, durée).
+    """
+    start = time.perf_counter()
+    names = universe['Name'].astype(str)
+    prev_names, prev_embeddings = previous_embeddings(store_dir, model_name)
+
+    embeddings = None
+    if prev_names is not None:
+        positions = prev_names.get_indexer(names)
+        reused = positions >= 0
+        embeddings = np.empty((len(universe), prev_embeddings.shape[1]), dtype=np.float32)
+        embeddings[reused] = prev_embeddings[positions[reused]]
+    else:
+        reused = np.zeros(len(universe), dtype=bool)
+
+    to_encode = np.flatnonzero(~reused)
+    if len(to_encode):
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+        new_embeddings = encode_names(model, names.iloc[to_encode], batch_size=batch_size)
+        if embeddings is None:
+            embeddings = np.empty((len(universe), new_embeddings.shape[1]), dtype=np.float32)
+        embeddings[to_encode] = new_embeddings
+
+    if embeddings is None:
+        embeddings = np.empty((0, 0), dtype=np.float32)
+
+    stats = {
+        'rows': int(len(universe)),
+        'reused': int(reused.sum()),
+        'encoded': int(len(to_encode)),
+        'encoded_unique_names': int(names.iloc[to_encode].nunique()),
+    }
+    write_ticker_store(universe, embeddings, store_dir, dtype=dtype,
+                       extra_manifest={'model': model_name, 'built_at': pd.Timestamp.now('UTC').isoformat()})
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Construit ou met à jour le store d'embeddings de l'univers de tickers.")
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--nasdaq-csv', default=None, help="Fichier symbols_valid_meta.csv (actions et ETF NASDAQ)")
+    parser.add_argument('--financedatabase', action='store_true', help="Ajoute les actions de financedatabase")
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32')
+    parser.add_argument('--batch-size', type=int, default=512)
+    args = parser.parse_args()
+
+    frames = [forex_universe(), commodities_universe()]
+    if args.nasdaq_csv:
+        frames.append(nasdaq_universe(args.nasdaq_csv))
+    if args.financedatabase:
+        frames.append(financedatabase_universe())
+
+    stats = build_universe(assemble_universe(frames), args.store_dir, model_name=args.model,
+                           dtype=args.dtype, batch_size=args.batch_size)
+    print(stats)
@@ -1,4 +1,40 @@
-import yfinance as yf
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from data.price_store import PriceStore
+from data.fundamentals_cache import FundamentalsCache
+from data.market_data import SharedMarketData
+from data.option_chains import load_option_chain, option_expirations
+from utilities.cache import LRUCache
+from utilities.memo import ANALYTICS
+from utilities.metrics import METRICS, timed
+
+# Store local partagé par tous les appels à tickerf
+PRICE_STORE = PriceStore()
+
+# Historiques en mémoire, une copie par ticker pour toutes les sessions, sous budget mémoire
+MARKET_DATA = SharedMarketData(PRICE_STORE)
+
+
+def _on_new_bars(ticker, version):
+    # Nouvelles barres : la copie partagée et les résultats dérivés de l'ancienne version sont périmés
+    MARKET_DATA.invalidate(ticker)
+    ANALYTICS.invalidate(ticker, version)
+
+
+PRICE_STORE.listeners.append(_on_new_bars)
+
+# Cache des fondamentaux (.info) partagé par get_fundamental_info et get_long_business_summary
+FUNDAMENTALS = FundamentalsCache()
+
+# Chaînes d'options : les cotations changent en séance, d'où une courte durée de vie
+OPTION_CHAINS = LRUCache(maxsize=256, ttl=15 * 60)
+
+METRICS.register_collector('fundamentals', FUNDAMENTALS.stats)
+METRICS.register_collector('market_data', MARKET_DATA.stats)
+METRICS.register_collector('analytics', ANALYTICS.stats)
+METRICS.register_collector('option_chains', OPTION_CHAINS.stats)
 
 def get_long_business_summary(ticker: str):
     """
@@ -11,8 +47,7 @@ def get_long_business_summary(ticker: str):
         str: The long business summary if available, or None otherwise.
     """
     try:
-        tkr = yf.Ticker(ticker)
-        info = tkr.info
+        info = FUNDAMENTALS.get_info(ticker)
         summary = info.get('longBusinessSummary')
         if summary:
             return summary
@@ -23,9 +58,12 @@ def get_long_business_summary(ticker: str):
         print(f"Error retrieving long business summary for ticker {ticker}: {e}")
         return None
     
+@timed('tickerf')
 def tickerf(ticker: str):
     """
     Retrieve historical data for a given ticker over the last 5 years.
+    Data is served from the local price store and only the missing bars are downloaded.
+    The returned frame is shared by all sessions and must not be modified in place.
 
     Args:
         ticker (str): The ticker symbol (e.g., 'ABEQ').
@@ -35,19 +73,113 @@ def tickerf(ticker: str):
                    or None if no data is found.
     """
     try:
-        # Create a Ticker object
-        tkr = yf.Ticker(ticker)
-        # Retrieve historical data over the past 5 years
-        hist = tkr.history(period="5y")
-        if hist.empty:
+        # Copie partagée en mémoire, sinon store local : réseau uniquement pour les barres manquantes, au-delà du TTL
+        hist = MARKET_DATA.get(ticker)
+        if hist is None:
             print(f"No data found for ticker: {ticker}")
             return None
-        return hist.reset_index()
+        return hist
     except Exception as e:
         print(f"Error retrieving data for ticker {ticker}: {e}")
         return None
     
 
+def data_version(ticker: str):
+    """
+    Version of the stored history of a ticker, incremented whenever new bars are written.
+    Used as part of the memoization keys of derived analytics.
+    """
+    return PRICE_STORE.version(ticker)
+
+
+def _fetch_with_retry(ticker, retries, backoff):
+    """
+    Read a history through the price store, retrying with exponential backoff (and jitter) on errors.
+    A missing ticker is not retried.
+    """
+    for attempt in range(retries + 1):
+        try:
+            hist = PRICE_STORE.get(ticker)
+            if hist is None:
+                raise LookupError(f"No data found for ticker: {ticker}")
+            return hist
+        except LookupError:
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+
+def iter_tickers_bulk(tickers, max_workers=8, retries=3, backoff=0.5):
+    """
+    Retrieve the historical data of many tickers concurrently, yielding each result as soon as it arrives.
+
+    Args:
+        tickers (list): The ticker symbols.
+        max_workers (int): Size of the thread pool (bounds the number of simultaneous requests).
+        retries (int): Number of retries per ticker after a network error.
+        backoff (float): Base delay in seconds of the exponential backoff.
+
+    Yields:
+        tuple: (ticker, DataFrame or None, error message or None), in completion order.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_fetch_with_retry, t, retries, backoff): t for t in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                yield ticker, future.result(), None
+            except Exception as e:
+                yield ticker, None, str(e)
+
+
+def daily_series(hist, column='Close'):
+    """
+    Return one column of a history indexed by calendar date (timezone dropped),
+    so that assets listed on different exchanges can be aligned.
+    """
+    dates = pd.to_datetime(hist['Date'])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    series = pd.Series(hist[column].to_numpy(), index=dates.dt.normalize().to_numpy())
+    return series[~series.index.duplicated(keep='last')]
+
+
+def tickers_bulk(tickers, column='Close', max_workers=8, retries=3, backoff=0.5, on_progress=None):
+    """
+    Retrieve the historical data of many tickers concurrently and align them in a single panel.
+    A failing ticker is reported in 'failures' without aborting the batch.
+
+    Args:
+        tickers (list): The ticker symbols.
+        column (str): Column used to build the aligned panel.
+        max_workers (int): Size of the thread pool.
+        retries (int): Number of retries per ticker after a network error.
+        backoff (float): Base delay in seconds of the exponential backoff.
+        on_progress (callable): Called as on_progress(done, total, ticker, error) after each ticker.
+
+    Returns:
+        dict: 'panel' (DataFrame dates x tickers, NaN where an asset has no bar),
+              'histories' (dict ticker -> DataFrame) and 'failures' (dict ticker -> error message).
+    """
+    tickers = list(dict.fromkeys(tickers))
+    histories, failures = {}, {}
+    for done, (ticker, hist, error) in enumerate(iter_tickers_bulk(tickers, max_workers, retries, backoff), start=1):
+        if error is None:
+            histories[ticker] = hist
+        else:
+            failures[ticker] = error
+        if on_progress is not None:
+            on_progress(done, len(tickers), ticker, error)
+
+    ordered = [t for t in tickers if t in histories]
+    panel = pd.concat({t: daily_series(histories[t], column) for t in ordered}, axis=1).sort_index() if ordered else pd.DataFrame()
+    return {"panel": panel, "histories": histories, "failures": failures}
+
+
+@timed('get_fundamental_info')
 def get_fundamental_info(ticker_symbol):
     """
     Récupère les informations fondamentales d'une entreprise à partir de son ticker.
@@ -59,13 +191,61 @@ def get_fundamental_info(ticker_symbol):
         dict: Un dictionnaire contenant le nom de l'entreprise, le secteur, l'industrie,
               la capitalisation boursière et un résumé de l'activité.
     """
-    ticker = yf.Ticker(ticker_symbol)
-    info = ticker.info
-    
+    info = FUNDAMENTALS.get_info(ticker_symbol)
+
     return {
         "Nom de l'entreprise": info.get("longName"),
         "Secteur": info.get("sector"),
         "Industrie": info.get("industry"),
         "Capitalisation boursière": info.get("marketCap"),
         "Résumé de l'activité": info.get("longBusinessSummary")
-    }
\ No newline at end of file
+    }
+
+
+def prefetch_fundamentals(tickers):
+    """
+    Précharge en arrière-plan les informations fondamentales d'une liste de tickers
+    (par exemple les résultats d'une recherche), pour que l'actif choisi soit déjà en cache.
+
+    Args:
+        tickers (list): Les symboles boursiers.
+    """
+    FUNDAMENTALS.prefetch(list(tickers))
+
+
+def get_option_expirations(ticker: str):
+    """
+    Retrieve the listed option expirations of an underlying (cached for 15 minutes).
+
+    Args:
+        ticker (str): The underlying ticker symbol (e.g., 'AAPL').
+
+    Returns:
+        list: Expiration dates ('YYYY-MM-DD'), empty if the ticker has no listed options or on error.
+    """
+    try:
+        return OPTION_CHAINS.get_or_compute((ticker, 'expirations'), lambda: option_expirations(ticker))
+    except Exception as e:
+        print(f"Error retrieving option expirations for ticker {ticker}: {e}")
+        return []
+
+
+@timed('get_option_chain')
+def get_option_chain(ticker: str, expirations=None):
+    """
+    Retrieve the option chain of an underlying, all expirations being downloaded concurrently.
+    The result is cached for 15 minutes and shared by all sessions; it must not be modified in place.
+
+    Args:
+        ticker (str): The underlying ticker symbol (e.g., 'AAPL').
+        expirations (list): Expirations to load; all listed expirations if None.
+
+    Returns:
+        DataFrame: One row per contract (see data.option_chains.normalize_chain), or None on error.
+    """
+    key = (ticker, tuple(expirations) if expirations is not None else None)
+    try:
+        return OPTION_CHAINS.get_or_compute(key, lambda: load_option_chain(ticker, expirations))
+    except Exception as e:
+        print(f"Error retrieving option chain for ticker {ticker}: {e}")
+        return None
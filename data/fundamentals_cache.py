@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from utilities.cache import LRUCache
+from utilities.metrics import span
+
+# Répertoire du package data : le cache ne dépend pas du répertoire courant
+DEFAULT_FUNDAMENTALS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fundamentals_cache')
+DEFAULT_FUNDAMENTALS_TTL = 24 * 3600
+
+
+class FundamentalsCache:
+    """
+    Cache des réponses yf.Ticker(...).info, l'un des appels yfinance les plus lents.
+
+    Trois niveaux : cache mémoire LRU (partagé par les sessions du processus), fichiers JSON sur disque
+    (partagés entre processus et redémarrages), puis réseau. Les deux niveaux appliquent le même TTL.
+    prefetch() réchauffe le cache en arrière-plan pour une liste de tickers.
+    """
+
+    def __init__(self, root=DEFAULT_FUNDAMENTALS_DIR, ttl=DEFAULT_FUNDAMENTALS_TTL, maxsize=2048, max_workers=4, fetcher=None):
+        """
+        Args:
+            root (str): Répertoire des fichiers JSON persistés.
+            ttl (float): Durée de validité d'une réponse, en secondes.
+            maxsize (int): Nombre maximal d'entrées en mémoire.
+            max_workers (int): Nombre de threads de préchargement.
+            fetcher (callable): fetcher(ticker) -> dict ; yf.Ticker(ticker).info par défaut.
+        """
+        self.root = root
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.fetcher = fetcher or _fetch_info
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fundamentals')
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.fetch_seconds = []
+
+    def _path(self, ticker):
+        return os.path.join(self.root, quote(ticker, safe='') + '.json')
+
+    def _read_disk(self, ticker):
+        try:
+            with open(self._path(ticker)) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - entry['fetched_at'] >= self.ttl:
+            return None
+        return entry['info']
+
+    def _write_disk(self, ticker, info):
+        # Répertoire créé à la première écriture : importer le module ne touche pas au disque
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._path(ticker) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'fetched_at': time.time(), 'info': info}, f, default=str)
+        os.replace(tmp, self._path(ticker))
+
+    def get_info(self, ticker):
+        """
+        Renvoie le dictionnaire .info d'un ticker depuis le cache, ou le télécharge.
+
+        Args:
+            ticker (str): Le symbole boursier (ex: "AAPL").
+
+        Returns:
+            dict: Le dictionnaire d'informations yfinance.
+        """
+        info = self.memory.get(ticker)
+        if info is not None:
+            return info
+
+        info = self._read_disk(ticker)
+        if info is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            start = time.perf_counter()
+            try:
+                info = self.fetcher(ticker)
+            except Exception:
+                with self._lock:
+                    self.fetch_errors += 1
+                raise
+            with self._lock:
+                self.fetches += 1
+                self.fetch_seconds.append(time.perf_counter() - start)
+                del self.fetch_seconds[:-1000]
+            self._write_disk(ticker, info)
+        self.memory.put(ticker, info)
+        return info
+
+    def _prefetch_one(self, ticker):
+        try:
+            self.get_info(ticker)
+        except Exception as e:
+            print(f"Error prefetching fundamentals for ticker {ticker}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(ticker)
+
+    def prefetch(self, tickers):
+        """
+        Réchauffe le cache en arrière-plan pour les tickers absents du cache mémoire (sans bloquer l'appelant).
+        """
+        for ticker in tickers:
+            if ticker in self.memory:
+                continue
+            with self._lock:
+                if ticker in self._in_flight:
+                    continue
+                self._in_flight.add(ticker)
+            self._executor.submit(self._prefetch_one, ticker)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Statistiques du cache mémoire, hits disque, téléchargements et latences (en ms).
+        """
+        with self._lock:
+            latencies = sorted(self.fetch_seconds)
+            in_flight = len(self._in_flight)
+        return {
+            "memory": self.memory.stats(),
+            "disk_hits": self.disk_hits,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "in_flight": in_flight,
+            "fetch_ms_p50": latencies[len(latencies) // 2] * 1000 if latencies else None,
+            "fetch_ms_max": latencies[-1] * 1000 if latencies else None,
+        }
+
+
+def _fetch_info(ticker):
+    import yfinance as yf
+
+    with span('yfinance.info'):
+        return yf.Ticker(ticker).info
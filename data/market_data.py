@@ -0,0 +1,76 @@
+import threading
+from utilities.cache import LRUCache
+
+# Budget mémoire par défaut des historiques partagés par toutes les sessions du processus
+DEFAULT_MARKET_DATA_BUDGET = 512 * 2 ** 20
+
+
+def frame_nbytes(df):
+    """
+    Taille mémoire d'un DataFrame, index et colonnes objet compris.
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class SharedMarketData:
+    """
+    Historiques de prix partagés par toutes les sessions Streamlit d'un processus : une seule copie
+    par ticker, servie par référence. Les sessions ne gardent que le ticker et leurs quantités.
+
+    Les entrées sont évincées dans l'ordre LRU dès que le budget mémoire est dépassé, puis
+    rechargées à la demande depuis le PriceStore local (lecture Parquet, sans réseau dans le TTL).
+    Elles expirent avec le TTL du store pour que les nouvelles barres soient prises en compte.
+    """
+
+    def __init__(self, price_store, max_bytes=DEFAULT_MARKET_DATA_BUDGET, maxsize=4096):
+        """
+        Args:
+            price_store (PriceStore): Store local servant au (re)chargement.
+            max_bytes (int): Budget mémoire total des historiques en cache, en octets.
+            maxsize (int): Nombre maximal de tickers en cache.
+        """
+        self.price_store = price_store
+        self.cache = LRUCache(maxsize=maxsize, ttl=price_store.ttl.total_seconds(),
+                              max_bytes=max_bytes, sizeof=frame_nbytes)
+        self.loads = 0
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def get(self, ticker):
+        """
+        Historique partagé d'un ticker. Le DataFrame renvoyé est commun à toutes les sessions :
+        il ne doit pas être modifié en place (travailler sur une copie ou sur des colonnes dérivées).
+
+        Args:
+            ticker (str): Le symbole (ex: 'AAPL').
+
+        Returns:
+            DataFrame: L'historique, ou None si aucune donnée n'est disponible.
+        """
+        hist = self.cache.get(ticker)
+        if hist is not None:
+            return hist
+        # Un seul chargement par ticker, même si plusieurs sessions le demandent en même temps
+        with self._lock(ticker):
+            if ticker in self.cache:
+                return self.cache.get(ticker)
+            hist = self.price_store.get(ticker)
+            if hist is None:
+                return None
+            self.loads += 1
+            self.cache.put(ticker, hist)
+        return hist
+
+    def invalidate(self, ticker):
+        self.cache.invalidate(ticker)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Octets détenus, nombre d'entrées, évictions, hits / misses et chargements depuis le store.
+        """
+        return {**self.cache.stats(), "loads": self.loads}
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from utilities.metrics import span
+
+# Colonnes conservées de yf.Ticker(...).option_chain(...).calls / .puts
+CHAIN_COLUMNS = ['contractSymbol', 'strike', 'bid', 'ask', 'lastPrice', 'volume', 'openInterest', 'impliedVolatility']
+
+# Symbole OCC : sous-jacent, échéance AAMMJJ, C / P, prix d'exercice x 1000 sur 8 chiffres (ex: AAPL250117C00150000)
+_OCC_PATTERN = r'^(?P<underlying>.+?)(?P<expiration>\d{6})(?P<type>[CP])(?P<strike>\d{8})$'
+
+
+def parse_occ_symbols(symbols):
+    """
+    Décode des symboles de contrats au format OCC.
+
+    Args:
+        symbols (str | list | pd.Series): Symboles (ex: 'AAPL250117C00150000').
+
+    Returns:
+        pd.DataFrame: Colonnes 'underlying', 'expiration', 'is_call' et 'strike' ; NaN si le symbole n'est pas un contrat.
+    """
+    symbols = pd.Series([symbols] if isinstance(symbols, str) else symbols, dtype=str)
+    parts = symbols.str.extract(_OCC_PATTERN)
+    return pd.DataFrame({
+        'underlying': parts['underlying'],
+        'expiration': pd.to_datetime(parts['expiration'], format='%y%m%d'),
+        'is_call': parts['type'].map({'C': True, 'P': False}),
+        'strike': parts['strike'].astype(float) / 1000,
+    }, index=symbols.index)
+
+
+def option_expirations(ticker):
+    """
+    Échéances cotées des options d'un sous-jacent (AAAA-MM-JJ), via yfinance.
+    """
+    import yfinance as yf
+
+    with span('yfinance.options'):
+        return list(yf.Ticker(ticker).options)
+
+
+def _fetch_chain(ticker, expiration):
+    import yfinance as yf
+
+    with span('yfinance.option_chain'):
+        chain = yf.Ticker(ticker).option_chain(expiration)
+    return chain.calls, chain.puts
+
+
+def normalize_chain(calls, puts, ticker, expiration):
+    """
+    Met les calls et puts d'une échéance dans un seul DataFrame : une ligne par contrat, colonnes
+    numériques en float64, 'is_call' et 'expiration' ajoutées.
+
+    Args:
+        calls (pd.DataFrame): Calls au format yfinance.
+        puts (pd.DataFrame): Puts au format yfinance.
+        ticker (str): Le sous-jacent.
+        expiration (str): Date d'échéance (AAAA-MM-JJ).
+
+    Returns:
+        pd.DataFrame: Chaîne normalisée.
+    """
+    frames = []
+    for is_call, df in ((True, calls), (False, puts)):
+        df = df.reindex(columns=CHAIN_COLUMNS)
+        numeric = CHAIN_COLUMNS[1:]
+        df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce').astype(float)
+        frames.append(df.assign(is_call=is_call))
+    chain = pd.concat(frames, ignore_index=True)
+    chain.insert(0, 'underlying', ticker)
+    chain.insert(1, 'expiration', pd.Timestamp(expiration))
+    return chain.rename(columns={'impliedVolatility': 'yahoo_iv'})
+
+
+def load_option_chain(ticker, expirations=None, max_workers=4, fetch_expirations=None, fetch_chain=None):
+    """
+    Charge la chaîne d'options d'un sous-jacent : une requête par échéance, exécutées en parallèle.
+
+    Args:
+        ticker (str): Le sous-jacent (ex: 'AAPL').
+        expirations (list): Échéances à charger ; toutes les échéances cotées si None.
+        max_workers (int): Nombre de requêtes simultanées.
+        fetch_expirations (callable): fetch_expirations(ticker) -> liste des échéances ; yfinance par défaut.
+        fetch_chain (callable): fetch_chain(ticker, expiration) -> (calls, puts) ; yfinance par défaut.
+
+    Returns:
+        pd.DataFrame: Tous les contrats, triés par échéance, type et prix d'exercice (vide si aucune option).
+    """
+    fetch_chain = fetch_chain or _fetch_chain
+    if expirations is None:
+        expirations = (fetch_expirations or option_expirations)(ticker)
+    expirations = list(expirations)
+    if not expirations:
+        return pd.DataFrame(columns=['underlying', 'expiration'] + CHAIN_COLUMNS[:-1] + ['yahoo_iv', 'is_call'])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chains = list(executor.map(lambda e: normalize_chain(*fetch_chain(ticker, e), ticker, e), expirations))
+    chain = pd.concat(chains, ignore_index=True)
+    return chain.sort_values(['expiration', 'is_call', 'strike'], ascending=[True, False, True], ignore_index=True)
@@ -0,0 +1,229 @@
+import os
+import json
+import threading
+from datetime import timedelta
+from urllib.parse import quote
+import pandas as pd
+from utilities.metrics import span
+
+# Répertoire du package data : le store ne dépend pas du répertoire courant
+DEFAULT_PRICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_store')
+DEFAULT_PERIOD = '5y'
+DEFAULT_TTL = timedelta(hours=12)
+
+# Tolérance relative sur le Close de la barre de recouvrement avant de considérer
+# que l'historique a été ré-ajusté (dividende, split) et doit être retéléchargé en entier
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+def period_offset(period):
+    """
+    Convertit une période yfinance ('5y', '6mo', '30d') en pd.DateOffset.
+    """
+    for suffix, unit in (('mo', 'months'), ('y', 'years'), ('d', 'days')):
+        if period.endswith(suffix):
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Période non supportée : {period}")
+
+
+class PriceProvider:
+    """
+    Source d'historiques de prix. Une implémentation renvoie un DataFrame au format de
+    yf.Ticker(...).history(...).reset_index() : colonne 'Date' puis Open, High, Low, Close, Volume, etc.
+    """
+
+    def history(self, ticker, start=None, period=DEFAULT_PERIOD):
+        """
+        Args:
+            ticker (str): Le symbole (ex: 'AAPL').
+            start (str): Date de début incluse ('YYYY-MM-DD') ; si None, toute la période est renvoyée.
+            period (str): Période à renvoyer lorsque start est None.
+
+        Returns:
+            DataFrame: Les barres demandées (éventuellement vide).
+        """
+        raise NotImplementedError
+
+
+class YFinanceProvider(PriceProvider):
+    """
+    Historiques téléchargés depuis Yahoo Finance via yfinance.
+    """
+
+    def history(self, ticker, start=None, period=DEFAULT_PERIOD):
+        import yfinance as yf
+
+        tkr = yf.Ticker(ticker)
+        with span('yfinance.history'):
+            hist = tkr.history(start=start) if start is not None else tkr.history(period=period)
+        return hist.reset_index()
+
+
+class LocalFileProvider(PriceProvider):
+    """
+    Historiques lus dans des fichiers locaux <root>/<ticker>.parquet (ou .csv) : remplaçant de
+    yfinance sans réseau pour les tests et les benchmarks. Compte les appels dans self.calls.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.calls = 0
+
+    def history(self, ticker, start=None, period=DEFAULT_PERIOD):
+        self.calls += 1
+        base = os.path.join(self.root, quote(ticker, safe=''))
+        if os.path.exists(base + '.parquet'):
+            df = pd.read_parquet(base + '.parquet')
+        elif os.path.exists(base + '.csv'):
+            df = pd.read_csv(base + '.csv', parse_dates=['Date'])
+        else:
+            return pd.DataFrame()
+        if start is not None:
+            start = pd.Timestamp(start)
+            if df['Date'].dt.tz is not None:
+                start = start.tz_localize(df['Date'].dt.tz)
+            return df[df['Date'] >= start].reset_index(drop=True)
+        return df[df['Date'] >= df['Date'].max() - period_offset(period)].reset_index(drop=True)
+
+
+class PriceStore:
+    """
+    Store local des historiques OHLCV, un fichier Parquet (colonnaire) par ticker.
+
+    - premier appel : téléchargement complet de la période puis sauvegarde ;
+    - appels suivants dans le TTL : lecture locale, aucun accès réseau ;
+    - au-delà du TTL : seules les barres à partir de l'avant-dernière date stockée sont téléchargées
+      et ajoutées (la dernière barre, éventuellement partielle, est remplacée).
+    Si le Close de l'avant-dernière barre, dernière barre complète, diffère, l'historique a été ré-ajusté
+    et il est retéléchargé en entier.
+    """
+
+    def __init__(self, root=DEFAULT_PRICE_DIR, provider=None, ttl=DEFAULT_TTL, period=DEFAULT_PERIOD):
+        """
+        Args:
+            root (str): Répertoire du store.
+            provider (PriceProvider): Source des données (YFinanceProvider par défaut).
+            ttl (timedelta): Durée pendant laquelle un historique est servi sans accès réseau.
+            period (str): Profondeur d'historique conservée.
+        """
+        self.root = root
+        self.provider = provider or YFinanceProvider()
+        self.ttl = ttl
+        self.period = period
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        # Fonctions listener(ticker, version) appelées à chaque modification d'un historique
+        self.listeners = []
+
+    def _path(self, ticker, ext):
+        return os.path.join(self.root, quote(ticker, safe='') + ext)
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def read_meta(self, ticker):
+        """
+        Métadonnées d'un ticker stocké (fetched_at, rows, last_date, version), ou None.
+        """
+        try:
+            with open(self._path(ticker, '.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def version(self, ticker):
+        """
+        Numéro de version des données d'un ticker, incrémenté à chaque modification de l'historique.
+        """
+        meta = self.read_meta(ticker)
+        return meta['version'] if meta else 0
+
+    def read(self, ticker):
+        """
+        Historique stocké localement, sans accès réseau, ou None.
+        """
+        path = self._path(ticker, '.parquet')
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    def _write(self, ticker, df, meta, changed):
+        now = pd.Timestamp.now('UTC')
+        version = (meta['version'] if meta else 0) + (1 if changed else 0)
+        # Répertoire créé à la première écriture : importer le module ne touche pas au disque
+        os.makedirs(self.root, exist_ok=True)
+        if changed:
+            tmp = self._path(ticker, '.parquet.tmp')
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, self._path(ticker, '.parquet'))
+        tmp = self._path(ticker, '.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({
+                'fetched_at': now.isoformat(),
+                'rows': int(len(df)),
+                'last_date': str(df['Date'].iloc[-1]),
+                'version': version,
+            }, f)
+        os.replace(tmp, self._path(ticker, '.json'))
+        if changed:
+            for listener in self.listeners:
+                listener(ticker, version)
+
+    def is_fresh(self, meta):
+        return meta is not None and pd.Timestamp.now('UTC') - pd.Timestamp(meta['fetched_at']) < self.ttl
+
+    def _trim(self, df):
+        return df[df['Date'] >= df['Date'].iloc[-1] - period_offset(self.period)].reset_index(drop=True)
+
+    def get(self, ticker):
+        """
+        Historique d'un ticker sur la période du store, mis à jour de façon incrémentale si nécessaire.
+
+        Args:
+            ticker (str): Le symbole (ex: 'AAPL').
+
+        Returns:
+            DataFrame: L'historique (colonne 'Date' puis OHLCV), ou None si aucune donnée n'est disponible.
+        """
+        with self._lock(ticker):
+            meta = self.read_meta(ticker)
+            stored = self.read(ticker)
+            if stored is not None and self.is_fresh(meta):
+                return stored
+
+            try:
+                if stored is None:
+                    fetched = self.provider.history(ticker, period=self.period)
+                    if fetched.empty:
+                        return None
+                    df = self._trim(fetched)
+                    self._write(ticker, df, meta, changed=True)
+                    return df
+
+                # La dernière barre stockée peut être partielle (écrite en séance) : le téléchargement repart
+                # de la barre précédente, dernière barre complète, qui sert seule à détecter un ré-ajustement
+                last_date = stored['Date'].iloc[-1]
+                start = stored['Date'].iloc[-2] if len(stored) > 1 else last_date
+                fetched = self.provider.history(ticker, start=start.strftime('%Y-%m-%d'))
+                if fetched.empty:
+                    self._write(ticker, stored, meta, changed=False)
+                    return stored
+
+                # Détection d'un ré-ajustement de l'historique sur les barres complètes communes
+                overlap = stored[stored['Date'] < last_date].merge(fetched[['Date', 'Close']], on='Date',
+                                                                   suffixes=('', '_new'))
+                if len(overlap) and ((overlap['Close'] - overlap['Close_new']).abs()
+                                     > ADJUSTMENT_TOLERANCE * overlap['Close'].abs()).any():
+                    # Les clôtures anciennes ont changé même si la longueur et la dernière barre sont identiques
+                    df = self._trim(self.provider.history(ticker, period=self.period))
+                    changed = True
+                else:
+                    first_new = fetched['Date'].iloc[0]
+                    df = self._trim(pd.concat([stored[stored['Date'] < first_new], fetched], ignore_index=True))
+                    changed = len(df) != len(stored) or not df.tail(1).equals(stored.tail(1))
+                self._write(ticker, df, meta, changed=changed)
+                return df
+            except Exception as e:
+                if stored is not None:
+                    print(f"Error refreshing data for ticker {ticker}, serving stored history: {e}")
+                    return stored
+                raise
@@ -0,0 +1,194 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+DEFAULT_CSV_PATH = 'data/tickers_data.csv'
+DEFAULT_STORE_DIR = 'data/tickers_store'
+# Modèle qui a produit les embeddings de tickers_data.csv (voir fetch_ticker.ipynb)
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+METADATA_FILE = 'metadata.parquet'
+MANIFEST_FILE = 'manifest.json'
+
+METADATA_COLUMNS = ['Ticker', 'Name', 'Type']
+
+
+def normalize_rows(matrix):
+    """
+    Normalise chaque ligne d'une matrice d'embeddings (norme L2 = 1), sans diviser par zéro.
+
+    Args:
+        matrix (np.ndarray): Matrice (n_actifs, dim).
+
+    Returns:
+        np.ndarray: Matrice normalisée, en float32.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def write_ticker_store(metadata, embeddings, store_dir=DEFAULT_STORE_DIR, dtype='float32', extra_manifest=None):
+    """
+    Écrit un store binaire : matrice d'embeddings normalisée et contiguë (.npy), métadonnées
+    Ticker/Name/Type en colonnes (.parquet) et un manifeste JSON.
+
+    Args:
+        metadata (pd.DataFrame): DataFrame contenant au minimum les colonnes 'Ticker', 'Name' et 'Type'.
+        embeddings (np.ndarray): Matrice (n_actifs, dim) alignée sur les lignes de metadata.
+        store_dir (str): Répertoire de destination.
+        dtype (str): 'float32' ou 'float16' pour la matrice stockée.
+        extra_manifest (dict): Champs supplémentaires à ajouter au manifeste (ex: nom du modèle).
+
+    Returns:
+        str: Le chemin du répertoire du store.
+    """
+    if dtype not in ('float32', 'float16'):
+        raise ValueError("Le paramètre dtype doit être 'float32' ou 'float16'.")
+    if len(metadata) != len(embeddings):
+        raise ValueError("metadata et embeddings doivent avoir le même nombre de lignes.")
+
+    os.makedirs(store_dir, exist_ok=True)
+    # Tri stable par Type : chaque type d'actif occupe une tranche contiguë de la matrice,
+    # ce qui permet une recherche filtrée sur une simple vue (voir utilities.search_bar.AssetIndex)
+    order = np.argsort(metadata['Type'].astype(str).to_numpy(), kind='stable')
+    metadata = metadata.iloc[order]
+    matrix = np.ascontiguousarray(normalize_rows(np.asarray(embeddings)[order]).astype(dtype))
+
+    # Écriture dans des fichiers temporaires puis renommage, pour qu'un lecteur ne voie jamais un store partiel
+    tmp_embeddings = os.path.join(store_dir, EMBEDDINGS_FILE + '.tmp')
+    with open(tmp_embeddings, 'wb') as f:
+        np.save(f, matrix)
+    tmp_metadata = os.path.join(store_dir, METADATA_FILE + '.tmp')
+    metadata[METADATA_COLUMNS].reset_index(drop=True).astype(str).to_parquet(tmp_metadata, index=False)
+
+    manifest = {
+        'rows': int(matrix.shape[0]),
+        'dim': int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        'dtype': dtype,
+        'normalized': True,
+    }
+    if extra_manifest:
+        manifest.update(extra_manifest)
+    tmp_manifest = os.path.join(store_dir, MANIFEST_FILE + '.tmp')
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp_embeddings, os.path.join(store_dir, EMBEDDINGS_FILE))
+    os.replace(tmp_metadata, os.path.join(store_dir, METADATA_FILE))
+    os.replace(tmp_manifest, os.path.join(store_dir, MANIFEST_FILE))
+    return store_dir
+
+
+def convert_csv_to_store(csv_path=DEFAULT_CSV_PATH, store_dir=DEFAULT_STORE_DIR, dtype='float32', chunksize=50_000,
+                         model_name=DEFAULT_MODEL_NAME):
+    """
+    Convertit l'ancien fichier CSV (embeddings sérialisés en JSON dans chaque ligne) vers le store binaire.
+    Le CSV est lu par blocs pour que la conversion ne garde jamais tous les objets Python en mémoire.
+
+    Args:
+        csv_path (str): Chemin du CSV d'origine (colonnes Ticker, Name, Type, embeddings).
+        store_dir (str): Répertoire de destination du store.
+        dtype (str): 'float32' ou 'float16' pour la matrice stockée.
+        chunksize (int): Nombre de lignes lues par bloc.
+        model_name (str): Modèle qui a produit les embeddings du CSV, enregistré dans le manifeste
+            pour que data.build_universe puisse les réutiliser.
+
+    Returns:
+        str: Le chemin du répertoire du store.
+    """
+    metadata_chunks = []
+    embedding_chunks = []
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        vectors = np.array([json.loads(s) for s in chunk['embeddings']], dtype=np.float32)
+        embedding_chunks.append(normalize_rows(vectors))
+        metadata_chunks.append(chunk[METADATA_COLUMNS])
+
+    metadata = pd.concat(metadata_chunks, ignore_index=True)
+    embeddings = np.concatenate(embedding_chunks) if embedding_chunks else np.empty((0, 0), dtype=np.float32)
+    return write_ticker_store(metadata, embeddings, store_dir, dtype=dtype, extra_manifest={'source': csv_path, 'model': model_name})
+
+
+def store_exists(store_dir=DEFAULT_STORE_DIR):
+    """
+    Indique si un store complet est présent dans le répertoire.
+    """
+    return all(os.path.exists(os.path.join(store_dir, name))
+               for name in (EMBEDDINGS_FILE, METADATA_FILE, MANIFEST_FILE))
+
+
+def read_manifest(store_dir=DEFAULT_STORE_DIR):
+    """
+    Lit le manifeste JSON d'un store.
+    """
+    with open(os.path.join(store_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def load_ticker_store(store_dir=DEFAULT_STORE_DIR, mmap=True):
+    """
+    Charge un store binaire. La matrice est mappée en mémoire en lecture seule : les pages sont
+    partagées par le cache du système entre tous les processus (workers Streamlit) qui lisent le même fichier.
+
+    Args:
+        store_dir (str): Répertoire du store.
+        mmap (bool): Si False, la matrice est entièrement chargée en RAM.
+
+    Returns:
+        tuple: (pd.DataFrame des métadonnées Ticker/Name/Type, np.ndarray des embeddings normalisés)
+    """
+    embeddings = np.load(os.path.join(store_dir, EMBEDDINGS_FILE), mmap_mode='r' if mmap else None)
+    metadata = pd.read_parquet(os.path.join(store_dir, METADATA_FILE))
+    if len(metadata) != len(embeddings):
+        raise ValueError(f"Store incohérent dans {store_dir} : {len(metadata)} métadonnées pour {len(embeddings)} embeddings.")
+    return metadata, embeddings
+
+
+def ensure_store(store_dir=DEFAULT_STORE_DIR, csv_path=DEFAULT_CSV_PATH, dtype='float32'):
+    """
+    Crée le store à partir du CSV s'il n'existe pas encore.
+
+    Returns:
+        str: Le chemin du répertoire du store.
+    """
+    if not store_exists(store_dir):
+        convert_csv_to_store(csv_path, store_dir, dtype=dtype)
+    return store_dir
+
+
+def load_tickers_frame(store_dir=DEFAULT_STORE_DIR, csv_path=DEFAULT_CSV_PATH, dtype='float32'):
+    """
+    Remplaçant direct de l'ancien chargement CSV : renvoie un DataFrame avec une colonne 'embeddings'
+    dont chaque cellule est une vue (sans copie) sur une ligne de la matrice mappée en mémoire.
+    Le store est créé à partir du CSV s'il n'existe pas encore.
+
+    Args:
+        store_dir (str): Répertoire du store.
+        csv_path (str): CSV d'origine utilisé si le store doit être créé.
+        dtype (str): dtype de la matrice si le store doit être créé.
+
+    Returns:
+        pd.DataFrame: Colonnes Ticker, Name, Type et embeddings.
+    """
+    ensure_store(store_dir, csv_path, dtype=dtype)
+    metadata, embeddings = load_ticker_store(store_dir)
+    frame = metadata.copy()
+    frame['embeddings'] = list(embeddings)
+    return frame
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convertit tickers_data.csv vers le store binaire mappé en mémoire.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_CSV_PATH)
+    parser.add_argument('store_dir', nargs='?', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32')
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME, help="Modèle qui a produit les embeddings du CSV.")
+    args = parser.parse_args()
+
+    convert_csv_to_store(args.csv_path, args.store_dir, dtype=args.dtype, model_name=args.model)
+    print(f"Store écrit dans {args.store_dir} ({read_manifest(args.store_dir)['rows']} actifs)")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les tests importent les modules de l'application depuis la racine du dépôt, comme app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from utilities.backtesting import StreamingBacktest, backtest
+
+
+def _hits_series(hit_days, n=250):
+    returns = np.full(n, 0.001)
+    returns[hit_days] = -0.05
+    return returns, np.full(n, 0.02)
+
+
+@pytest.mark.parametrize('x, zone', [(0, 'green'), (4, 'green'), (5, 'yellow'), (9, 'yellow'), (10, 'red')])
+def test_basel_traffic_light_on_250_days(x, zone):
+    returns, var = _hits_series(np.arange(x) * 20)
+    table = backtest(returns, var, (0.99,))
+    assert table.loc[0.99, 'exceedances'] == x
+    assert table.loc[0.99, 'zone'] == zone
+
+
+def test_kupiec_and_christoffersen_match_closed_forms():
+    hit_days = [3, 4, 50, 51, 52, 120, 200]
+    returns, var = _hits_series(hit_days, n=500)
+    row = backtest(returns, var, (0.99,)).loc[0.99]
+
+    n, x, p = 500, len(hit_days), 0.01
+    rate = x / n
+    pof = -2 * ((n - x) * np.log(1 - p) + x * np.log(p) - (n - x) * np.log(1 - rate) - x * np.log(rate))
+    assert row['pof_lr'] == pytest.approx(pof, rel=1e-12)
+
+    hits = np.zeros(n, dtype=bool)
+    hits[hit_days] = True
+    prev, curr = hits[:-1], hits[1:]
+    n00, n01 = np.sum(~prev & ~curr), np.sum(~prev & curr)
+    n10, n11 = np.sum(prev & ~curr), np.sum(prev & curr)
+    pi01, pi11, pi = n01 / (n00 + n01), n11 / (n10 + n11), (n01 + n11) / (n - 1)
+    ind = -2 * ((n00 + n10) * np.log(1 - pi) + (n01 + n11) * np.log(pi)
+                - n00 * np.log(1 - pi01) - n01 * np.log(pi01) - n10 * np.log(1 - pi11) - n11 * np.log(pi11))
+    assert row['ind_lr'] == pytest.approx(ind, rel=1e-12)
+    assert row['cc_lr'] == pytest.approx(pof + ind, rel=1e-12)
+    # Exceptions regroupées : l'indépendance est rejetée
+    assert row['ind_pvalue'] < 0.01
+
+
+def test_streaming_matches_batch():
+    rng = np.random.default_rng(0)
+    returns = rng.standard_t(4, (3, 400)) * 0.01
+    returns[1, 100:110] = np.nan
+    var = np.stack([np.full((3, 400), 0.02), np.full((3, 400), 0.03)])
+
+    streaming = StreamingBacktest((0.95, 0.99), n_assets=3)
+    for t in range(400):
+        streaming.update(returns[:, t], var[..., t])
+    np.testing.assert_array_equal(streaming.results().to_numpy(), backtest(returns, var, (0.95, 0.99)).to_numpy())
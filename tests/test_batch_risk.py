@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from batch_risk import asset_risk, main, read_positions, run_batch
+from benchmarks.synthetic import gbm_history
+from data import data_loader
+from data.price_store import LocalFileProvider, PriceStore
+
+
+def _history(closes):
+    return pd.DataFrame({'Date': pd.date_range('2024-01-01', periods=len(closes), freq='B'), 'Close': closes})
+
+
+def test_short_position_loss_comes_from_the_right_tail():
+    # Quelques fortes hausses : pertes pour la vente, gains pour l'achat
+    growth = np.full(250, 1.001)
+    growth[[50, 100, 150, 200, 240]] = 1.2
+    closes = 100.0 * np.cumprod(growth)
+    hist = _history(closes)
+    long_row, _ = asset_risk('X', 10.0, hist, (0.99,), (1,))
+    short_row, short_pnl = asset_risk('X', -10.0, hist, (0.99,), (1,))
+
+    value = 10.0 * closes[-1]
+    assert short_row['var_1d_0.99_amount'] > 0.1 * value
+    assert short_row['es_1d_0.99_amount'] >= short_row['var_1d_0.99_amount']
+    assert long_row['var_1d_0.99_amount'] < 0.01 * value
+    # Le rendement de l'actif ne dépend pas du sens de la position
+    assert short_row['var_1d_0.99'] == long_row['var_1d_0.99']
+    assert short_pnl.max() < 0
+
+
+def _local_store(tmp_path, monkeypatch, tickers):
+    source = tmp_path / 'source'
+    source.mkdir(exist_ok=True)
+    for i, ticker in enumerate(tickers):
+        gbm_history(300, seed=i).to_parquet(source / f'{ticker}.parquet', index=False)
+    monkeypatch.setattr(data_loader, 'PRICE_STORE', PriceStore(str(tmp_path / 'store'), LocalFileProvider(str(source))))
+    return source
+
+
+def _interrupt_after_first_chunk(message):
+    if message.startswith('[1/'):
+        raise KeyboardInterrupt
+
+
+def test_resume_retries_failed_tickers_and_completed_runs_start_over(tmp_path, monkeypatch):
+    source = _local_store(tmp_path, monkeypatch, ['A', 'C'])
+    positions = pd.Series({'B': 5.0, 'A': 10.0, 'C': -3.0})
+    output = str(tmp_path / 'out')
+    # 'B' manque au premier passage, puis l'exécution est interrompue après le premier bloc
+    with pytest.raises(KeyboardInterrupt):
+        run_batch(positions, output, chunk_size=1, max_workers=1, log=_interrupt_after_first_chunk)
+
+    gbm_history(300, seed=7).to_parquet(source / 'B.parquet', index=False)
+    summary = run_batch(positions, output, chunk_size=1, max_workers=1, log=lambda message: None)
+    assert summary['processed_this_run'] == 3
+    assert summary['succeeded'] == 3 and summary['failed'] == 0
+
+    # Exécution terminée : la relancer recalcule tout au lieu de renvoyer les résultats précédents
+    summary = run_batch(positions, output, chunk_size=1, max_workers=1, log=lambda message: None)
+    assert summary['processed_this_run'] == 3
+
+
+def test_fingerprint_mismatch_is_a_cli_error(tmp_path, monkeypatch, capsys):
+    _local_store(tmp_path, monkeypatch, ['A'])
+    output = str(tmp_path / 'out')
+    for quantity in (1, 2):
+        positions = tmp_path / f'positions{quantity}.csv'
+        pd.DataFrame({'ticker': ['A'], 'quantity': [quantity]}).to_csv(positions, index=False)
+    with pytest.raises(KeyboardInterrupt):
+        run_batch(read_positions(str(tmp_path / 'positions1.csv')), output, chunk_size=1, log=_interrupt_after_first_chunk)
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path / 'positions2.csv'), '--output', output, '--source', str(tmp_path / 'source'),
+              '--store', str(tmp_path / 'store')])
+    assert exit_info.value.code == 2
+    assert '--restart' in capsys.readouterr().err
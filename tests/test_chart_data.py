@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+from utilities.chart_data import moving_averages
+
+
+def test_gap_only_blanks_the_windows_that_contain_it():
+    values = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 300))
+    values[[50, 51, 200]] = np.nan
+
+    result = moving_averages(values, (20, 50))
+
+    for window, ma in result.items():
+        expected = pd.Series(values).rolling(window).mean().to_numpy()
+        np.testing.assert_allclose(ma, expected, rtol=1e-10)
+        assert np.isfinite(ma[-1])
@@ -0,0 +1,16 @@
+from utilities.memo import AnalyticsMemo
+
+
+def test_evicted_entries_leave_the_ticker_index():
+    memo = AnalyticsMemo(maxsize=8)
+    for i in range(1000):
+        memo.get('returns', f'T{i % 50}', 1, {'days': i}, lambda: i)
+
+    indexed = sum(len(keys) for keys in memo._keys.values())
+    assert indexed == len(memo.cache) == 8
+
+    # L'invalidation d'un ticker ne touche que ses entrées encore en cache
+    ticker = next(iter(memo._keys))
+    memo.invalidate(ticker, version=2)
+    assert ticker not in memo._keys
+    assert sum(len(keys) for keys in memo._keys.values()) == len(memo.cache)
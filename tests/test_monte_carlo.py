@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+from utilities.monte_carlo import StreamingTail, monte_carlo_var
+from utilities.var_methods import historical_var_es
+
+
+def _returns(n_assets=3, n_days=500, seed=0):
+    rng = np.random.default_rng(seed)
+    mixing = rng.normal(0, 0.01, (n_assets, n_assets))
+    return pd.DataFrame(rng.standard_normal((n_days, n_assets)) @ mixing, columns=[f'T{i}' for i in range(n_assets)])
+
+
+def test_streaming_tail_is_exact():
+    rng = np.random.default_rng(1)
+    chunks = [rng.standard_t(3, 10_000) for _ in range(7)]
+    levels = (0.95, 0.99, 0.999)
+    tail = StreamingTail(int(np.ceil(70_000 * 0.05)))
+    for chunk in chunks:
+        tail.update(chunk)
+    var, es = tail.var_es(levels)
+
+    expected = historical_var_es(np.concatenate(chunks), levels)
+    np.testing.assert_allclose(var, expected['var'][0], rtol=1e-12)
+    np.testing.assert_allclose(es, expected['es'][0], rtol=1e-12)
+
+
+def test_result_does_not_depend_on_the_number_of_processes():
+    returns, values = _returns(), np.array([1_000.0, -500.0, 2_000.0])
+    single = monte_carlo_var(returns, values, n_paths=80_000, chunk_size=10_000, n_workers=1, seed=3)
+    pooled = monte_carlo_var(returns, values, n_paths=80_000, chunk_size=10_000, n_workers=2, seed=3)
+    pd.testing.assert_series_equal(single['var'], pooled['var'])
+    pd.testing.assert_series_equal(single['es'], pooled['es'])
+
+
+def test_gaussian_var_matches_the_closed_form():
+    returns = _returns(n_assets=1, n_days=2_000, seed=2)
+    mu, sigma = returns['T0'].mean(), returns['T0'].std()
+    result = monte_carlo_var(returns, [1_000.0], confidence_levels=(0.99,), n_paths=400_000, n_workers=1)
+    # P&L = v · (e^r - 1) : quantile monotone de r
+    expected = -1_000.0 * np.expm1(mu + sigma * norm.ppf(0.01))
+    assert result['var'][0.99] == pytest.approx(expected, rel=0.02)
+
+
+def test_early_stop_on_relative_standard_error():
+    result = monte_carlo_var(_returns(), [1.0, 1.0, 1.0], n_paths=2_000_000, chunk_size=20_000,
+                             n_workers=1, rel_tol=0.02)
+    assert result['converged']
+    assert result['n_paths'] < 2_000_000
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data.option_chains import parse_occ_symbols
+from utilities.options import OptionBook, black_scholes, greeks, implied_volatility, option_var
+
+S = 100.0
+K = np.array([70.0, 90.0, 100.0, 110.0, 140.0])
+T = np.array([[0.05], [0.5], [2.0]])
+SIGMA = 0.25
+R, Q = 0.03, 0.01
+
+
+def test_put_call_parity():
+    call = black_scholes(S, K, T, SIGMA, True, R, Q)
+    put = black_scholes(S, K, T, SIGMA, False, R, Q)
+    np.testing.assert_allclose(call - put, S * np.exp(-Q * T) - K * np.exp(-R * T), atol=3e-14 * S)
+
+
+def test_expired_contract_is_worth_its_intrinsic_value():
+    np.testing.assert_array_equal(black_scholes(S, K, 0.0, SIGMA, True), np.maximum(S - K, 0.0))
+    np.testing.assert_array_equal(black_scholes(S, K, 0.0, SIGMA, False), np.maximum(K - S, 0.0))
+
+
+@pytest.mark.parametrize('is_call', [True, False], ids=['call', 'put'])
+def test_greeks_match_finite_differences(is_call):
+    g = greeks(S, K, T, SIGMA, is_call, R, Q)
+
+    def price(**bump):
+        args = dict(S=S, K=K, T=T, sigma=SIGMA, r=R, q=Q) | bump
+        return black_scholes(args['S'], K, args['T'], args['sigma'], is_call, args['r'], args['q'])
+
+    h = 1e-3
+    np.testing.assert_allclose(g['price'], price(), rtol=1e-12)
+    np.testing.assert_allclose(g['delta'], (price(S=S + h) - price(S=S - h)) / (2 * h), atol=1e-8)
+    np.testing.assert_allclose(g['gamma'], (price(S=S + h) - 2 * price() + price(S=S - h)) / h ** 2, atol=1e-5)
+    np.testing.assert_allclose(g['vega'], (price(sigma=SIGMA + 1e-5) - price(sigma=SIGMA - 1e-5)) / 2e-5, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(g['rho'], (price(r=R + 1e-5) - price(r=R - 1e-5)) / 2e-5, rtol=1e-6, atol=1e-8)
+    # theta est la dérivée par rapport au temps calendaire, soit -∂V/∂T
+    np.testing.assert_allclose(g['theta'], -(price(T=T + 1e-6) - price(T=T - 1e-6)) / 2e-6, rtol=1e-5, atol=1e-6)
+
+
+def test_implied_volatility_recovers_sigma():
+    sigma = np.array([[0.08], [0.25], [1.5]])
+    is_call = K >= S
+    prices = black_scholes(S, K, 0.5, sigma, is_call, R, Q)
+    iv = implied_volatility(prices, S, K, 0.5, is_call, R, Q)
+    # Contrats très en dehors de la monnaie à faible volatilité : prix nuls, aucune volatilité ne se distingue
+    quoted = prices > 1e-6
+    np.testing.assert_allclose(iv[quoted], np.broadcast_to(sigma, iv.shape)[quoted], rtol=1e-6)
+
+
+def test_implied_volatility_is_nan_outside_arbitrage_bounds():
+    intrinsic = black_scholes(S, 90.0, 0.5, 1e-4, True, R, Q)
+    prices = np.array([intrinsic - 0.5, S + 1.0, np.nan, 5.0])
+    T_ = np.array([0.5, 0.5, 0.5, 0.0])
+    assert np.isnan(implied_volatility(prices, S, 90.0, T_, True, R, Q)).all()
+
+
+def test_parse_occ_symbols():
+    parsed = parse_occ_symbols(['AAPL250117C00150000', 'BRK.B260618P00412500', 'AAPL'])
+    assert parsed['underlying'].iloc[:2].tolist() == ['AAPL', 'BRK.B']
+    assert parsed['expiration'].iloc[1] == pd.Timestamp('2026-06-18')
+    assert parsed['is_call'].iloc[:2].tolist() == [True, False]
+    assert parsed['strike'].iloc[:2].tolist() == [150.0, 412.5]
+    assert parsed.iloc[2].isna().all()
+
+
+def _book():
+    positions = pd.DataFrame({
+        'underlying': ['AAA', 'AAA', 'BBB', 'BBB'],
+        'strike': [100.0, 110.0, 50.0, 45.0],
+        'T': [0.25, 0.5, 0.1, 1.0],
+        'is_call': [True, True, False, True],
+        'quantity': [10, -5, 20, 3],
+        'iv': [0.2, 0.22, 0.35, 0.3],
+    })
+    return OptionBook(positions, {'AAA': 100.0, 'BBB': 50.0}, r=R, q=Q)
+
+
+def test_delta_gamma_matches_full_revaluation_for_small_shocks():
+    book = _book()
+    shocks = np.random.default_rng(0).normal(0, 1e-3, size=(200, 2))
+    full = book.revaluation_pnl(shocks, horizon_days=0)
+    approx = book.delta_gamma_pnl(shocks, horizon_days=0)
+    # Erreur d'ordre 3 en dS : négligeable devant le P&L pour des chocs de 0.1 %
+    np.testing.assert_allclose(approx, full, atol=1e-3 * np.abs(full).max())
+
+
+def test_option_var_table():
+    book = _book()
+    shocks = pd.DataFrame(np.random.default_rng(1).normal(0, 0.01, size=(1000, 2)), columns=['BBB', 'AAA'])
+    result = option_var(book, shocks, (0.95, 0.99))
+    assert result['value'] == pytest.approx(book.value)
+    np.testing.assert_allclose(result['pnl']['full'], book.revaluation_pnl(shocks[['AAA', 'BBB']].to_numpy()))
+    table = result['table']
+    assert list(table.index) == [0.95, 0.99]
+    assert (table['ES'] >= table['VaR']).all().all()
+    np.testing.assert_allclose(table[('VaR', 'full')], table[('VaR', 'delta_gamma')], rtol=0.1)
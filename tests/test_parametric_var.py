@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from benchmarks.synthetic import gbm_history
+from utilities import base_tools
+from utilities.parametric_var import EWMACovariance, portfolio_parametric_var
+from utilities.return_panel import ReturnPanel
+
+
+def _portfolios(n_days):
+    histories = {f'T{i}': gbm_history(300, seed=i).iloc[:n_days] for i in range(4)}
+    panel = ReturnPanel()
+    for ticker, hist in histories.items():
+        panel.add_asset(ticker, hist, quantity=10)
+    return panel, {ticker: {'df': hist, 'quantity': 10} for ticker, hist in histories.items()}
+
+
+@pytest.mark.parametrize('kind', [0, 1], ids=['panel', 'frames'])
+def test_refresh_only_integrates_new_days(tmp_path, monkeypatch, kind):
+    state = str(tmp_path / 'ewma.npz')
+    portfolio_parametric_var(_portfolios(295)[kind], state_path=state)
+
+    lengths = []
+    compute_returns = base_tools.compute_returns
+    monkeypatch.setattr(base_tools, 'compute_returns', lambda df: lengths.append(len(df)) or compute_returns(df))
+    refreshed = portfolio_parametric_var(_portfolios(300)[kind], state_path=state)
+    assert max(lengths, default=0) <= 6
+
+    full = EWMACovariance.from_returns(base_tools.align_returns(_portfolios(300)[kind]))
+    np.testing.assert_allclose(refreshed['covariance'].cov, full.cov, rtol=1e-5)
+    assert refreshed['covariance'].n_obs == full.n_obs
@@ -0,0 +1,43 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from data.price_store import PriceProvider, PriceStore
+
+
+class AdjustingProvider(PriceProvider):
+    """
+    Historique fixe dont les clôtures peuvent être ré-ajustées (dividende) sans changer de longueur.
+    """
+
+    def __init__(self):
+        self.factor = 1.0
+        self.full_downloads = 0
+
+    def history(self, ticker, start=None, period='5y'):
+        dates = pd.date_range('2024-01-01', periods=10, freq='B')
+        closes = np.arange(100.0, 110.0)
+        closes[:-1] *= self.factor
+        df = pd.DataFrame({'Date': dates, 'Close': closes})
+        if start is None:
+            self.full_downloads += 1
+            return df
+        return df[df['Date'] >= pd.Timestamp(start)].reset_index(drop=True)
+
+
+def test_readjusted_history_is_saved_and_versioned(tmp_path):
+    provider = AdjustingProvider()
+    store = PriceStore(str(tmp_path), provider=provider, ttl=timedelta(0))
+    store.get('X')
+    assert store.version('X') == 1
+
+    provider.factor = 0.99
+    refreshed = store.get('X')
+    assert refreshed['Close'].iloc[0] == 99.0
+    assert store.read('X')['Close'].iloc[0] == 99.0
+    assert store.version('X') == 2
+    assert provider.full_downloads == 2
+
+    # Historique à jour : le rafraîchissement suivant reste incrémental
+    store.get('X')
+    assert provider.full_downloads == 2
+    assert store.version('X') == 2
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import gbm_history
+from utilities.return_panel import ReturnPanel
+
+
+def test_log_returns_skip_missing_dates_and_follow_updates():
+    panel = ReturnPanel()
+    a, b = gbm_history(300, seed=0), gbm_history(300, seed=1)
+    panel.add_asset('A', a)
+    panel.add_asset('B', b.drop(index=[10, 11, 150]))
+    panel.add_asset('A', pd.concat([a, gbm_history(5, seed=2, end='2025-01-08')], ignore_index=True))
+
+    for ticker in ('A', 'B'):
+        history = panel.history(ticker)
+        expected = np.log(history['Close'].astype(float)).diff().to_numpy()[1:]
+        returns = panel.frame()[ticker].dropna().to_numpy()
+        np.testing.assert_allclose(returns, expected, rtol=1e-6)
+    assert panel.mask.sum(axis=0).tolist() == [305, 297]
+
+
+def test_reads_keep_the_spare_capacity():
+    panel = ReturnPanel()
+    reallocations = 0
+    for i in range(40):
+        buffer = panel._close
+        panel.add_asset(f'T{i}', gbm_history(100, seed=i))
+        reallocations += panel._close is not buffer
+        panel.close, panel.log_returns
+    assert reallocations < 15
+    assert panel.log_returns.base is panel._log
+
+    panel.compact()
+    assert panel._close.shape == (100, 40)
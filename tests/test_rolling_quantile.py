@@ -0,0 +1,18 @@
+import numpy as np
+from utilities.rolling_quantile import rolling_var_es_series
+from utilities.var_methods import historical_var_es
+
+
+def test_infinite_returns_are_treated_as_missing():
+    # compute_returns produit ±inf quand une clôture vaut 0
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 0.01, 300)
+    values[[20, 150]] = np.inf
+    values[[40, 260]] = -np.inf
+    values[100] = np.nan
+
+    var, es = rolling_var_es_series(values, 50, (0.95, 0.99))
+
+    expected = historical_var_es(np.where(np.isfinite(values), values, np.nan), (0.95, 0.99), window=50)
+    np.testing.assert_allclose(var, expected['var'][0], rtol=1e-12)
+    np.testing.assert_allclose(es, expected['es'][0], rtol=1e-12)
@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+from scipy.special import xlogy
+from scipy.stats import binom, chi2
+from utilities.var_methods import DEFAULT_CONFIDENCE_LEVELS, historical_var_es
+
+# Seuils du feu tricolore de Bâle, en probabilité cumulée binomiale du nombre d'exceptions
+# (sur 250 jours à 99 % : vert jusqu'à 4 exceptions, jaune de 5 à 9, rouge à partir de 10)
+TRAFFIC_LIGHT_YELLOW = 0.95
+TRAFFIC_LIGHT_RED = 0.9999
+
+
+def _time_last(values):
+    """
+    Convertit une série, un DataFrame dates x actifs ou un tableau en np.ndarray avec le temps sur le dernier axe.
+    """
+    if isinstance(values, pd.DataFrame):
+        return values.to_numpy(dtype=float).T
+    return np.asarray(values, dtype=float)
+
+
+def exceedances(returns, var):
+    """
+    Indicateurs d'exception : la perte réalisée dépasse la VaR prévue pour ce jour.
+
+    Paramètres:
+        returns (array-like): Rendements réalisés, de forme ([n_actifs], n_obs).
+        var (array-like): VaR prévues (pertes positives), de forme ([n_niveaux], [n_actifs], n_obs) ;
+                          var[..., t] doit être connue à la veille de returns[..., t].
+
+    Retour:
+        tuple: (hits, valid) booléens à la forme diffusée ; valid est faux si le rendement ou la VaR manque.
+    """
+    returns, var = _time_last(returns), _time_last(var)
+    valid = ~np.isnan(returns) & ~np.isnan(var)
+    hits = (-returns > var) & valid
+    return hits, valid
+
+
+def exceedance_counts(hits, valid):
+    """
+    Statistiques suffisantes des tests : nombre d'observations, d'exceptions, et transitions
+    n_ij (état i la veille, état j le jour même) entre jours valides consécutifs.
+    """
+    pairs = valid[..., 1:] & valid[..., :-1]
+    prev, curr = hits[..., :-1], hits[..., 1:]
+    return {
+        'n': valid.sum(axis=-1),
+        'x': hits.sum(axis=-1),
+        'n00': (pairs & ~prev & ~curr).sum(axis=-1),
+        'n01': (pairs & ~prev & curr).sum(axis=-1),
+        'n10': (pairs & prev & ~curr).sum(axis=-1),
+        'n11': (pairs & prev & curr).sum(axis=-1),
+    }
+
+
+def _bernoulli_loglik(successes, failures, p):
+    return xlogy(successes, p) + xlogy(failures, 1 - p)
+
+
+def coverage_tests(counts, confidence_levels):
+    """
+    Tests de Kupiec (POF), de Christoffersen (indépendance et couverture conditionnelle) et zone de Bâle,
+    calculés à partir des comptages, vectorisés sur tous les actifs et niveaux.
+
+    Paramètres:
+        counts (dict): Résultat de exceedance_counts, tableaux de forme (n_niveaux, ...).
+        confidence_levels (tuple): Niveaux de confiance α, un par ligne des comptages.
+
+    Retour:
+        dict: Tableaux 'rate', 'pof_lr', 'pof_pvalue', 'ind_lr', 'ind_pvalue', 'cc_lr', 'cc_pvalue', 'zone'.
+    """
+    n, x = counts['n'].astype(float), counts['x'].astype(float)
+    n00, n01, n10, n11 = (counts[key].astype(float) for key in ('n00', 'n01', 'n10', 'n11'))
+    p = 1 - np.asarray(confidence_levels, dtype=float).reshape((-1,) + (1,) * (n.ndim - 1))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = x / n
+        pof_lr = -2 * (_bernoulli_loglik(x, n - x, p) - _bernoulli_loglik(x, n - x, rate))
+        pi01 = n01 / (n00 + n01)
+        pi11 = n11 / (n10 + n11)
+        pi = (n01 + n11) / (n00 + n01 + n10 + n11)
+        ind_lr = -2 * (_bernoulli_loglik(n01 + n11, n00 + n10, pi)
+                       - np.nan_to_num(_bernoulli_loglik(n01, n00, pi01))
+                       - np.nan_to_num(_bernoulli_loglik(n11, n10, pi11)))
+    pof_lr = np.maximum(pof_lr, 0)
+    ind_lr = np.maximum(ind_lr, 0)
+    cc_lr = pof_lr + ind_lr
+
+    cdf = binom.cdf(x, n, p)
+    zone = np.select([n == 0, cdf < TRAFFIC_LIGHT_YELLOW, cdf < TRAFFIC_LIGHT_RED], ['', 'green', 'yellow'], 'red')
+    return {
+        'rate': rate,
+        'pof_lr': pof_lr,
+        'pof_pvalue': chi2.sf(pof_lr, 1),
+        'ind_lr': ind_lr,
+        'ind_pvalue': chi2.sf(ind_lr, 1),
+        'cc_lr': cc_lr,
+        'cc_pvalue': chi2.sf(cc_lr, 2),
+        'zone': zone,
+    }
+
+
+def backtest_table(counts, tests, confidence_levels, assets=None):
+    """
+    Met en forme comptages et tests dans un DataFrame indexé par (niveau de confiance, actif).
+    """
+    columns = {'n': counts['n'], 'exceedances': counts['x'], **tests}
+    shape = np.shape(counts['n'])
+    if len(shape) == 1:
+        index = pd.Index(list(confidence_levels), name='confidence')
+    else:
+        assets = assets if assets is not None else list(range(shape[1]))
+        index = pd.MultiIndex.from_product([list(confidence_levels), assets], names=['confidence', 'asset'])
+    return pd.DataFrame({name: np.reshape(values, -1) for name, values in columns.items()}, index=index)
+
+
+def backtest(returns, var, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, assets=None):
+    """
+    Backtest de prévisions de VaR sur un ou plusieurs actifs et niveaux de confiance en un appel.
+
+    Paramètres:
+        returns (array-like): Rendements réalisés (colonne 'log_return' de compute_returns), de forme
+                              ([n_actifs], n_obs) ou DataFrame dates x actifs.
+        var (array-like): VaR prévues, de forme (n_niveaux, [n_actifs], n_obs).
+        confidence_levels (tuple): Niveaux de confiance α, un par ligne de var.
+        assets (list): Noms des actifs ; par défaut les colonnes de returns si c'est un DataFrame.
+
+    Retour:
+        pd.DataFrame: Une ligne par (niveau, actif) : observations, exceptions, taux, statistiques LR,
+                      p-values et zone de Bâle.
+    """
+    if assets is None and isinstance(returns, pd.DataFrame):
+        assets = list(returns.columns)
+    var = _time_last(var)
+    if var.ndim == np.ndim(returns):
+        var = var[None]
+    hits, valid = exceedances(returns, var)
+    counts = exceedance_counts(hits, valid)
+    return backtest_table(counts, coverage_tests(counts, confidence_levels), confidence_levels, assets)
+
+
+def backtest_historical(returns, window=252, confidence_levels=DEFAULT_CONFIDENCE_LEVELS):
+    """
+    Backtest de la VaR historique glissante : la VaR calculée sur les window jours précédents
+    sert de prévision pour le jour suivant.
+
+    Paramètres:
+        returns (pd.DataFrame | pd.Series | np.ndarray): Rendements réalisés (dates x actifs pour un DataFrame).
+        window (int): Taille de la fenêtre d'estimation.
+        confidence_levels (tuple): Niveaux de confiance α.
+
+    Retour:
+        pd.DataFrame: Résultat de backtest sur les n_obs - window derniers jours.
+    """
+    assets = list(returns.columns) if isinstance(returns, pd.DataFrame) else None
+    values = _time_last(returns)
+    forecast = historical_var_es(values[..., :-1], confidence_levels, window=window)['var'][0]
+    return backtest(values[..., window:], forecast, confidence_levels, assets)
+
+
+class StreamingBacktest:
+    """
+    Backtest incrémental : chaque nouveau jour met à jour les comptages (observations, exceptions,
+    transitions) en O(n_niveaux x n_actifs), sans relire l'historique. Les tests se recalculent
+    à tout moment à partir de ces comptages.
+    """
+
+    def __init__(self, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, n_assets=None, assets=None):
+        """
+        Paramètres:
+            confidence_levels (tuple): Niveaux de confiance α.
+            n_assets (int): Nombre d'actifs ; None pour une seule série.
+            assets (list): Noms des actifs (fixe n_assets).
+        """
+        self.confidence_levels = tuple(confidence_levels)
+        self.assets = list(assets) if assets is not None else None
+        n_assets = len(self.assets) if self.assets is not None else n_assets
+        shape = (len(self.confidence_levels),) + ((n_assets,) if n_assets is not None else ())
+        self.counts = {key: np.zeros(shape, dtype=np.int64) for key in ('n', 'x', 'n00', 'n01', 'n10', 'n11')}
+        # État de la veille : exception ou non, et validité de l'observation
+        self._prev_hit = np.zeros(shape, dtype=bool)
+        self._prev_valid = np.zeros(shape, dtype=bool)
+
+    def update(self, returns, var):
+        """
+        Intègre un jour.
+
+        Paramètres:
+            returns (array-like): Rendement réalisé du jour, par actif.
+            var (array-like): VaR prévue pour ce jour, de forme (n_niveaux, [n_actifs]).
+        """
+        returns = np.asarray(returns, dtype=float)
+        var = np.asarray(var, dtype=float).reshape(self._prev_hit.shape)
+        valid = ~np.isnan(returns) & ~np.isnan(var)
+        hit = (-returns > var) & valid
+        pair = valid & self._prev_valid
+        c = self.counts
+        c['n'] += valid
+        c['x'] += hit
+        c['n00'] += pair & ~self._prev_hit & ~hit
+        c['n01'] += pair & ~self._prev_hit & hit
+        c['n10'] += pair & self._prev_hit & ~hit
+        c['n11'] += pair & self._prev_hit & hit
+        self._prev_hit, self._prev_valid = hit, valid
+        return hit
+
+    def results(self):
+        """
+        Retour:
+            pd.DataFrame: Même format que backtest.
+        """
+        return backtest_table(self.counts, coverage_tests(self.counts, self.confidence_levels),
+                              self.confidence_levels, self.assets)
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
+from utilities.metrics import timed
+from utilities.return_panel import ReturnPanel
 
+@timed('compute_returns')
 def compute_returns(df):
     """
     Calcule les retours quotidiens simples et logarithmiques à partir de la colonne 'Close'
@@ -25,3 +28,62 @@ def compute_returns(df):
     df['log_return'] = np.log(df['Close'] / df['Close'].shift(1))
     
     return df.iloc[1:]
+
+
+def _calendar_index(dates):
+    # Dates calendaires sans fuseau horaire : les actifs de places différentes deviennent comparables
+    dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.dt.normalize().to_numpy()
+
+
+def align_returns(assets, column='log_return', since=None):
+    """
+    Aligne les rendements de plusieurs actifs sur leurs dates communes.
+
+    Paramètres:
+        assets (ReturnPanel | dict): Le panel de st.session_state.assets, ou un dictionnaire
+                       ticker -> {"df": DataFrame historique, "quantity": ...}.
+        column (str): 'log_return' ou 'simple_return'.
+        since (pd.Timestamp): Ne renvoie que les dates postérieures (rafraîchissement incrémental) ;
+                       seule la fin de chaque historique est alors lue.
+
+    Retour:
+        pd.DataFrame: Rendements (dates x tickers), limités aux dates où tous les actifs cotent.
+    """
+    if isinstance(assets, ReturnPanel):
+        frame = assets.frame(column)
+        if since is not None:
+            frame = frame.iloc[np.searchsorted(assets.dates, np.datetime64(pd.Timestamp(since), 'ns'), side='right'):]
+        return frame.dropna()
+    series = {}
+    for ticker, asset in assets.items():
+        hist = asset["df"]
+        if since is not None:
+            # Dernière clôture au plus tard à since, nécessaire au rendement du premier jour suivant
+            hist = hist.sort_values('Date')
+            first = max(np.searchsorted(_calendar_index(hist['Date']), np.datetime64(pd.Timestamp(since), 'ns'),
+                                        side='right') - 1, 0)
+            hist = hist.iloc[first:]
+        returns = compute_returns(hist)
+        s = pd.Series(returns[column].to_numpy(), index=_calendar_index(returns['Date']))
+        s = s[~s.index.duplicated(keep='last')]
+        series[ticker] = s[s.index > pd.Timestamp(since)] if since is not None else s
+    return pd.concat(series, axis=1).dropna().sort_index()
+
+
+def position_values(assets):
+    """
+    Valeur de marché de chaque position (quantité x dernier cours de clôture).
+
+    Paramètres:
+        assets (ReturnPanel | dict): Le panel de st.session_state.assets, ou un dictionnaire ticker -> {"df", "quantity"}.
+
+    Retour:
+        pd.Series: Valeur de chaque position, indexée par ticker.
+    """
+    if isinstance(assets, ReturnPanel):
+        return pd.Series(assets.quantities * assets.last_close().astype(np.float64), index=list(assets.tickers))
+    return pd.Series({ticker: asset["quantity"] * float(asset["df"]['Close'].iloc[-1])
+                      for ticker, asset in assets.items()})
@@ -0,0 +1,129 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache LRU borné et thread-safe, partagé entre les sessions Streamlit d'un même processus.
+    Les compteurs de hits / misses permettent de suivre l'efficacité du cache.
+    Avec un ttl, une entrée plus ancienne que ttl secondes est considérée absente.
+    Avec max_bytes, le cache est aussi borné en mémoire : sizeof(valeur) donne la taille de chaque entrée.
+    on_evict(clé) est appelé, hors verrou, pour chaque entrée évincée ou expirée (pas pour invalidate / clear).
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, max_bytes=None, sizeof=None, on_evict=None):
+        """
+        Paramètres:
+            maxsize (int): Nombre maximal d'entrées conservées.
+            ttl (float): Durée de vie des entrées en secondes, None pour aucune expiration.
+            max_bytes (int): Budget mémoire total en octets, None pour aucune limite.
+            sizeof (callable): sizeof(valeur) -> taille en octets ; requis avec max_bytes.
+            on_evict (callable): on_evict(clé), appelé quand le cache retire de lui-même une entrée.
+        """
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("sizeof est requis avec max_bytes.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.bytes = 0
+        self._data = OrderedDict()  # clé -> (valeur, date d'expiration, taille)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            expired = False
+            if key in self._data:
+                value, expires_at, _ = self._data[key]
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+                expired = True
+            self.misses += 1
+        if expired and self.on_evict is not None:
+            self.on_evict(key)
+        return default
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        evicted = []
+        with self._lock:
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            # L'entrée la plus récente est toujours conservée, même si elle dépasse seule le budget
+            while len(self._data) > self.maxsize or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes and len(self._data) > 1):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+                evicted.append(oldest)
+        if self.on_evict is not None:
+            for old in evicted:
+                self.on_evict(old)
+
+    def get_or_compute(self, key, compute):
+        """
+        Renvoie la valeur en cache, ou la calcule avec compute() et la met en cache.
+        Le calcul se fait hors verrou : deux appels concurrents peuvent calculer la même clé.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            if key not in self._data:
+                return False
+            expires_at = self._data[key][1]
+            return expires_at is None or time.monotonic() < expires_at
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """
+        Retour:
+            dict: Taille (entrées et octets), hits, misses, évictions, expirations et taux de hit du cache.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Nombre de points envoyés par courbe : de l'ordre de la largeur en pixels d'un graphique
+DEFAULT_MAX_POINTS = 1000
+
+
+def histogram(values, nbins):
+    """
+    Histogramme calculé côté serveur : la taille du graphique dépend du nombre de bins, pas du nombre de points.
+
+    Paramètres:
+        values (array-like): Observations (les NaN et infinis sont ignorés).
+        nbins (int): Nombre de bins.
+
+    Retour:
+        tuple: (counts, edges) comme np.histogram.
+    """
+    values = np.asarray(values, dtype=float)
+    return np.histogram(values[np.isfinite(values)], bins=nbins)
+
+
+def moving_averages(values, windows):
+    """
+    Moyennes mobiles simples pour plusieurs fenêtres, en une seule somme cumulée.
+
+    Paramètres:
+        values (array-like): Série de prix.
+        windows (iterable): Tailles de fenêtre (ex: (20, 50, 100)).
+
+    Retour:
+        dict: fenêtre -> np.ndarray de même longueur que values, NaN tant que la fenêtre n'est pas remplie
+              ou si elle contient une valeur manquante (comme rolling(window).mean()).
+    """
+    values = np.asarray(values, dtype=float)
+    # Les valeurs manquantes comptent pour 0 dans la somme cumulée, qui reste finie après un trou
+    valid = np.isfinite(values)
+    cumsum = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    result = {}
+    for window in windows:
+        ma = np.full(len(values), np.nan)
+        if window <= len(values):
+            complete = counts[window:] - counts[:-window] == window
+            ma[window - 1:] = np.where(complete, (cumsum[window:] - cumsum[:-window]) / window, np.nan)
+        result[window] = ma
+    return result
+
+
+def lttb_indices(x, y, n_out=DEFAULT_MAX_POINTS):
+    """
+    Sous-échantillonnage Largest-Triangle-Three-Buckets : garde n_out points qui préservent la forme
+    visuelle de la courbe (pics et creux compris). Le premier et le dernier point sont toujours conservés.
+
+    Paramètres:
+        x (array-like): Abscisses croissantes (les dates sont converties en nombres).
+        y (array-like): Ordonnées.
+        n_out (int): Nombre de points à conserver.
+
+    Retour:
+        np.ndarray: Indices des points conservés, croissants.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    x = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+
+    # n_out - 2 seaux entre le premier et le dernier point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Sommet suivant : moyenne du seau d'après (ou dernier point)
+        next_start, next_stop = stop, (edges[i + 2] if i + 2 < len(edges) else n)
+        next_x, next_y = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - next_x) * (y[start:stop] - ay) - (ax - x[start:stop]) * (next_y - ay))
+        previous = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        selected[i + 1] = previous
+    return selected
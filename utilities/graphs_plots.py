@@ -1,7 +1,10 @@
 import plotly.graph_objects as go
 import numpy as np
 from scipy.stats import norm
+from utilities.metrics import timed
+from utilities.chart_data import DEFAULT_MAX_POINTS, histogram, lttb_indices, moving_averages
 
+@timed('plot_return_distribution')
 def plot_return_distribution(df, nbins=300, duration=None, return_type='simple'):
     """
     Affiche la distribution des rendements historiques sous forme d'histogramme 
@@ -35,10 +38,12 @@ def plot_return_distribution(df, nbins=300, duration=None, return_type='simple')
     # Création de la figure Plotly
     fig = go.Figure()
 
-    # Ajout de l'histogramme
-    fig.add_trace(go.Histogram(
-        x=data,
-        nbinsx=nbins,
+    # Histogramme calculé côté serveur : seuls nbins barres sont envoyées au navigateur
+    counts, edges = histogram(data, nbins)
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
         marker=dict(
             color="royalblue",
             line=dict(width=1.2, color="black")
@@ -50,7 +55,7 @@ def plot_return_distribution(df, nbins=300, duration=None, return_type='simple')
     # Calcul et ajout de la courbe gaussienne
     x_values = np.linspace(data.min(), data.max(), 1000)
     pdf = norm.pdf(x_values, loc=mean, scale=std)
-    bin_width = (data.max() - data.min()) / nbins
+    bin_width = edges[1] - edges[0]
     scaled_pdf = pdf * len(data) * bin_width
 
     fig.add_trace(go.Scatter(
@@ -130,4 +135,48 @@ def plot_return_distribution(df, nbins=300, duration=None, return_type='simple')
         )
     )
 
-    return fig
\ No newline at end of file
+    return fig
+
+
+@timed('plot_price_evolution')
+def plot_price_evolution(df, days, moving_average_windows=(20,), max_points=DEFAULT_MAX_POINTS):
+    """
+    Affiche l'évolution du cours sur les derniers jours avec les moyennes mobiles demandées.
+
+    Les moyennes mobiles sont calculées en une seule somme cumulée, sur assez d'historique pour être
+    définies dès le premier jour affiché ; la série est ensuite réduite à max_points points par LTTB
+    (les mêmes dates pour le cours et les moyennes mobiles).
+
+    Paramètres:
+        df (DataFrame): Historique contenant les colonnes 'Date' et 'Close'.
+        days (int): Nombre de derniers jours à afficher.
+        moving_average_windows (tuple): Fenêtres des moyennes mobiles (ex: (20, 50, 100)).
+        max_points (int): Nombre maximal de points par courbe.
+
+    Retour:
+        fig (Figure): Objet Figure de Plotly contenant le graphique.
+    """
+    windows = sorted(set(moving_average_windows))
+    lookback = max(windows, default=1) - 1
+    data = df.tail(days + lookback)
+    dates = data['Date'] if 'Date' in data.columns else data.index.to_series()
+    close = data['Close'].to_numpy(dtype=float)
+
+    averages = moving_averages(close, windows)
+    shown = slice(max(len(close) - days, 0), None)
+    close = close[shown]
+    # Abscisse en nombre de séances : les week-ends ne comptent pas dans le choix des points
+    keep = lttb_indices(np.arange(len(close)), close, max_points)
+    dates = dates.iloc[shown].iloc[keep]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=close[keep], mode='lines', name='Close'))
+    for window in windows:
+        fig.add_trace(go.Scatter(x=dates, y=averages[window][shown][keep], mode='lines', name=f'MA{window}'))
+    fig.update_layout(
+        title=f"Evolution du cours sur les {days} derniers jours",
+        xaxis_title="Date",
+        yaxis_title="Close",
+        template="plotly_white",
+    )
+    return fig
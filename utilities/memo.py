@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import defaultdict
+from utilities.cache import LRUCache
+
+
+class RerunTimings:
+    """
+    Journal d'une réexécution Streamlit (ou d'un fragment) : pour chaque calcul, son nom,
+    s'il a été servi depuis le cache et sa durée.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.records = []
+
+    def record(self, name, cached, seconds):
+        self.records.append({"calcul": name, "cache": cached, "ms": seconds * 1000})
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def caption(self):
+        cached = sum(r["cache"] for r in self.records)
+        computed = [r["calcul"] for r in self.records if not r["cache"]]
+        detail = f" ({', '.join(computed)})" if computed else ""
+        return (f"{self.name} : {cached} résultat(s) en cache, {len(computed)} recalculé(s){detail}, "
+                f"{self.elapsed_ms():.0f} ms")
+
+
+class AnalyticsMemo:
+    """
+    Mémoïsation des résultats dérivés (rendements, distributions, moyennes mobiles, VaR, figures),
+    partagée par les sessions du processus.
+
+    Une clé est (calcul, ticker, version des données, paramètres) : un résultat n'est jamais servi pour
+    une autre version de l'historique. Quand une nouvelle version d'un ticker apparaît (nouvelles barres),
+    toutes ses entrées sont invalidées explicitement plutôt que d'attendre leur éviction LRU.
+    """
+
+    def __init__(self, maxsize=256):
+        """
+        Paramètres:
+            maxsize (int): Nombre maximal de résultats conservés.
+        """
+        self.cache = LRUCache(maxsize=maxsize, on_evict=self._forget)
+        self._keys = defaultdict(set)  # ticker -> clés en cache
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _forget(self, key):
+        # Entrée évincée par le LRU : sa clé ne doit pas rester indexée sous son ticker
+        ticker = key[1]
+        with self._lock:
+            keys = self._keys.get(ticker)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys[ticker]
+
+    def invalidate(self, ticker, version=None):
+        """
+        Supprime les résultats d'un ticker (par exemple à l'arrivée de nouvelles barres).
+        """
+        with self._lock:
+            keys = self._keys.pop(ticker, set())
+            if version is not None:
+                self._versions[ticker] = version
+        for key in keys:
+            self.cache.invalidate(key)
+
+    def get(self, name, ticker, version, params, compute, timings=None):
+        """
+        Renvoie le résultat en cache ou le calcule.
+
+        Paramètres:
+            name (str): Nom du calcul (ex: 'returns').
+            ticker (str): Ticker concerné.
+            version (int): Version des données du ticker (PriceStore.version).
+            params (dict): Paramètres du calcul (valeurs hachables).
+            compute (callable): Fonction sans argument qui produit le résultat.
+            timings (RerunTimings): Journal de la réexécution courante, facultatif.
+        """
+        if version > self._versions.get(ticker, version - 1):
+            self.invalidate(ticker, version)
+        key = (name, ticker, version, tuple(sorted(params.items())))
+        start = time.perf_counter()
+        sentinel = object()
+        value = self.cache.get(key, sentinel)
+        cached = value is not sentinel
+        if not cached:
+            value = compute()
+            # Clé indexée avant l'insertion : une éviction concurrente la retire aussitôt de l'index
+            with self._lock:
+                self._keys[ticker].add(key)
+            self.cache.put(key, value)
+        if timings is not None:
+            timings.record(name, cached, time.perf_counter() - start)
+        return value
+
+    def stats(self):
+        return self.cache.stats()
+
+
+# Cache des résultats dérivés partagé par toutes les sessions
+ANALYTICS = AnalyticsMemo()
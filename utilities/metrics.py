@@ -0,0 +1,221 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Bornes supérieures (en secondes) des histogrammes de latence, comme les buckets par défaut de Prometheus
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class _Operation:
+    __slots__ = ('count', 'errors', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+
+class MetricsRegistry:
+    """
+    Instrumentation légère des chemins critiques, partagée par les sessions du processus.
+
+    span(nom) chronomètre un bloc ; chaque opération accumule un compteur d'appels, d'erreurs et un
+    histogramme de latence à buckets fixes (coût O(nombre de buckets) par appel). Les spans d'une
+    réexécution Streamlit sont aussi enregistrés, avec leur profondeur d'imbrication, dans un journal
+    propre au thread courant (begin_rerun / end_rerun) pour afficher le détail de la dernière exécution.
+    Les statistiques des caches sont lues à l'export via des collecteurs enregistrés.
+    """
+
+    def __init__(self):
+        self._operations = {}
+        self._counters = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            op = self._operations.get(name)
+            if op is None:
+                op = self._operations[name] = _Operation()
+            op.count += 1
+            op.errors += error
+            op.total += seconds
+            op.max = max(op.max, seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    op.buckets[i] += 1
+                    break
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, name):
+        """
+        Chronomètre le bloc et l'enregistre sous name, y compris s'il lève une exception.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        # Entrée ajoutée au début du span : le journal est dans l'ordre de démarrage
+        entry = {"operation": name, "depth": depth, "ms": None, "error": False}
+        rerun = getattr(self._local, 'rerun', None)
+        if rerun is not None:
+            rerun.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            entry["error"] = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.depth = depth
+            entry["ms"] = seconds * 1000
+            self.observe(name, seconds, entry["error"])
+
+    def timed(self, name):
+        """
+        Décorateur : chaque appel de la fonction est un span.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def begin_rerun(self):
+        self._local.rerun = []
+        self._local.rerun_start = time.perf_counter()
+
+    def end_rerun(self):
+        """
+        Retour:
+            dict: 'total_ms' de la réexécution et 'spans' (dans l'ordre de démarrage, avec leur profondeur).
+        """
+        spans = getattr(self._local, 'rerun', None) or []
+        start = getattr(self._local, 'rerun_start', time.perf_counter())
+        self._local.rerun = None
+        return {"total_ms": (time.perf_counter() - start) * 1000, "spans": spans}
+
+    def register_collector(self, name, collect):
+        """
+        Enregistre une source de statistiques (ex: cache) : collect() -> dict de valeurs numériques.
+        """
+        self._collectors[name] = collect
+
+    def collect(self):
+        """
+        Retour:
+            dict: Statistiques de chaque collecteur enregistré.
+        """
+        stats = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                stats[name] = collect()
+            except Exception as e:
+                stats[name] = {"error": str(e)}
+        return stats
+
+    @staticmethod
+    def _quantile(op, q):
+        # Estimation par la borne supérieure du bucket contenant le quantile
+        target = q * op.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, op.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, op.max)
+        return op.max
+
+    def snapshot(self):
+        """
+        Retour:
+            dict: 'operations' (appels, erreurs, latences moyenne / p50 / p95 / max en ms, buckets),
+                  'counters' et 'collectors'.
+        """
+        with self._lock:
+            operations = {
+                name: {
+                    "count": op.count,
+                    "errors": op.errors,
+                    "mean_ms": op.total / op.count * 1000 if op.count else 0.0,
+                    "p50_ms": self._quantile(op, 0.5) * 1000,
+                    "p95_ms": self._quantile(op, 0.95) * 1000,
+                    "max_ms": op.max * 1000,
+                    "total_s": op.total,
+                    "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS], op.buckets)),
+                }
+                for name, op in self._operations.items()
+            }
+            counters = dict(self._counters)
+        return {"operations": operations, "counters": counters, "collectors": self.collect()}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, default=str)
+
+    def to_prometheus(self, prefix='var'):
+        """
+        Export au format texte de Prometheus : histogrammes cumulés par opération, compteurs,
+        et une jauge par statistique numérique de chaque collecteur.
+        """
+        lines = [f"# TYPE {prefix}_operation_duration_seconds histogram"]
+        with self._lock:
+            operations = {name: (op.count, op.errors, op.total, list(op.buckets)) for name, op in self._operations.items()}
+            counters = dict(self._counters)
+        for name, (count, errors, total, buckets) in sorted(operations.items()):
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, buckets):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_operation_duration_seconds_bucket{{operation="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_operation_duration_seconds_sum{{operation="{name}"}} {total}')
+            lines.append(f'{prefix}_operation_duration_seconds_count{{operation="{name}"}} {count}')
+        lines.append(f"# TYPE {prefix}_operation_errors_total counter")
+        for name, (_, errors, _, _) in sorted(operations.items()):
+            lines.append(f'{prefix}_operation_errors_total{{operation="{name}"}} {errors}')
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in sorted(counters.items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        lines.append(f"# TYPE {prefix}_collector_value gauge")
+        for source, stats in sorted(self.collect().items()):
+            for key, value in sorted(_flatten(stats).items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'{prefix}_collector_value{{source="{source}",stat="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Écrit l'export (Prometheus si path se termine par .prom, JSON sinon), de façon atomique
+        pour le collecteur textfile de node_exporter.
+        """
+        content = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+
+def _flatten(stats, prefix=''):
+    flat = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}_"))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+# Registre partagé par tout le processus
+METRICS = MetricsRegistry()
+span = METRICS.span
+timed = METRICS.timed
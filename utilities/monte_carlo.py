@@ -0,0 +1,178 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from utilities.base_tools import align_returns, position_values
+from utilities.var_methods import DEFAULT_CONFIDENCE_LEVELS, tail_sizes
+
+
+class StreamingTail:
+    """
+    Estimateur en flux de la VaR et de l'ES : ne conserve que les `capacity` pires P&L vus jusqu'ici.
+
+    Tant que capacity >= ceil(n_max · (1 - α_min)), les quantiles et ES obtenus sont exactement ceux
+    de l'échantillon complet, sans jamais garder tous les chemins en mémoire.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.tail = np.empty(0)
+        self.n = 0
+
+    def update(self, values):
+        self.n += len(values)
+        merged = np.concatenate([self.tail, values])
+        if len(merged) > self.capacity:
+            merged = np.partition(merged, self.capacity - 1)[:self.capacity]
+        self.tail = merged
+
+    def var_es(self, confidence_levels):
+        """
+        Retour:
+            tuple: (VaR, ES) en pertes positives, un tableau par niveau de confiance.
+        """
+        k = tail_sizes(self.n, confidence_levels)
+        if k.max() > len(self.tail):
+            raise ValueError("Capacité insuffisante pour ce nombre de chemins et ce niveau de confiance.")
+        k_max = int(k.max())
+        ordered = np.sort(np.partition(self.tail, k_max - 1)[:k_max] if k_max < len(self.tail) else self.tail)
+        cumsum = np.cumsum(ordered)
+        return -ordered[k - 1], -cumsum[k - 1] / k
+
+
+def covariance_cholesky(returns):
+    """
+    Moyenne et facteur de Cholesky de la covariance des rendements (dates x actifs).
+    Un léger terme diagonal est ajouté si la matrice n'est pas définie positive (actifs colinéaires).
+    """
+    values = np.asarray(returns, dtype=float)
+    mean = values.mean(axis=0)
+    cov = np.atleast_2d(np.cov(values, rowvar=False))
+    jitter = 0.0
+    for _ in range(10):
+        try:
+            return mean, np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, 1e-12 * np.trace(cov) / len(cov))
+    raise np.linalg.LinAlgError("Covariance non définie positive.")
+
+
+def simulate_pnl_chunk(mean, chol, values, n_paths, seed, dof=None, horizon=1):
+    """
+    Simule n_paths P&L de portefeuille corrélés (fonction de niveau module pour être exécutée dans un processus).
+
+    Les rendements logarithmiques sont mean·h + √h · L·z, avec z gaussien ou de Student (dof degrés
+    de liberté, normalisé à variance unitaire, donc avec la même covariance). Le P&L est Σ v_i · (e^{r_i} - 1).
+
+    Paramètres:
+        mean (np.ndarray): Rendement moyen quotidien par actif.
+        chol (np.ndarray): Facteur de Cholesky de la covariance quotidienne.
+        values (np.ndarray): Valeur de chaque position.
+        n_paths (int): Nombre de chemins.
+        seed (np.random.SeedSequence): Graine propre au bloc.
+        dof (float): Degrés de liberté des innovations de Student ; None pour des innovations gaussiennes.
+        horizon (int): Horizon en jours.
+
+    Retour:
+        np.ndarray: P&L simulés.
+    """
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal((n_paths, len(mean)))
+    if dof is not None:
+        # Student multivarié : z / √(χ²_ν / ν), remis à l'échelle pour une variance unitaire
+        scale = np.sqrt((dof - 2) / rng.chisquare(dof, n_paths))
+        z *= scale[:, None]
+    returns = mean * horizon + np.sqrt(horizon) * (z @ chol.T)
+    return np.expm1(returns) @ values
+
+
+def monte_carlo_var(returns, values, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, n_paths=1_000_000,
+                    chunk_size=50_000, dof=None, horizon=1, seed=0, n_workers=None,
+                    min_chunks=8, rel_tol=None):
+    """
+    VaR et ES Monte Carlo d'un portefeuille, simulés par blocs de taille fixe répartis sur un pool de processus.
+
+    Chaque bloc a sa propre graine (SeedSequence.spawn) : le résultat ne dépend pas du nombre de processus.
+    Les P&L sont fusionnés dans un StreamingTail ; la mémoire reste bornée par la taille de la queue et d'un bloc.
+    L'erreur standard est estimée par la méthode des lots (dispersion des VaR de chaque bloc).
+
+    Paramètres:
+        returns (pd.DataFrame): Rendements logarithmiques alignés (dates x actifs).
+        values (array-like): Valeur de chaque position, dans l'ordre des colonnes de returns.
+        confidence_levels (tuple): Niveaux de confiance α.
+        n_paths (int): Nombre maximal de chemins.
+        chunk_size (int): Chemins par bloc (mémoire d'un bloc ≈ chunk_size x n_actifs x 8 octets).
+        dof (float): Degrés de liberté des innovations de Student (> 2) ; None pour gaussien.
+        horizon (int): Horizon en jours.
+        seed (int): Graine globale.
+        n_workers (int): Nombre de processus ; 1 pour tout calculer dans le processus courant.
+        min_chunks (int): Nombre minimal de blocs avant un arrêt anticipé.
+        rel_tol (float): Arrêt anticipé lorsque erreur standard / VaR < rel_tol pour tous les niveaux.
+
+    Retour:
+        dict: 'var' et 'es' (Series indexées par niveau), 'n_paths' simulés, 'converged',
+              et 'history' (DataFrame n_paths, niveau, VaR, erreur standard).
+    """
+    if dof is not None and dof <= 2:
+        raise ValueError("Le nombre de degrés de liberté doit être > 2.")
+    mean, chol = covariance_cholesky(returns)
+    values = np.asarray(values, dtype=float)
+    n_chunks = -(-n_paths // chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    tail = StreamingTail(int(tail_sizes(n_chunks * chunk_size, confidence_levels).max()))
+    n_workers = n_workers or os.cpu_count() or 1
+
+    chunk_vars, history = [], []
+    converged = False
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        for wave in range(0, n_chunks, n_workers):
+            args = [(mean, chol, values, chunk_size, seeds[i], dof, horizon) for i in range(wave, min(wave + n_workers, n_chunks))]
+            if executor is None:
+                results = [simulate_pnl_chunk(*a) for a in args]
+            else:
+                results = [f.result() for f in [executor.submit(simulate_pnl_chunk, *a) for a in args]]
+
+            # Fusion dans l'ordre des blocs : le résultat est reproductible
+            for pnl in results:
+                tail.update(pnl)
+                chunk_vars.append(-np.quantile(pnl, 1 - np.asarray(confidence_levels)))
+            var, _ = tail.var_es(confidence_levels)
+            per_chunk = np.asarray(chunk_vars)
+            se = per_chunk.std(axis=0, ddof=1) / np.sqrt(len(per_chunk)) if len(per_chunk) > 1 else np.full(len(var), np.nan)
+            history.extend({'n_paths': tail.n, 'confidence': a, 'VaR': v, 'std_error': s}
+                           for a, v, s in zip(confidence_levels, var, se))
+
+            if rel_tol is not None and len(per_chunk) >= min_chunks and np.all(se < rel_tol * np.abs(var)):
+                converged = True
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    var, es = tail.var_es(confidence_levels)
+    return {
+        'var': pd.Series(var, index=list(confidence_levels)),
+        'es': pd.Series(es, index=list(confidence_levels)),
+        'n_paths': tail.n,
+        'converged': converged,
+        'history': pd.DataFrame(history),
+    }
+
+
+def portfolio_monte_carlo_var(assets, **kwargs):
+    """
+    VaR Monte Carlo du portefeuille stocké dans st.session_state.assets.
+
+    Paramètres:
+        assets (ReturnPanel | dict): Le panel de st.session_state.assets.
+        **kwargs: Paramètres transmis à monte_carlo_var.
+
+    Retour:
+        dict: Résultat de monte_carlo_var, avec en plus 'portfolio_value'.
+    """
+    returns = align_returns(assets, column='log_return')
+    values = position_values(assets)[returns.columns]
+    result = monte_carlo_var(returns, values.to_numpy(), **kwargs)
+    result['portfolio_value'] = float(values.sum())
+    return result
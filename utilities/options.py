@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from utilities.var_methods import DEFAULT_CONFIDENCE_LEVELS, aggregate_horizon, historical_var_es
+
+# Nombre de sous-jacents par contrat (options sur actions cotées aux États-Unis)
+CONTRACT_MULTIPLIER = 100
+DAYS_PER_YEAR = 365.0
+
+# Nombre maximal de valeurs (scénarios x contrats) réévaluées à la fois
+_REVALUATION_CHUNK_ELEMENTS = 1 << 22
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def year_fractions(expiration, as_of=None):
+    """
+    Durée jusqu'à l'échéance en années (jours calendaires / 365), nulle pour un contrat échu.
+    L'échéance est prise à la clôture (16h) du jour d'expiration.
+    """
+    as_of = pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+    expiration = pd.to_datetime(pd.Series(expiration)).dt.tz_localize(None) + pd.Timedelta(hours=16)
+    days = (expiration - as_of.tz_localize(None)) / pd.Timedelta(days=1)
+    return np.maximum(days.to_numpy(dtype=float), 0.0) / DAYS_PER_YEAR
+
+
+def _d1_d2(S, K, T, sigma, r, q):
+    vol = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q) * T) / vol + 0.5 * vol
+    return d1, d1 - vol
+
+
+def black_scholes(S, K, T, sigma, is_call, r=0.0, q=0.0):
+    """
+    Prix Black-Scholes (Merton, dividende continu q) d'options européennes. Tous les arguments sont
+    diffusés (broadcasting) : un appel valorise toute une chaîne, ou une grille scénarios x contrats.
+    À échéance (T = 0) ou sans volatilité, le prix est la valeur intrinsèque actualisée du forward.
+
+    Paramètres:
+        S (array-like): Cours du sous-jacent.
+        K (array-like): Prix d'exercice.
+        T (array-like): Durée jusqu'à l'échéance en années.
+        sigma (array-like): Volatilité annualisée.
+        is_call (array-like): True pour un call, False pour un put.
+        r (float): Taux sans risque continu.
+        q (float): Taux de dividende continu.
+
+    Retour:
+        np.ndarray: Prix.
+    """
+    S, K, T, sigma, is_call = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, T, sigma)),
+                                                  np.asarray(is_call, dtype=bool))
+    sign = np.where(is_call, 1.0, -1.0)
+    forward = S * np.exp(-q * T)
+    strike = K * np.exp(-r * T)
+    live = (T > 0) & (sigma > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d2 = _d1_d2(S, K, T, sigma, r, q)
+        price = sign * (forward * ndtr(sign * d1) - strike * ndtr(sign * d2))
+    return np.where(live, price, np.maximum(sign * (forward - strike), 0.0))
+
+
+def greeks(S, K, T, sigma, is_call, r=0.0, q=0.0):
+    """
+    Prix et sensibilités Black-Scholes, calculés en une passe sur des tableaux.
+
+    Retour:
+        dict: 'price', 'delta', 'gamma', 'vega' (pour +1.00 de volatilité), 'theta' (par année ;
+              diviser par 365 pour un jour calendaire) et 'rho' (pour +1.00 de taux).
+    """
+    S, K, T, sigma, is_call = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, T, sigma)),
+                                                  np.asarray(is_call, dtype=bool))
+    sign = np.where(is_call, 1.0, -1.0)
+    live = (T > 0) & (sigma > 0)
+    T_ = np.where(live, T, 1.0)
+    sigma_ = np.where(live, sigma, 1.0)
+    d1, d2 = _d1_d2(S, K, T_, sigma_, r, q)
+    dividend = np.exp(-q * T)
+    discount = np.exp(-r * T)
+    pdf = np.exp(-0.5 * d1 * d1) / _SQRT_2PI
+    sqrt_t = np.sqrt(T_)
+
+    delta = sign * dividend * ndtr(sign * d1)
+    gamma = dividend * pdf / (S * sigma_ * sqrt_t)
+    vega = S * dividend * pdf * sqrt_t
+    theta = (-S * dividend * pdf * sigma_ / (2 * sqrt_t)
+             + sign * (q * S * dividend * ndtr(sign * d1) - r * K * discount * ndtr(sign * d2)))
+    rho = sign * K * T * discount * ndtr(sign * d2)
+
+    # Contrat échu ou sans volatilité : seule la valeur intrinsèque compte
+    intrinsic = sign * (S * dividend - K * discount)
+    itm = intrinsic > 0
+    price = sign * (S * dividend * ndtr(sign * d1) - K * discount * ndtr(sign * d2))
+    return {
+        'price': np.where(live, price, np.maximum(intrinsic, 0.0)),
+        'delta': np.where(live, delta, np.where(itm, sign * dividend, 0.0)),
+        'gamma': np.where(live, gamma, 0.0),
+        'vega': np.where(live, vega, 0.0),
+        'theta': np.where(live, theta, 0.0),
+        'rho': np.where(live, rho, 0.0),
+    }
+
+
+def implied_volatility(price, S, K, T, is_call, r=0.0, q=0.0, tol=1e-8, max_iter=100, lower=1e-4, upper=5.0):
+    """
+    Volatilités implicites de toute une chaîne en une fois : itérations de Newton vectorisées, protégées
+    par un encadrement [bas, haut] propre à chaque contrat. Un pas de Newton qui sort de l'encadrement
+    (vega quasi nul, ailes de la chaîne) est remplacé par une bissection, ce qui garantit la convergence.
+    Seuls les contrats non encore convergés sont recalculés à chaque itération.
+
+    Paramètres:
+        price (array-like): Prix de marché (ex: milieu bid / ask).
+        S, K, T, is_call, r, q: Comme pour black_scholes.
+        tol (float): Tolérance sur l'écart de prix.
+        max_iter (int): Nombre maximal d'itérations.
+        lower, upper (float): Bornes de la volatilité recherchée.
+
+    Retour:
+        np.ndarray: Volatilités implicites ; NaN si le prix est hors des bornes de non-arbitrage
+                    ou n'est atteint par aucune volatilité de [lower, upper].
+    """
+    price, S, K, T, is_call = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (price, S, K, T)),
+                                                  np.asarray(is_call, dtype=bool))
+    shape = price.shape
+    price, S, K, T, is_call = (a.ravel() for a in (price, S, K, T, is_call))
+    sigma = np.full(price.shape, np.nan)
+
+    low_price = black_scholes(S, K, T, lower, is_call, r, q)
+    high_price = black_scholes(S, K, T, upper, is_call, r, q)
+    solvable = np.isfinite(price) & (T > 0) & (price >= low_price) & (price <= high_price)
+    idx = np.flatnonzero(solvable)
+    p, s, k, t, c = price[idx], S[idx], K[idx], T[idx], is_call[idx]
+    lo, hi = np.full(len(idx), lower), np.full(len(idx), upper)
+    # Point de départ de Brenner-Subrahmanyam (approximation à la monnaie), ramené dans l'encadrement
+    x = np.clip(np.sqrt(2 * np.pi / t) * p / s, lower, upper)
+
+    active = np.arange(len(idx))
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        g = greeks(s[active], k[active], t[active], x[active], c[active], r, q)
+        diff = g['price'] - p[active]
+        done = np.abs(diff) < tol
+        sigma[idx[active[done]]] = x[active[done]]
+        lo[active] = np.where(diff < 0, x[active], lo[active])
+        hi[active] = np.where(diff > 0, x[active], hi[active])
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = x[active] - diff / g['vega']
+        inside = np.isfinite(newton) & (newton > lo[active]) & (newton < hi[active])
+        x[active] = np.where(inside, newton, 0.5 * (lo[active] + hi[active]))
+        active = active[~done & (hi[active] - lo[active] > 1e-12)]
+    # Encadrement réduit à la précision machine sans atteindre tol (prix très peu sensibles à la volatilité)
+    unresolved = idx[active]
+    sigma[unresolved] = x[active]
+    return sigma.reshape(shape)
+
+
+def chain_analytics(chain, spot, as_of=None, r=0.0, q=0.0):
+    """
+    Prix milieu, volatilités implicites et sensibilités de toute une chaîne d'options.
+
+    Paramètres:
+        chain (pd.DataFrame): Chaîne au format de data.option_chains.load_option_chain.
+        spot (float): Cours du sous-jacent.
+        as_of (pd.Timestamp): Date de valorisation (maintenant par défaut).
+        r (float): Taux sans risque continu.
+        q (float): Taux de dividende continu.
+
+    Retour:
+        pd.DataFrame: La chaîne avec les colonnes 'T', 'mid', 'iv', 'delta', 'gamma', 'vega', 'theta' et 'rho'.
+    """
+    chain = chain.copy()
+    chain['T'] = year_fractions(chain['expiration'], as_of)
+    quoted = (chain['bid'] > 0) & (chain['ask'] >= chain['bid'])
+    chain['mid'] = np.where(quoted, (chain['bid'] + chain['ask']) / 2, chain['lastPrice'])
+    is_call = chain['is_call'].to_numpy(dtype=bool)
+    strike = chain['strike'].to_numpy(dtype=float)
+    chain['iv'] = implied_volatility(chain['mid'].to_numpy(dtype=float), spot, strike, chain['T'].to_numpy(), is_call, r, q)
+    g = greeks(spot, strike, chain['T'].to_numpy(), chain['iv'].to_numpy(), is_call, r, q)
+    for name in ('delta', 'gamma', 'vega', 'theta', 'rho'):
+        chain[name] = np.where(chain['iv'].notna(), g[name], np.nan)
+    return chain
+
+
+class OptionBook:
+    """
+    Portefeuille d'options sous forme de tableaux alignés (un élément par ligne de position) :
+    indice du sous-jacent, prix d'exercice, durée, type, volatilité et nombre de contrats. La
+    réévaluation d'un scénario porte sur tous les contrats en une opération, sans boucle par contrat.
+    """
+
+    def __init__(self, positions, spots, as_of=None, r=0.0, q=0.0, multiplier=CONTRACT_MULTIPLIER):
+        """
+        Paramètres:
+            positions (pd.DataFrame): Colonnes 'underlying', 'strike', 'expiration' (ou 'T' en années),
+                'is_call', 'quantity' (contrats, négatif pour une vente) et 'iv'.
+            spots (dict | pd.Series): Cours de chaque sous-jacent.
+            as_of (pd.Timestamp): Date de valorisation, pour calculer T à partir de 'expiration'.
+            r (float): Taux sans risque continu.
+            q (float): Taux de dividende continu.
+            multiplier (float): Sous-jacents par contrat.
+        """
+        spots = pd.Series(spots, dtype=float)
+        self.underlyings = list(dict.fromkeys(positions['underlying']))
+        missing = set(self.underlyings) - set(spots.index)
+        if missing:
+            raise ValueError(f"Cours manquant pour : {', '.join(sorted(missing))}.")
+        self.spots = spots[self.underlyings].to_numpy()
+        self.index = pd.Index(self.underlyings).get_indexer(positions['underlying'])
+        self.strike = positions['strike'].to_numpy(dtype=float)
+        self.T = positions['T'].to_numpy(dtype=float) if 'T' in positions else year_fractions(positions['expiration'], as_of)
+        self.is_call = positions['is_call'].to_numpy(dtype=bool)
+        self.sigma = positions['iv'].to_numpy(dtype=float)
+        self.units = positions['quantity'].to_numpy(dtype=float) * multiplier
+        self.r = r
+        self.q = q
+        self.greeks = greeks(self.spots[self.index], self.strike, self.T, self.sigma, self.is_call, r, q)
+
+    def __len__(self):
+        return len(self.strike)
+
+    @property
+    def value(self):
+        return float(self.greeks['price'] @ self.units)
+
+    def exposures(self):
+        """
+        Retour:
+            pd.DataFrame: Delta, gamma (en sous-jacents), vega et theta agrégés par sous-jacent.
+        """
+        n = len(self.underlyings)
+        return pd.DataFrame({name: np.bincount(self.index, self.greeks[name] * self.units, minlength=n)
+                             for name in ('delta', 'gamma', 'vega', 'theta')}, index=self.underlyings)
+
+    def delta_gamma_pnl(self, shocks, horizon_days=1):
+        """
+        P&L approché au second ordre : Σ_u Δ_u·dS_u + ½·Γ_u·dS_u² + Θ·dt. Les sensibilités sont
+        agrégées par sous-jacent, le coût est donc O(n_scénarios x n_sous-jacents) quel que soit le
+        nombre de contrats.
+
+        Paramètres:
+            shocks (np.ndarray): Rendements logarithmiques des sous-jacents, (n_scénarios, n_sous-jacents).
+            horizon_days (float): Horizon en jours calendaires (décroissance temporelle).
+
+        Retour:
+            np.ndarray: P&L de chaque scénario.
+        """
+        exposures = self.exposures()
+        dS = self.spots * np.expm1(np.asarray(shocks, dtype=float))
+        return (dS @ exposures['delta'].to_numpy() + 0.5 * (dS * dS) @ exposures['gamma'].to_numpy()
+                + exposures['theta'].sum() * horizon_days / DAYS_PER_YEAR)
+
+    def revaluation_pnl(self, shocks, horizon_days=1, vol_shocks=None):
+        """
+        P&L par réévaluation complète Black-Scholes de chaque contrat dans chaque scénario, par blocs
+        de scénarios pour borner la mémoire (blocs de _REVALUATION_CHUNK_ELEMENTS valeurs).
+
+        Paramètres:
+            shocks (np.ndarray): Rendements logarithmiques des sous-jacents, (n_scénarios, n_sous-jacents).
+            horizon_days (float): Horizon en jours calendaires (les durées sont réduites d'autant).
+            vol_shocks (np.ndarray): Chocs additifs de volatilité (n_scénarios,), None pour aucun.
+
+        Retour:
+            np.ndarray: P&L de chaque scénario.
+        """
+        shocks = np.asarray(shocks, dtype=float)
+        T = np.maximum(self.T - horizon_days / DAYS_PER_YEAR, 0.0)
+        base = self.value
+        pnl = np.empty(len(shocks))
+        rows = max(1, _REVALUATION_CHUNK_ELEMENTS // max(len(self), 1))
+        for start in range(0, len(shocks), rows):
+            stop = start + rows
+            S = self.spots[self.index] * np.exp(shocks[start:stop][:, self.index])
+            sigma = self.sigma if vol_shocks is None else np.maximum(self.sigma + np.asarray(vol_shocks)[start:stop, None], 1e-6)
+            pnl[start:stop] = black_scholes(S, self.strike, T, sigma, self.is_call, self.r, self.q) @ self.units - base
+        return pnl
+
+    def pnl_ladder(self, spot_shocks=np.linspace(-0.2, 0.2, 41), vol_shocks=(0.0,), horizon_days=0):
+        """
+        Grille de stress : même choc relatif appliqué à tous les sous-jacents, pour chaque choc de volatilité.
+
+        Retour:
+            pd.DataFrame: Index (choc de volatilité, choc du sous-jacent), colonnes 'full' et 'delta_gamma'.
+        """
+        spot_shocks = np.asarray(spot_shocks, dtype=float)
+        grid = pd.MultiIndex.from_product([vol_shocks, spot_shocks], names=['vol_shock', 'spot_shock'])
+        log_shocks = np.repeat(np.log1p(grid.get_level_values('spot_shock').to_numpy())[:, None], len(self.underlyings), axis=1)
+        vol = grid.get_level_values('vol_shock').to_numpy()
+        full = self.revaluation_pnl(log_shocks, horizon_days, vol_shocks=vol)
+        delta_gamma = self.delta_gamma_pnl(log_shocks, horizon_days)
+        # Approximation au premier ordre de l'effet des chocs de volatilité
+        delta_gamma = delta_gamma + vol * self.exposures()['vega'].sum()
+        return pd.DataFrame({'full': full, 'delta_gamma': delta_gamma}, index=grid)
+
+
+def historical_shocks(returns, horizon=1):
+    """
+    Scénarios historiques de chocs des sous-jacents : rendements logarithmiques glissants sur horizon jours.
+
+    Paramètres:
+        returns (pd.DataFrame): Rendements logarithmiques alignés (dates x sous-jacents), ex: align_returns.
+        horizon (int): Horizon en jours de bourse.
+
+    Retour:
+        pd.DataFrame: Un scénario par ligne, une colonne par sous-jacent.
+    """
+    aggregated = aggregate_horizon(returns.to_numpy(dtype=float).T, horizon).T
+    return pd.DataFrame(aggregated, index=returns.index[horizon - 1:], columns=returns.columns)
+
+
+def option_var(book, shocks, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, horizon_days=1):
+    """
+    VaR et ES d'un portefeuille d'options sur un ensemble de scénarios, par approximation delta-gamma
+    et par réévaluation complète.
+
+    Paramètres:
+        book (OptionBook): Le portefeuille d'options.
+        shocks (pd.DataFrame): Scénarios (historical_shocks), une colonne par sous-jacent du portefeuille.
+        confidence_levels (tuple): Niveaux de confiance α.
+        horizon_days (float): Horizon en jours calendaires.
+
+    Retour:
+        dict: 'table' (DataFrame VaR / ES par méthode et niveau), 'pnl' (DataFrame des P&L par scénario)
+              et 'value' (valeur du portefeuille).
+    """
+    values = shocks[book.underlyings].to_numpy(dtype=float)
+    pnl = pd.DataFrame({'delta_gamma': book.delta_gamma_pnl(values, horizon_days),
+                        'full': book.revaluation_pnl(values, horizon_days)}, index=shocks.index)
+    result = historical_var_es(pnl, confidence_levels)
+    table = pd.concat({
+        'VaR': pd.DataFrame(result['var'][0], index=list(confidence_levels), columns=result['assets']),
+        'ES': pd.DataFrame(result['es'][0], index=list(confidence_levels), columns=result['assets']),
+    }, axis=1)
+    return {'table': table, 'pnl': pnl, 'value': book.value}
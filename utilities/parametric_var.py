@@ -0,0 +1,189 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from utilities.base_tools import align_returns, position_values
+from utilities.return_panel import ReturnPanel
+from utilities.var_methods import DEFAULT_CONFIDENCE_LEVELS
+
+RISKMETRICS_LAMBDA = 0.94
+
+
+class EWMACovariance:
+    """
+    Matrice de covariance EWMA (RiskMetrics) : Σ_t = λ·Σ_{t-1} + (1 - λ)·r_t·r_tᵀ.
+
+    L'initialisation sur tout l'historique est un unique produit matriciel pondéré ; chaque nouveau jour
+    coûte ensuite une mise à jour de rang 1 en O(n²). L'état (matrice, λ, dernière date) se sauvegarde
+    dans un fichier .npz pour qu'un rafraîchissement quotidien ne rejoue qu'une seule mise à jour.
+    """
+
+    def __init__(self, tickers, cov, lam=RISKMETRICS_LAMBDA, last_date=None, n_obs=0):
+        """
+        Paramètres:
+            tickers (list): Actifs, dans l'ordre des lignes / colonnes de cov.
+            cov (np.ndarray): Matrice de covariance courante.
+            lam (float): Facteur de décroissance λ.
+            last_date (pd.Timestamp): Date du dernier rendement intégré.
+            n_obs (int): Nombre de rendements intégrés.
+        """
+        self.tickers = list(tickers)
+        self.cov = np.array(cov, dtype=float)
+        self.lam = lam
+        self.last_date = pd.Timestamp(last_date) if last_date is not None else None
+        self.n_obs = n_obs
+
+    @classmethod
+    def from_returns(cls, returns, lam=RISKMETRICS_LAMBDA, seed_window=25):
+        """
+        Initialise la covariance à partir d'un historique de rendements (dates x actifs).
+        La covariance empirique des seed_window premiers jours sert de point de départ, puis la récursion
+        sur les jours suivants est calculée en forme close : Σ_T = λ^m·Σ_0 + Σ_t (1 - λ)·λ^(T-t)·r_t·r_tᵀ.
+        """
+        values = returns.to_numpy(dtype=float)
+        seed_window = min(seed_window, len(values))
+        seed = values[:seed_window]
+        cov = seed.T @ seed / max(seed_window, 1)
+        rest = values[seed_window:]
+        weights = (1 - lam) * lam ** np.arange(len(rest) - 1, -1, -1)
+        cov = lam ** len(rest) * cov + (rest * weights[:, None]).T @ rest
+        return cls(returns.columns, cov, lam, returns.index[-1] if len(returns) else None, len(values))
+
+    def update(self, r, date=None):
+        """
+        Intègre le rendement d'un nouveau jour (mise à jour en place, O(n²)).
+        Un jour déjà intégré (date <= last_date) est ignoré, ce qui rend le rafraîchissement idempotent.
+        """
+        if date is not None and self.last_date is not None and pd.Timestamp(date) <= self.last_date:
+            return self
+        r = np.asarray(r, dtype=float)
+        self.cov *= self.lam
+        self.cov += (1 - self.lam) * np.outer(r, r)
+        if date is not None:
+            self.last_date = pd.Timestamp(date)
+        self.n_obs += 1
+        return self
+
+    def update_from_returns(self, returns):
+        """
+        Intègre les rendements (dates x actifs) postérieurs à la dernière date connue.
+        """
+        returns = returns[self.tickers]
+        if self.last_date is not None:
+            returns = returns[returns.index > self.last_date]
+        for date, row in zip(returns.index, returns.to_numpy(dtype=float)):
+            self.update(row, date)
+        return self
+
+    def save(self, path):
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, tickers=np.array(self.tickers, dtype=str), cov=self.cov, lam=self.lam,
+                 last_date=str(self.last_date) if self.last_date is not None else '', n_obs=self.n_obs)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            last_date = str(state['last_date'])
+            return cls(state['tickers'].tolist(), state['cov'], float(state['lam']),
+                       last_date or None, int(state['n_obs']))
+
+
+def _portfolio_sigma(cov, weights):
+    """
+    Volatilité de un ou plusieurs portefeuilles : weights de forme (n_actifs,) ou (n_actifs, n_portefeuilles).
+    """
+    weights = np.asarray(weights, dtype=float)
+    return np.sqrt(np.einsum('i...,i...->...', weights, cov @ weights)), weights
+
+
+def parametric_var(cov, weights, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, horizon=1):
+    """
+    VaR et ES delta-normales (moyenne nulle) pour un ou plusieurs vecteurs de poids.
+
+    Paramètres:
+        cov (np.ndarray): Covariance quotidienne des rendements.
+        weights (array-like): Expositions (valeurs des positions), (n_actifs,) ou (n_actifs, n_portefeuilles).
+        confidence_levels (tuple): Niveaux de confiance α.
+        horizon (int): Horizon en jours (règle de la racine du temps).
+
+    Retour:
+        dict: 'var' et 'es' de forme (n_niveaux, [n_portefeuilles]), et 'sigma' la volatilité quotidienne.
+    """
+    sigma, _ = _portfolio_sigma(cov, weights)
+    alphas = np.asarray(confidence_levels, dtype=float).reshape((-1,) + (1,) * np.ndim(sigma))
+    z = norm.ppf(alphas)
+    scaled = sigma * np.sqrt(horizon)
+    return {
+        'var': z * scaled,
+        'es': norm.pdf(z) / (1 - alphas) * scaled,
+        'sigma': sigma,
+    }
+
+
+def var_decomposition(cov, weights, confidence=0.99, horizon=1):
+    """
+    VaR marginale et VaR par composante (décomposition d'Euler) d'un ou plusieurs portefeuilles.
+
+    Paramètres:
+        cov (np.ndarray): Covariance quotidienne des rendements.
+        weights (array-like): Expositions, (n_actifs,) ou (n_actifs, n_portefeuilles).
+        confidence (float): Niveau de confiance α.
+        horizon (int): Horizon en jours.
+
+    Retour:
+        dict: 'var' total, 'marginal' (∂VaR/∂w_i) et 'component' (w_i · ∂VaR/∂w_i, de somme égale à la VaR).
+    """
+    sigma, weights = _portfolio_sigma(cov, weights)
+    z = norm.ppf(confidence) * np.sqrt(horizon)
+    marginal = z * (cov @ weights) / sigma
+    return {
+        'var': z * sigma,
+        'marginal': marginal,
+        'component': weights * marginal,
+    }
+
+
+def portfolio_parametric_var(assets, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, lam=RISKMETRICS_LAMBDA, state_path=None):
+    """
+    VaR paramétrique EWMA du portefeuille stocké dans st.session_state.assets.
+
+    Si state_path désigne un état sauvegardé pour les mêmes actifs, seuls les jours postérieurs à sa
+    dernière date sont intégrés ; sinon la covariance est recalculée sur tout l'historique. L'état est
+    ensuite sauvegardé dans state_path.
+
+    Paramètres:
+        assets (ReturnPanel | dict): Le panel de st.session_state.assets.
+        confidence_levels (tuple): Niveaux de confiance α.
+        lam (float): Facteur de décroissance λ.
+        state_path (str): Fichier .npz de l'état EWMA persisté, None pour ne rien persister.
+
+    Retour:
+        dict: 'var' et 'es' (Series par niveau), 'decomposition' (DataFrame marginale / composante
+              à 99 %) et 'covariance' (EWMACovariance).
+    """
+    tickers = list(assets.tickers) if isinstance(assets, ReturnPanel) else list(assets)
+    values = position_values(assets)[tickers]
+
+    model = None
+    if state_path is not None and os.path.exists(state_path):
+        model = EWMACovariance.load(state_path)
+        if model.tickers != tickers or model.lam != lam or model.last_date is None:
+            model = None
+    if model is None:
+        model = EWMACovariance.from_returns(align_returns(assets, column='log_return'), lam=lam)
+    else:
+        # Rafraîchissement : seuls les rendements postérieurs à l'état sauvegardé sont calculés
+        model.update_from_returns(align_returns(assets, column='log_return', since=model.last_date))
+    if state_path is not None:
+        model.save(state_path)
+
+    result = parametric_var(model.cov, values.to_numpy(), confidence_levels)
+    decomposition = var_decomposition(model.cov, values.to_numpy(), confidence=max(confidence_levels))
+    return {
+        'var': pd.Series(result['var'], index=list(confidence_levels)),
+        'es': pd.Series(result['es'], index=list(confidence_levels)),
+        'decomposition': pd.DataFrame({'marginal': decomposition['marginal'], 'component': decomposition['component']},
+                                      index=tickers),
+        'covariance': model,
+    }
@@ -0,0 +1,105 @@
+import threading
+import time
+
+# Référence pour mesurer le temps jusqu'au premier rendu : ce module est le premier importé par app.py
+PROCESS_START = time.perf_counter()
+
+# Durées de chargement (en secondes) des ressources et du premier rendu
+STARTUP_TIMINGS = {}
+
+
+class LazyResource:
+    """
+    Ressource lourde (modèle, index) initialisée une seule fois par processus, au premier accès.
+
+    L'objet se comporte comme la ressource elle-même : tout attribut inconnu est délégué à la
+    ressource chargée (EMBEDDER.encode(...) charge le modèle si nécessaire).
+    warm_up() lance le chargement dans un thread d'arrière-plan sans bloquer le rendu de la page.
+    """
+
+    def __init__(self, name, loader):
+        """
+        Paramètres:
+            name (str): Nom utilisé dans les mesures de temps.
+            loader (callable): Fonction sans argument qui construit la ressource.
+        """
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._warm_thread = None
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        """
+        Renvoie la ressource, en la chargeant si nécessaire (un seul chargement même en cas d'accès concurrents).
+        """
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    start = time.perf_counter()
+                    self._value = self._loader()
+                    STARTUP_TIMINGS[self.name] = time.perf_counter() - start
+                    self._loaded = True
+        return self._value
+
+    def warm_up(self):
+        """
+        Lance le chargement en arrière-plan (une seule fois) ; sans effet si la ressource est déjà chargée.
+        """
+        if not self._loaded and self._warm_thread is None:
+            self._warm_thread = threading.Thread(target=self.get, name=f"warm-up-{self.name}", daemon=True)
+            self._warm_thread.start()
+
+    def __getattr__(self, attr):
+        # Appelé uniquement pour les attributs absents de LazyResource : délégation à la ressource
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+
+def _load_embedder():
+    # Import différé : torch et sentence_transformers ne sont chargés qu'à la première recherche sémantique
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+
+def _load_asset_index():
+    from data.ticker_store import ensure_store
+    from utilities.search_bar import AssetIndex
+    return AssetIndex.from_store(ensure_store())
+
+
+EMBEDDER = LazyResource('embedder', _load_embedder)
+ASSET_INDEX = LazyResource('asset_index', _load_asset_index)
+
+
+def warm_up():
+    """
+    Précharge l'index puis le modèle en arrière-plan.
+    """
+    ASSET_INDEX.warm_up()
+    EMBEDDER.warm_up()
+
+
+def mark_first_render():
+    """
+    Enregistre, une seule fois par processus, le temps écoulé entre l'import de ce module et la fin du premier rendu.
+    """
+    if 'first_render' not in STARTUP_TIMINGS:
+        STARTUP_TIMINGS['first_render'] = time.perf_counter() - PROCESS_START
+
+
+def startup_report():
+    """
+    Retour:
+        dict: Durées mesurées (en secondes) et état de chargement de chaque ressource.
+    """
+    return {
+        "timings": dict(STARTUP_TIMINGS),
+        "loaded": {resource.name: resource.loaded for resource in (EMBEDDER, ASSET_INDEX)},
+    }
@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+
+
+def _calendar_dates(values):
+    """
+    Dates calendaires sans fuseau horaire (datetime64[ns] normalisées), comme dans align_returns.
+    """
+    dates = pd.Series(values)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.dt.normalize().to_numpy()
+
+
+class ReturnPanel:
+    """
+    Panel compact des cours d'un portefeuille : un index de dates commun et deux matrices float32
+    contiguës (dates x actifs), les clôtures et les rendements logarithmiques entre observations
+    successives, tenus à jour colonne par colonne à chaque ajout. Les NaN des clôtures marquent les
+    dates où l'actif ne cote pas : ils tiennent lieu de masque des observations, sans tampon dédié.
+
+    Les tampons ont une capacité supérieure à leur taille utile : ajouter un jour ou un actif écrit
+    dans l'espace libre et ne réalloue qu'en cas de dépassement (croissance géométrique). close et
+    log_returns sont des vues sans copie, directement consommables par les moteurs de VaR
+    (log_returns.T a la forme (n_actifs, n_obs) attendue par historical_var_es). compact() rend la
+    capacité inutilisée, par exemple une fois un portefeuille complet chargé.
+
+    Remplace le DataFrame yfinance complet (7 colonnes float64 et horodatage) stocké pour chaque
+    actif dans st.session_state.assets : le panel garde aussi le nom et la quantité de chaque position.
+    """
+
+    def __init__(self, capacity_days=0, capacity_assets=0):
+        """
+        Paramètres:
+            capacity_days (int): Nombre de dates réservées au départ.
+            capacity_assets (int): Nombre d'actifs réservés au départ.
+        """
+        self.tickers = []
+        self.names = []
+        self._columns = {}
+        self._n_days = 0
+        self._dates = np.empty(capacity_days, dtype='datetime64[ns]')
+        self._quantities = np.zeros(capacity_assets)
+        self._close = np.full((capacity_days, capacity_assets), np.nan, dtype=np.float32)
+        self._log = np.full((capacity_days, capacity_assets), np.nan, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._columns
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    @property
+    def n_days(self):
+        return self._n_days
+
+    @property
+    def dates(self):
+        return self._dates[:self._n_days]
+
+    @property
+    def close(self):
+        return self._close[:self._n_days, :len(self.tickers)]
+
+    @property
+    def log_returns(self):
+        """
+        Rendements logarithmiques entre observations successives de chaque actif, NaN à la première
+        observation et aux dates où l'actif ne cote pas.
+        """
+        return self._log[:self._n_days, :len(self.tickers)]
+
+    @property
+    def mask(self):
+        """
+        Vrai si l'actif cote à cette date (calculé à partir des NaN des clôtures).
+        """
+        return ~np.isnan(self.close)
+
+    @property
+    def quantities(self):
+        return self._quantities[:len(self.tickers)]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self._dates, self._quantities, self._close, self._log))
+
+    def compact(self):
+        """
+        Ramène la capacité des tampons à leur taille utile (sans effet s'ils sont déjà ajustés).
+        Le prochain ajout réalloue : à n'appeler qu'une fois une série d'ajouts terminée.
+        """
+        days, assets = self._close.shape
+        if days == self._n_days and assets == len(self.tickers):
+            return
+        self._close = np.ascontiguousarray(self.close)
+        self._log = np.ascontiguousarray(self.log_returns)
+        self._dates = self._dates[:self._n_days].copy()
+        self._quantities = self._quantities[:len(self.tickers)].copy()
+
+    def _reserve(self, n_days, n_assets):
+        """
+        Garantit la capacité pour n_days dates et n_assets actifs, en multipliant la capacité par 1.5 au besoin.
+        """
+        days, assets = self._close.shape
+        if n_days <= days and n_assets <= assets:
+            return
+        days = max(n_days, int(days * 1.5)) if n_days > days else days
+        assets = max(n_assets, int(assets * 1.5)) if n_assets > assets else assets
+        used = (slice(0, self._n_days), slice(0, len(self.tickers)))
+        for name in ('_close', '_log'):
+            old = getattr(self, name)
+            new = np.full((days, assets), np.nan, dtype=np.float32)
+            new[used] = old[used]
+            setattr(self, name, new)
+        dates = np.empty(days, dtype='datetime64[ns]')
+        dates[:self._n_days] = self.dates
+        self._dates = dates
+        quantities = np.zeros(assets)
+        quantities[:len(self.tickers)] = self.quantities
+        self._quantities = quantities
+
+    def _merge_dates(self, dates):
+        """
+        Ajoute les dates manquantes à l'index. Les dates postérieures à la dernière sont simplement
+        ajoutées à la fin ; des dates antérieures ou intercalées imposent de reconstruire les lignes.
+        """
+        new = np.setdiff1d(dates, self.dates)
+        if not len(new):
+            return
+        n = self._n_days
+        self._reserve(n + len(new), len(self.tickers))
+        if not n or new[0] > self._dates[n - 1]:
+            self._dates[n:n + len(new)] = new
+            self._n_days = n + len(new)
+            return
+
+        merged = np.union1d(self.dates, new)
+        rows = np.searchsorted(merged, self.dates)
+        used = slice(0, len(self.tickers))
+        # Une ligne insérée est vide pour les actifs existants : leurs rendements ne changent pas
+        for buffer in (self._close, self._log):
+            old = buffer[:n, used].copy()
+            buffer[:len(merged), used] = np.nan
+            buffer[rows, used] = old
+        self._dates[:len(merged)] = merged
+        self._n_days = len(merged)
+
+    def _write_column(self, col, rows, close):
+        """
+        Écrit les clôtures d'un actif et recalcule ses rendements logarithmiques entre observations successives.
+        """
+        self._close[rows, col] = close
+        observed = np.flatnonzero(~np.isnan(self._close[:self._n_days, col]))
+        values = self._close[observed, col].astype(np.float64)
+        self._log[:self._n_days, col] = np.nan
+        self._log[observed[1:], col] = np.log(values[1:] / values[:-1])
+
+    def add_asset(self, ticker, hist, name=None, quantity=None):
+        """
+        Ajoute un actif au panel, ou met à jour son historique s'il y est déjà (nouvelles barres de tickerf).
+
+        Paramètres:
+            ticker (str): Le symbole boursier.
+            hist (pd.DataFrame): Historique avec les colonnes 'Date' et 'Close' (format de tickerf).
+            name (str): Nom de l'actif ; conservé s'il est déjà présent et que name vaut None.
+            quantity (float): Quantité détenue ; conservée si None (0 pour un nouvel actif).
+        """
+        close = hist['Close'].to_numpy(dtype=np.float64)
+        observed = ~np.isnan(close)
+        dates = _calendar_dates(hist['Date'][observed] if not observed.all() else hist['Date'])
+        close = close[observed]
+        # Une seule clôture par date calendaire (la dernière)
+        dates, last = np.unique(dates[::-1], return_index=True)
+        close = close[::-1][last]
+
+        if ticker not in self._columns:
+            self._reserve(self._n_days, len(self.tickers) + 1)
+            self._columns[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            self.names.append(name or ticker)
+        col = self._columns[ticker]
+        if name is not None:
+            self.names[col] = name
+        if quantity is not None:
+            self._quantities[col] = quantity
+
+        self._merge_dates(dates)
+        rows = np.searchsorted(self.dates, dates)
+        self._write_column(col, rows, close)
+
+    def set_quantity(self, ticker, quantity):
+        self._quantities[self._columns[ticker]] = quantity
+
+    def last_close(self):
+        """
+        Retour:
+            np.ndarray: Dernière clôture observée de chaque actif.
+        """
+        close = self.close
+        last = self._n_days - 1 - np.argmax(~np.isnan(close[::-1]), axis=0)
+        return close[last, np.arange(len(self.tickers))]
+
+    def frame(self, column='log_return'):
+        """
+        DataFrame dates x actifs construit sur le tampon, sans copie.
+
+        Paramètres:
+            column (str): 'log_return', 'simple_return' (calculé, donc copié) ou 'Close'.
+        """
+        if column == 'log_return':
+            values = self.log_returns
+        elif column == 'simple_return':
+            values = np.expm1(self.log_returns)
+        elif column == 'Close':
+            values = self.close
+        else:
+            raise ValueError("column doit être 'log_return', 'simple_return' ou 'Close'.")
+        return pd.DataFrame(values, index=pd.DatetimeIndex(self.dates, name='Date'), columns=list(self.tickers), copy=False)
+
+    def history(self, ticker):
+        """
+        Historique d'un actif au format attendu par compute_returns (colonnes 'Date' et 'Close').
+        """
+        close = self.close[:, self._columns[ticker]]
+        rows = np.flatnonzero(~np.isnan(close))
+        return pd.DataFrame({'Date': self.dates[rows], 'Close': close[rows]})
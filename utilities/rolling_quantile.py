@@ -0,0 +1,277 @@
+import math
+import random
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+from utilities.var_methods import DEFAULT_CONFIDENCE_LEVELS, tail_sizes
+
+
+class _Node:
+    __slots__ = ('value', 'next', 'width', 'sum')
+
+    def __init__(self, value, next, width, sum):
+        self.value = value
+        self.next = next
+        self.width = width
+        self.sum = sum
+
+
+class IndexableSkiplist:
+    """
+    Liste triée à accès par rang : insertion, suppression, k-ième valeur et somme des k plus petites en O(log n).
+
+    Chaque lien d'un niveau mémorise sa largeur (nombre de positions sautées) et la somme des valeurs
+    sautées, ce qui donne directement les moyennes de queue nécessaires à l'Expected Shortfall.
+    """
+
+    def __init__(self, expected_size=1024, seed=0):
+        """
+        Paramètres:
+            expected_size (int): Taille maximale attendue (détermine le nombre de niveaux).
+            seed (int): Graine du tirage des niveaux, pour un comportement reproductible.
+        """
+        self.size = 0
+        self.maxlevels = 1 + int(math.log2(max(expected_size, 2)))
+        self._random = random.Random(seed).random
+        self._nil = _Node(math.inf, [], [], [])
+        self.head = _Node(None, [self._nil] * self.maxlevels, [1] * self.maxlevels, [0.0] * self.maxlevels)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        node = self.head
+        i += 1
+        for level in reversed(range(self.maxlevels)):
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def insert(self, value):
+        chain = [None] * self.maxlevels
+        steps_at_level = [0] * self.maxlevels
+        sums_at_level = [0.0] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                sums_at_level[level] += node.sum[level]
+                node = node.next[level]
+            chain[level] = node
+
+        d = min(self.maxlevels, 1 - int(math.log2(1.0 - self._random())))
+        new = _Node(value, [None] * d, [0] * d, [0.0] * d)
+        # steps / partial : distance et somme des valeurs entre chain[level] et le prédécesseur du nouveau nœud
+        steps, partial = 0, 0.0
+        for level in range(d):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            new.sum[level] = prev.sum[level] - partial
+            prev.width[level] = steps + 1
+            prev.sum[level] = partial + value
+            steps += steps_at_level[level]
+            partial += sums_at_level[level]
+        for level in range(d, self.maxlevels):
+            chain[level].width[level] += 1
+            chain[level].sum[level] += value
+        self.size += 1
+
+    def remove(self, value):
+        chain = [None] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        removed = chain[0].next[0]
+        if removed.value != value:
+            raise KeyError(value)
+
+        d = len(removed.next)
+        for level in range(d):
+            prev = chain[level]
+            prev.width[level] += removed.width[level] - 1
+            prev.sum[level] += removed.sum[level] - value
+            prev.next[level] = removed.next[level]
+        for level in range(d, self.maxlevels):
+            chain[level].width[level] -= 1
+            chain[level].sum[level] -= value
+        self.size -= 1
+
+    def prefix_sum(self, k):
+        """
+        Somme des k plus petites valeurs.
+        """
+        node = self.head
+        total = 0.0
+        for level in reversed(range(self.maxlevels)):
+            while node.width[level] <= k:
+                k -= node.width[level]
+                total += node.sum[level]
+                node = node.next[level]
+        return total
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not self._nil:
+            yield node.value
+            node = node.next[0]
+
+
+class RollingTail:
+    """
+    Fenêtre glissante de window observations émettant, à chaque pas, la VaR et l'ES historiques
+    pour plusieurs niveaux de confiance (mêmes conventions que var_methods.historical_var_es).
+
+    Chaque pas coûte une insertion et une suppression en O(log w), puis un accès par rang et une
+    somme de préfixe en O(log w) par niveau, au lieu d'un tri de la fenêtre en O(w log w).
+    Les NaN et les infinis (rendement d'une clôture nulle) occupent une place dans la fenêtre mais sont
+    exclus du nombre d'observations.
+    """
+
+    def __init__(self, window, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, seed=0):
+        self.window = window
+        self.confidence_levels = tuple(confidence_levels)
+        self.values = deque()
+        self.sorted = IndexableSkiplist(window, seed=seed)
+        # Tailles de queue pour chaque nombre possible d'observations valides
+        self._k = tail_sizes(np.arange(window + 1), self.confidence_levels).T.tolist()
+
+    def push(self, value):
+        """
+        Ajoute une observation et retire la plus ancienne si la fenêtre est pleine.
+
+        Retour:
+            tuple: (VaR, ES) par niveau de confiance (listes), ou None tant que la fenêtre n'est pas pleine
+                   ou si elle ne contient aucune observation valide.
+        """
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            if math.isfinite(old):
+                self.sorted.remove(old)
+        value = float(value)
+        self.values.append(value)
+        # La sentinelle de fin de la skiplist vaut +inf : les valeurs non finies n'y sont jamais insérées
+        if math.isfinite(value):
+            self.sorted.insert(value)
+        if len(self.values) < self.window or not len(self.sorted):
+            return None
+        ks = self._k[len(self.sorted)]
+        return [-self.sorted[k - 1] for k in ks], [-self.sorted.prefix_sum(k) / k for k in ks]
+
+
+def rolling_var_es_series(values, window, confidence_levels=DEFAULT_CONFIDENCE_LEVELS):
+    """
+    VaR et ES glissantes d'une série de rendements.
+
+    Paramètres:
+        values (array-like): Rendements dans l'ordre chronologique.
+        window (int): Taille de la fenêtre en observations.
+        confidence_levels (tuple): Niveaux de confiance α.
+
+    Retour:
+        tuple: (var, es) de forme (n_niveaux, n_obs - window + 1).
+    """
+    values = np.asarray(values, dtype=float)
+    n_windows = len(values) - window + 1
+    if n_windows < 1:
+        raise ValueError(f"Pas assez d'observations ({len(values)}) pour une fenêtre de {window}.")
+    var = np.full((len(confidence_levels), n_windows), np.nan)
+    es = np.full_like(var, np.nan)
+    tail = RollingTail(window, confidence_levels)
+    for i, value in enumerate(values.tolist()):
+        result = tail.push(value)
+        if result is not None:
+            var[:, i - window + 1], es[:, i - window + 1] = result
+    return var, es
+
+
+def rolling_var_es(df, window=252, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, columns=('log_return', 'simple_return')):
+    """
+    VaR et ES historiques glissantes sur les colonnes de rendements produites par compute_returns.
+
+    Paramètres:
+        df (pd.DataFrame): DataFrame issu de compute_returns (colonnes 'Date', 'log_return', 'simple_return').
+        window (int): Taille de la fenêtre en observations.
+        confidence_levels (tuple): Niveaux de confiance α.
+        columns (tuple): Colonnes de rendements à traiter.
+
+    Retour:
+        pd.DataFrame: Indexé par la date de fin de chaque fenêtre, colonnes (colonne, mesure, niveau).
+    """
+    df = df.sort_values('Date')
+    frames = {}
+    for column in columns:
+        var, es = rolling_var_es_series(df[column].to_numpy(), window, confidence_levels)
+        for measure, values in (('VaR', var), ('ES', es)):
+            for alpha, row in zip(confidence_levels, values):
+                frames[(column, measure, alpha)] = row
+    index = pd.Index(df['Date'].to_numpy()[window - 1:], name='Date')
+    result = pd.DataFrame(frames, index=index)
+    result.columns.names = ['column', 'measure', 'confidence']
+    return result
+
+
+def naive_rolling_var_es(values, window, confidence_levels=DEFAULT_CONFIDENCE_LEVELS):
+    """
+    Référence naïve : chaque fenêtre est triée entièrement, en O(n · w log w). Sert de point de comparaison.
+    """
+    values = np.asarray(values, dtype=float)
+    n_windows = len(values) - window + 1
+    var = np.full((len(confidence_levels), n_windows), np.nan)
+    es = np.full_like(var, np.nan)
+    for i in range(n_windows):
+        sample = np.sort(values[i:i + window])
+        sample = sample[~np.isnan(sample)]
+        if not len(sample):
+            continue
+        for j, k in enumerate(tail_sizes(len(sample), confidence_levels).tolist()):
+            var[j, i] = -sample[k - 1]
+            es[j, i] = -sample[:k].mean()
+    return var, es
+
+
+def benchmark(n_obs=5000, windows=(252, 1000, 2500), confidence_levels=DEFAULT_CONFIDENCE_LEVELS, seed=0):
+    """
+    Compare la fenêtre à skiplist, le tri naïf de chaque fenêtre et pandas.rolling().quantile
+    sur une série de rendements de Student simulée.
+
+    Retour:
+        pd.DataFrame: Durées (en secondes) par taille de fenêtre, et écart maximal avec la référence naïve.
+    """
+    rng = np.random.default_rng(seed)
+    values = 0.01 * rng.standard_t(4, n_obs)
+    rows = []
+    for window in windows:
+        start = time.perf_counter()
+        var, es = rolling_var_es_series(values, window, confidence_levels)
+        skiplist_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ref_var, ref_es = naive_rolling_var_es(values, window, confidence_levels)
+        naive_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rolling = pd.Series(values).rolling(window)
+        for alpha in confidence_levels:
+            rolling.quantile(1 - alpha, interpolation='lower')
+        pandas_s = time.perf_counter() - start
+
+        rows.append({
+            'window': window,
+            'skiplist_s': skiplist_s,
+            'naive_sort_s': naive_s,
+            'pandas_quantile_s': pandas_s,
+            'max_abs_error': max(np.abs(var - ref_var).max(), np.abs(es - ref_es).max()),
+        })
+    return pd.DataFrame(rows).set_index('window')
+
+
+if __name__ == '__main__':
+    print(benchmark().to_string())
@@ -1,31 +1,405 @@
+import time
+import bisect
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import pandas as pd
+from data.ticker_store import DEFAULT_STORE_DIR, load_ticker_store, normalize_rows
+from utilities.cache import LRUCache
+from utilities.metrics import METRICS, span, timed
 
-def get_top10_assets(query_text: str, data, model):
+# Libellés de l'interface -> valeurs de la colonne 'Type' du store
+ASSET_TYPE_ALIASES = {
+    "FUTURES": "FUTURE",
+    "OPTIONS": "OPTION",
+}
+
+# Cache des embeddings de requêtes, partagé par toutes les sessions du processus
+QUERY_EMBEDDING_CACHE = LRUCache(maxsize=4096)
+
+# Compteurs des recherches résolues sans appel au modèle
+SEARCH_STATS = {"searches": 0, "lexical_only": 0}
+
+# Nombre de lignes converties en float32 à la fois lorsque la matrice est stockée en float16
+_SCORE_CHUNK_ROWS = 65_536
+
+
+def _top_k_indices(scores, k):
+    """
+    Indices des k plus grands scores, triés par score décroissant.
+    Sélection partielle (argpartition, O(n)) puis tri des seuls k gagnants.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def _score(matrix, query):
+    """
+    Produit matrice-vecteur entre les embeddings normalisés et la requête normalisée (= similarité cosinus).
+    Les matrices float16 sont converties par blocs, numpy n'ayant pas de produit BLAS en float16.
+    """
+    if matrix.dtype == np.float32:
+        return np.asarray(matrix @ query)
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), _SCORE_CHUNK_ROWS):
+        block = np.asarray(matrix[start:start + _SCORE_CHUNK_ROWS], dtype=np.float32)
+        scores[start:start + len(block)] = block @ query
+    return scores
+
+
+class _IVFPartition:
+    """
+    Index approximatif de type IVF (inverted file) sur une tranche de la matrice :
+    les lignes sont regroupées par k-means sphérique, et une requête ne parcourt que
+    les n_probe listes dont le centroïde est le plus proche.
+    """
+
+    def __init__(self, matrix, n_lists, n_iter=10, points_per_list=64, seed=0):
+        rng = np.random.default_rng(seed)
+        n = len(matrix)
+        sample = np.asarray(matrix[np.sort(rng.choice(n, size=min(n, points_per_list * n_lists), replace=False))], dtype=np.float32)
+
+        # k-means sphérique (Lloyd) sur un échantillon
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(n_iter):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind='stable')
+            counts = np.bincount(assign, minlength=n_lists)
+            sums = centroids.copy()  # une liste vide garde son centroïde
+            filled = counts > 0
+            sums[filled] = np.add.reduceat(sample[order], np.concatenate(([0], np.cumsum(counts)[:-1]))[filled])
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+
+        # Affectation de toutes les lignes, par blocs
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, _SCORE_CHUNK_ROWS):
+            block = np.asarray(matrix[start:start + _SCORE_CHUNK_ROWS], dtype=np.float32)
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self.order = np.argsort(assign, kind='stable').astype(np.int32)
+        self.offsets = np.searchsorted(assign[self.order], np.arange(n_lists + 1))
+
+    def candidates(self, query, n_probe):
+        """
+        Indices (dans la tranche) des lignes appartenant aux n_probe listes les plus proches de la requête.
+        """
+        lists = _top_k_indices(self.centroids @ query, n_probe)
+        return np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+
+def encode_query(model, query_text):
+    """
+    Encode une requête avec le modèle en passant par le cache LRU partagé.
+    La clé ignore la casse et les espaces superflus : "Apple " et "apple" partagent la même entrée.
+    """
+    key = (id(model), " ".join(query_text.split()).casefold())
+    def compute():
+        with span('model.encode'):
+            return np.asarray(model.encode(query_text), dtype=np.float32)
+    return QUERY_EMBEDDING_CACHE.get_or_compute(key, compute)
+
+
+def search_cache_stats():
+    """
+    Retour:
+        dict: Statistiques du cache d'embeddings de requêtes et part des recherches résolues lexicalement.
+    """
+    searches = SEARCH_STATS["searches"]
+    return {
+        "query_embeddings": QUERY_EMBEDDING_CACHE.stats(),
+        "searches": searches,
+        "lexical_only": SEARCH_STATS["lexical_only"],
+        "lexical_only_rate": SEARCH_STATS["lexical_only"] / searches if searches else 0.0,
+    }
+
+
+METRICS.register_collector('search', search_cache_stats)
+
+
+class LexicalIndex:
+    """
+    Index lexical exact / par préfixe sur les colonnes 'Ticker' et 'Name'.
+    Les clés sont conservées dans des listes triées : une recherche de préfixe est une recherche
+    dichotomique (bisect) suivie d'un parcours borné de la plage correspondante.
+    """
+
+    # Rang des types de correspondance, du plus fort au plus faible
+    MATCH_RANKS = {"ticker": 0, "ticker_prefix": 1, "name_prefix": 2}
+
+    def __init__(self, metadata, max_scan=5_000):
+        """
+        Paramètres:
+            metadata (pd.DataFrame): Colonnes 'Ticker', 'Name' et 'Type'.
+            max_scan (int): Nombre maximal d'entrées parcourues par plage de préfixe (borne le coût de "a").
+        """
+        self.max_scan = max_scan
+        self.types = metadata['Type'].astype(str).to_numpy()
+        tickers = metadata['Ticker'].astype(str).str.upper().to_numpy()
+        names = metadata['Name'].astype(str).str.casefold().to_numpy()
+
+        ticker_order = np.argsort(tickers, kind='stable')
+        self._ticker_keys = tickers[ticker_order].tolist()
+        self._ticker_rows = ticker_order
+        name_order = np.argsort(names, kind='stable')
+        self._name_keys = names[name_order].tolist()
+        self._name_rows = name_order
+
+    def _prefix_range(self, keys, prefix):
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\U0010ffff", lo)
+        return lo, min(hi, lo + self.max_scan)
+
+    def lookup(self, query_text, k=10, allowed_types=None):
+        """
+        Recherche exacte puis par préfixe sur les tickers, puis par préfixe sur les noms.
+
+        Paramètres:
+            query_text (str): Texte saisi par l'utilisateur.
+            k (int): Nombre maximal de résultats.
+            allowed_types (list): Types d'actifs retenus, None pour tous.
+
+        Retour:
+            list: Couples (ligne, type de correspondance), du plus pertinent au moins pertinent.
+        """
+        query = " ".join(query_text.split())
+        if not query:
+            return []
+
+        hits = {}
+        def add(row, match):
+            if len(hits) < k and row not in hits and (allowed_types is None or self.types[row] in allowed_types):
+                hits[row] = match
+
+        # Tickers : correspondance exacte, puis préfixes du plus court au plus long
+        ticker = query.upper()
+        lo, hi = self._prefix_range(self._ticker_keys, ticker)
+        candidates = sorted(range(lo, hi), key=lambda i: len(self._ticker_keys[i]))
+        for i in candidates:
+            add(int(self._ticker_rows[i]), "ticker" if self._ticker_keys[i] == ticker else "ticker_prefix")
+
+        # Noms : préfixes du plus court au plus long
+        lo, hi = self._prefix_range(self._name_keys, query.casefold())
+        for i in sorted(range(lo, hi), key=lambda i: len(self._name_keys[i])):
+            add(int(self._name_rows[i]), "name_prefix")
+
+        return sorted(hits.items(), key=lambda item: self.MATCH_RANKS[item[1]])
+
+
+class AssetIndex:
+    """
+    Index de recherche vectorielle construit une seule fois sur la matrice d'embeddings normalisée.
+
+    Les lignes sont partitionnées par 'Type' : une recherche filtrée ne parcourt que la tranche du type demandé.
+    En mode exact, une requête coûte un produit matrice-vecteur et une sélection partielle des k meilleurs.
+    En mode approximatif (approximate=True), chaque partition d'au moins ivf_min_rows lignes reçoit
+    un index IVF qui ne parcourt qu'une fraction de la matrice (voir evaluate_recall pour le rappel obtenu).
+    Un index lexical (tickers et préfixes de noms) est consulté avant le modèle dans search().
+    """
+
+    def __init__(self, metadata, embeddings, approximate=False, n_lists=None, n_probe=16, ivf_min_rows=20_000, seed=0):
+        """
+        Paramètres:
+            metadata (pd.DataFrame): Colonnes 'Ticker', 'Name', 'Type', alignées sur embeddings.
+            embeddings (np.ndarray): Matrice (n_actifs, dim) normalisée (éventuellement mappée en mémoire).
+            approximate (bool): Active le mode IVF approximatif.
+            n_lists (int): Nombre de listes IVF par partition (par défaut ~ √n).
+            n_probe (int): Nombre de listes parcourues par requête en mode approximatif.
+            ivf_min_rows (int): Taille minimale d'une partition pour construire un index IVF.
+            seed (int): Graine du k-means.
+        """
+        if len(metadata) != len(embeddings):
+            raise ValueError("metadata et embeddings doivent avoir le même nombre de lignes.")
+        self.metadata = metadata.reset_index(drop=True)
+        self.embeddings = embeddings
+        self.approximate = approximate
+        self.n_probe = n_probe
+
+        # Partitionnement par Type : une vue (slice) si le type est contigu, sinon une copie des lignes
+        types = self.metadata['Type'].astype(str).to_numpy()
+        self._partitions = {}
+        for asset_type in pd.unique(types):
+            rows = np.flatnonzero(types == asset_type)
+            if rows[-1] - rows[0] + 1 == len(rows):
+                matrix = embeddings[rows[0]:rows[-1] + 1]
+            else:
+                matrix = np.ascontiguousarray(embeddings[rows])
+            self._partitions[asset_type] = (rows, matrix)
+
+        self._ivf = {}
+        if approximate:
+            for asset_type, (rows, matrix) in self._partitions.items():
+                if len(rows) >= ivf_min_rows:
+                    lists = n_lists or int(np.sqrt(len(rows)))
+                    self._ivf[asset_type] = _IVFPartition(matrix, lists, seed=seed)
+
+        self.lexical = LexicalIndex(self.metadata)
+
+    @classmethod
+    def from_store(cls, store_dir=DEFAULT_STORE_DIR, **kwargs):
+        """
+        Construit l'index à partir du store binaire (matrice mappée en mémoire, sans copie).
+        """
+        metadata, embeddings = load_ticker_store(store_dir)
+        return cls(metadata, embeddings, **kwargs)
+
+    @classmethod
+    def from_frame(cls, data, **kwargs):
+        """
+        Construit l'index à partir d'un DataFrame au format historique (colonne 'embeddings' d'un vecteur par ligne).
+        """
+        embeddings = normalize_rows(np.vstack(data['embeddings'].values))
+        return cls(data.drop(columns=['embeddings']), embeddings, **kwargs)
+
+    def __len__(self):
+        return len(self.metadata)
+
+    @property
+    def asset_types(self):
+        return list(self._partitions)
+
+    def _resolve_types(self, asset_type):
+        if asset_type is None:
+            return list(self._partitions)
+        asset_type = ASSET_TYPE_ALIASES.get(asset_type, asset_type)
+        return [asset_type] if asset_type in self._partitions else []
+
+    def _search_rows(self, query, k, asset_type, approximate):
+        """
+        Renvoie (lignes, scores) des k meilleurs actifs pour un vecteur de requête normalisé.
+        """
+        all_rows, all_scores = [], []
+        for t in self._resolve_types(asset_type):
+            rows, matrix = self._partitions[t]
+            if approximate and t in self._ivf:
+                # Lignes candidates triées pour une lecture séquentielle de la matrice mappée
+                local = np.sort(self._ivf[t].candidates(query, self.n_probe))
+                scores = _score(matrix[local], query)
+            else:
+                local = None
+                scores = _score(matrix, query)
+            best = _top_k_indices(scores, k)
+            picked = best if local is None else local[best]
+            all_rows.append(rows[picked])
+            all_scores.append(scores[best])
+
+        if not all_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows = np.concatenate(all_rows)
+        scores = np.concatenate(all_scores)
+        best = _top_k_indices(scores, k)
+        return rows[best], scores[best]
+
+    def search_vector(self, query_embedding, k=10, asset_type=None, approximate=None):
+        """
+        Retourne les k actifs les plus proches d'un embedding de requête.
+
+        Paramètres:
+            query_embedding (np.ndarray): Embedding de la requête (normalisé ou non).
+            k (int): Nombre de résultats.
+            asset_type (str): Filtre sur le type d'actif (libellés de l'interface acceptés), None pour tous.
+            approximate (bool): Force le mode exact ou approximatif ; par défaut celui de l'index.
+
+        Returns:
+            pd.DataFrame: Les k actifs, avec une colonne 'similarity', triés par similarité décroissante.
+        """
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        if approximate is None:
+            approximate = self.approximate
+        with span('search.scan'):
+            rows, scores = self._search_rows(query, k, asset_type, approximate)
+        result = self.metadata.iloc[rows].copy()
+        result['similarity'] = scores
+        return result
+
+    def search(self, query_text, model, k=10, asset_type=None):
+        """
+        Retourne les k actifs les plus pertinents pour un texte de requête.
+
+        Les correspondances lexicales (ticker exact, préfixe de ticker, préfixe de nom) sont classées en tête.
+        Si elles suffisent à remplir les k résultats, le modèle n'est pas appelé ; sinon l'embedding de la
+        requête (mis en cache) complète la liste avec les plus proches voisins sémantiques.
+
+        Returns:
+            pd.DataFrame: Les k actifs, avec les colonnes 'similarity' et 'match'.
+        """
+        SEARCH_STATS["searches"] += 1
+        allowed_types = self._resolve_types(asset_type)
+        lexical_hits = self.lexical.lookup(query_text, k=k, allowed_types=allowed_types)
+        rows = [row for row, _ in lexical_hits]
+        matches = [match for _, match in lexical_hits]
+        scores = [1.0] * len(rows)
+
+        if len(rows) < k and allowed_types:
+            query = normalize_rows(encode_query(model, query_text).reshape(1, -1))[0]
+            with span('search.scan'):
+                semantic_rows, semantic_scores = self._search_rows(query, k + len(rows), asset_type, self.approximate)
+            seen = set(rows)
+            for row, score in zip(semantic_rows.tolist(), semantic_scores.tolist()):
+                if len(rows) == k:
+                    break
+                if row not in seen:
+                    rows.append(row)
+                    matches.append("semantic")
+                    scores.append(score)
+        elif len(rows) == k:
+            SEARCH_STATS["lexical_only"] += 1
+
+        result = self.metadata.iloc[rows].copy()
+        result['similarity'] = np.asarray(scores, dtype=np.float32)
+        result['match'] = matches
+        return result
+
+    def evaluate_recall(self, query_embeddings, k=10, asset_type=None):
+        """
+        Compare le mode approximatif au mode exact sur un jeu de requêtes.
+
+        Paramètres:
+            query_embeddings (np.ndarray): Matrice (n_requêtes, dim).
+            k (int): Nombre de résultats par requête.
+            asset_type (str): Filtre sur le type d'actif.
+
+        Returns:
+            dict: Rappel moyen à k et latences médiane / p95 (en ms) des deux modes.
+        """
+        queries = normalize_rows(query_embeddings)
+        recalls, exact_ms, approx_ms = [], [], []
+        for query in queries:
+            t0 = time.perf_counter()
+            exact_rows, _ = self._search_rows(query, k, asset_type, approximate=False)
+            t1 = time.perf_counter()
+            approx_rows, _ = self._search_rows(query, k, asset_type, approximate=True)
+            t2 = time.perf_counter()
+            exact_ms.append((t1 - t0) * 1000)
+            approx_ms.append((t2 - t1) * 1000)
+            if len(exact_rows):
+                recalls.append(len(np.intersect1d(exact_rows, approx_rows)) / len(exact_rows))
+        return {
+            f"recall@{k}": float(np.mean(recalls)) if recalls else float('nan'),
+            "exact_p50_ms": float(np.percentile(exact_ms, 50)),
+            "exact_p95_ms": float(np.percentile(exact_ms, 95)),
+            "approx_p50_ms": float(np.percentile(approx_ms, 50)),
+            "approx_p95_ms": float(np.percentile(approx_ms, 95)),
+        }
+
+
+@timed('get_top10_assets')
+def get_top10_assets(query_text: str, data, model, asset_type=None):
     """
     Retourne les 10 actifs dont le nom est le plus proche du texte de requête.
 
     Parameters:
         query_text (str): Le texte de la requête.
-        data (pd.DataFrame): DataFrame contenant les actifs et leurs embeddings (dans la colonne 'embeddings').
+        data (AssetIndex | pd.DataFrame): Index de recherche, ou DataFrame contenant les actifs
+            et leurs embeddings (dans la colonne 'embeddings'), auquel cas l'index est construit à la volée.
         model (SentenceTransformer): Modèle SentenceTransformer pour encoder la requête.
+        asset_type (str): Type d'actif à retenir (FOREX, FUTURES, OPTIONS, STOCK, ETF), None pour tous.
 
     Returns:
         pd.DataFrame: Les 10 actifs les plus proches.
     """
-    # Calcul de l'embedding pour le texte de la requête
-    query_embedding = model.encode(query_text)
-
-    # Calcul de la similarité cosinus entre l'embedding de la requête et chaque embedding de l'actif
-    # On transforme la colonne 'embeddings' en tableau numpy pour un calcul vectorisé
-    asset_embeddings = np.vstack(data['embeddings'].values)
-    similarities = cosine_similarity(asset_embeddings, [query_embedding]).squeeze()
-
-    # Ajout des scores de similarité au DataFrame
-    data = data.copy()  # pour ne pas modifier l'original
-    data['similarity'] = similarities
-
-    # Tri par similarité décroissante et sélection des 10 meilleurs
-    top10 = data.sort_values(by='similarity', ascending=False).head(10)
-    return top10
\ No newline at end of file
+    index = data if isinstance(data, AssetIndex) else AssetIndex.from_frame(data)
+    return index.search(query_text, model, k=10, asset_type=asset_type)
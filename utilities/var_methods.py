@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+from utilities.return_panel import ReturnPanel
+
+DEFAULT_CONFIDENCE_LEVELS = (0.99, 0.975, 0.95)
+
+# Nombre maximal d'éléments copiés à la fois lors du calcul glissant (borne la mémoire de travail)
+_ROLLING_CHUNK_ELEMENTS = 1 << 23
+
+
+def tail_sizes(n_obs, confidence_levels):
+    """
+    Nombre d'observations dans la queue de distribution pour chaque niveau de confiance :
+    k = ceil(n · (1 - α)), au moins 1. La VaR est la k-ième plus petite valeur, l'ES la moyenne des k plus petites.
+
+    Paramètres:
+        n_obs (int | np.ndarray): Nombre d'observations (éventuellement par actif).
+        confidence_levels (tuple): Niveaux de confiance α (ex: 0.99).
+
+    Retour:
+        np.ndarray: Tailles de queue, de forme (n_niveaux, *n_obs.shape).
+    """
+    alphas = np.asarray(confidence_levels, dtype=float).reshape((-1,) + (1,) * np.ndim(n_obs))
+    # Le epsilon évite qu'une erreur d'arrondi (252 · 0.05 = 12.600000000000001) ajoute une observation
+    k = np.ceil(np.asarray(n_obs) * (1 - alphas) - 1e-9).astype(np.int64)
+    return np.clip(k, 1, None)
+
+
+def aggregate_horizon(returns, horizon):
+    """
+    Rendements sur horizon jours, glissants (chevauchants), obtenus en sommant les rendements quotidiens
+    le long du dernier axe. L'agrégation est exacte pour des rendements logarithmiques.
+
+    Paramètres:
+        returns (np.ndarray): Rendements quotidiens, le temps sur le dernier axe.
+        horizon (int): Horizon en jours.
+
+    Retour:
+        np.ndarray: Rendements agrégés, de longueur n_obs - horizon + 1 sur le dernier axe.
+    """
+    if horizon == 1:
+        return returns
+    missing = np.isnan(returns)
+    zeros = np.zeros(returns.shape[:-1] + (1,), dtype=returns.dtype)
+    cumsum = np.concatenate([zeros, np.cumsum(np.where(missing, 0, returns), axis=-1)], axis=-1)
+    aggregated = cumsum[..., horizon:] - cumsum[..., :-horizon]
+    if missing.any():
+        # Une période contenant une donnée manquante est elle-même manquante
+        gaps = np.concatenate([zeros.astype(np.int64), np.cumsum(missing, axis=-1)], axis=-1)
+        aggregated[(gaps[..., horizon:] - gaps[..., :-horizon]) > 0] = np.nan
+    return aggregated
+
+
+def _var_es_from_tail(tail, n_obs, confidence_levels):
+    """
+    VaR et ES à partir des k_max plus petites valeurs triées (dernier axe de tail)
+    et du nombre d'observations valides de chaque échantillon.
+    """
+    k = tail_sizes(n_obs, confidence_levels)
+    index = np.minimum(k, tail.shape[-1]) - 1
+
+    var = np.empty(k.shape, dtype=tail.dtype)
+    es = np.empty(k.shape, dtype=tail.dtype)
+    tail_cumsum = None
+    for i in range(len(k)):
+        if np.all(index[i] == index[i].flat[0]):
+            # Cas courant sans donnée manquante : même taille de queue partout, simple découpage
+            j = int(index[i].flat[0])
+            var[i] = -tail[..., j]
+            es[i] = -tail[..., :j + 1].sum(axis=-1) / (j + 1)
+            continue
+        if tail_cumsum is None:
+            tail_cumsum = np.cumsum(tail, axis=-1)
+        idx = index[i][..., None]
+        var[i] = -np.take_along_axis(tail, idx, axis=-1)[..., 0]
+        es[i] = -np.take_along_axis(tail_cumsum, idx, axis=-1)[..., 0] / k[i]
+
+    empty = np.broadcast_to(n_obs == 0, k.shape[1:])
+    var[:, empty] = np.nan
+    es[:, empty] = np.nan
+    return var, es
+
+
+def _tail_var_es(samples, confidence_levels):
+    """
+    VaR et ES historiques le long du dernier axe de samples.
+
+    Seule la queue est ordonnée : np.partition isole les k_max plus petites valeurs en O(n),
+    puis ces k_max valeurs (5 % des observations à 95 %) sont triées.
+    Les NaN (données manquantes) sont exclus du nombre d'observations de chaque ligne.
+    """
+    missing = np.isnan(samples)
+    n_obs = samples.shape[-1] - missing.sum(axis=-1)
+    if missing.any():
+        samples = np.where(missing, np.inf, samples)
+
+    k_max = min(int(tail_sizes(samples.shape[-1], confidence_levels).max()), samples.shape[-1])
+    tail = np.partition(samples, k_max - 1, axis=-1)[..., :k_max]
+    tail.sort(axis=-1)
+    return _var_es_from_tail(tail, n_obs, confidence_levels)
+
+
+def _running_tails(blocks, k, reverse=False):
+    """
+    Pour chaque position j d'un bloc, les k plus petites valeurs triées de block[:j+1]
+    (ou de block[j:] si reverse). Chaque nouvelle valeur est insérée dans la liste triée par
+    une cascade min / max vectorisée sur tous les actifs et tous les blocs à la fois.
+
+    Paramètres:
+        blocks (np.ndarray): Forme (n_lignes, n_blocs, taille_bloc).
+
+    Retour:
+        np.ndarray: Forme (k, n_lignes, n_blocs · taille_bloc), le temps dans l'ordre.
+    """
+    rows, n_blocks, size = blocks.shape
+    out = np.empty((size, k, rows, n_blocks), dtype=blocks.dtype)
+    tail = np.full((k, rows, n_blocks), np.inf, dtype=blocks.dtype)
+    for j in (range(size - 1, -1, -1) if reverse else range(size)):
+        carry = blocks[:, :, j]
+        for i in range(k):
+            low = np.minimum(tail[i], carry)
+            carry = np.maximum(tail[i], carry)
+            tail[i] = low
+        out[j] = tail
+    return out.transpose(1, 2, 3, 0).reshape(k, rows, -1)
+
+
+def _rolling_tail(samples, window, k):
+    """
+    k plus petites valeurs triées de chaque fenêtre glissante, par l'algorithme de van Herk / Gil-Werman :
+    le temps est découpé en blocs de la taille de la fenêtre ; toute fenêtre est l'union du suffixe d'un bloc
+    et du préfixe du bloc suivant. Les queues des préfixes et suffixes se calculent en une passe, puis
+    chaque fenêtre ne fusionne que 2·k candidats au lieu de sélectionner parmi window observations.
+
+    Paramètres:
+        samples (np.ndarray): Forme (n_lignes, n_obs), sans NaN (remplacés par +inf).
+
+    Retour:
+        np.ndarray: Forme (n_lignes, n_fenêtres, k).
+    """
+    rows, n_obs = samples.shape
+    n_blocks = -(-n_obs // window)
+    padded = np.full((rows, n_blocks * window), np.inf, dtype=samples.dtype)
+    padded[:, :n_obs] = samples
+    blocks = padded.reshape(rows, n_blocks, window)
+
+    n_windows = n_obs - window + 1
+    suffix = _running_tails(blocks, k, reverse=True)[:, :, :n_windows]
+    prefix = _running_tails(blocks, k)[:, :, window - 1:window - 1 + n_windows]
+    # Une fenêtre alignée sur un bloc est entièrement couverte par le suffixe
+    aligned = (np.arange(n_windows) % window) == 0
+    # Fusion bitonique : min(a_i, b_{k-1-i}) contient exactement les k plus petites valeurs de a ∪ b
+    tail = np.minimum(suffix, np.where(aligned, np.inf, prefix[::-1]))
+    tail = np.moveaxis(tail, 0, -1)
+    tail.sort(axis=-1)
+    return tail
+
+
+def _rolling_var_es(returns, window, confidence_levels):
+    """
+    VaR et ES sur fenêtres glissantes, traitées par paquets d'actifs pour borner la mémoire de travail.
+    """
+    batch_shape = returns.shape[:-1]
+    samples = returns.reshape(-1, returns.shape[-1])
+    missing = np.isnan(samples)
+    if missing.any():
+        samples = np.where(missing, np.inf, samples)
+    # Nombre d'observations valides de chaque fenêtre, par somme cumulée
+    valid = np.concatenate([np.zeros((len(samples), 1), dtype=np.int64), np.cumsum(~missing, axis=-1)], axis=-1)
+    n_obs = valid[:, window:] - valid[:, :-window]
+
+    k_max = min(int(tail_sizes(window, confidence_levels).max()), window)
+    n_windows = samples.shape[-1] - window + 1
+    rows_per_chunk = max(1, _ROLLING_CHUNK_ELEMENTS // (2 * k_max * (samples.shape[-1] + window)))
+
+    var = np.empty((len(confidence_levels), len(samples), n_windows), dtype=samples.dtype)
+    es = np.empty_like(var)
+    for start in range(0, len(samples), rows_per_chunk):
+        stop = start + rows_per_chunk
+        tail = _rolling_tail(samples[start:stop], window, k_max)
+        var[:, start:stop], es[:, start:stop] = _var_es_from_tail(tail, n_obs[start:stop], confidence_levels)
+    shape = (len(confidence_levels),) + batch_shape + (n_windows,)
+    return var.reshape(shape), es.reshape(shape)
+
+
+def historical_var_es(returns, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, horizons=(1,), window=None):
+    """
+    VaR et Expected Shortfall par simulation historique, pour plusieurs niveaux de confiance et horizons en un appel.
+
+    Paramètres:
+        returns (array-like): Rendements (de préférence 'log_return' de compute_returns). Une série 1-D,
+            une matrice (n_actifs, n_obs), un DataFrame dates x actifs (comme le panel de tickers_bulk),
+            ou un ReturnPanel (ses rendements logarithmiques sont lus sans copie).
+        confidence_levels (tuple): Niveaux de confiance α.
+        horizons (tuple): Horizons en jours ; les rendements sont agrégés sur des périodes glissantes.
+        window (int): Taille de la fenêtre glissante en observations ; None pour tout l'historique.
+
+    Retour:
+        dict: 'var' et 'es' (pertes positives) de forme (n_horizons, n_niveaux, [n_actifs], [n_fenêtres]),
+              la n-ième fenêtre se terminant à l'observation window + max(horizons) - 2 + n,
+              ainsi que 'confidence_levels', 'horizons' et 'assets' (noms des colonnes d'un DataFrame).
+    """
+    assets = None
+    if isinstance(returns, ReturnPanel):
+        assets = list(returns.tickers)
+        returns = returns.log_returns.T
+    elif isinstance(returns, pd.DataFrame):
+        assets = list(returns.columns)
+        returns = returns.to_numpy().T
+    elif isinstance(returns, pd.Series):
+        returns = returns.to_numpy()
+    returns = np.asarray(returns)
+    if not np.issubdtype(returns.dtype, np.floating):
+        returns = returns.astype(np.float64)
+
+    var, es = [], []
+    for horizon in horizons:
+        aggregated = aggregate_horizon(returns, horizon)
+        if window is None:
+            v, e = _tail_var_es(aggregated, confidence_levels)
+        else:
+            if aggregated.shape[-1] < window:
+                raise ValueError(f"Pas assez d'observations ({aggregated.shape[-1]}) pour une fenêtre de {window} à l'horizon {horizon}.")
+            # Les fenêtres de tous les horizons sont alignées sur la même date de fin
+            skip = max(horizons) - horizon
+            v, e = _rolling_var_es(aggregated[..., skip:], window, confidence_levels)
+        var.append(v)
+        es.append(e)
+
+    return {
+        'var': np.stack(var),
+        'es': np.stack(es),
+        'confidence_levels': tuple(confidence_levels),
+        'horizons': tuple(horizons),
+        'assets': assets,
+    }
+
+
+def var_es_table(result):
+    """
+    Met en forme le résultat (non glissant) de historical_var_es dans un DataFrame lisible.
+
+    Paramètres:
+        result (dict): Résultat de historical_var_es calculé avec window=None.
+
+    Retour:
+        pd.DataFrame: Index (horizon, niveau de confiance), colonnes (mesure, actif).
+    """
+    var, es = result['var'], result['es']
+    if var.ndim == 2:
+        var, es = var[..., None], es[..., None]
+    assets = result['assets'] or list(range(var.shape[-1]))
+    index = pd.MultiIndex.from_product([result['horizons'], result['confidence_levels']], names=['horizon', 'confidence'])
+    frames = {
+        'VaR': pd.DataFrame(var.reshape(len(index), -1), index=index, columns=assets),
+        'ES': pd.DataFrame(es.reshape(len(index), -1), index=index, columns=assets),
+    }
+    return pd.concat(frames, axis=1)
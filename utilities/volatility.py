@@ -0,0 +1,447 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.special import expit, logit
+from utilities.base_tools import align_returns, position_values
+from utilities.return_panel import ReturnPanel
+from utilities.var_methods import DEFAULT_CONFIDENCE_LEVELS, historical_var_es
+
+# Persistance maximale α + β + γ/2 : garantit une variance stationnaire (ω > 0 avec le ciblage de variance)
+MAX_PERSISTENCE = 0.9999
+
+# Paramètres de départ d'un actif sans ajustement précédent (valeurs typiques sur actions, en quotidien)
+_START = {'alpha': 0.08, 'beta': 0.90, 'gamma': 0.0}
+_START_GJR = {'alpha': 0.03, 'beta': 0.90, 'gamma': 0.10}
+
+_EPS = 1e-9
+
+
+def _logit(p):
+    return logit(np.clip(p, _EPS, 1 - _EPS))
+
+
+def _to_natural(u, gjr):
+    """
+    Paramètres non contraints -> (α, β, γ) et jacobien d(α, β, γ)/du de forme (3, n_u, n_actifs).
+
+    La persistance π = MAX_PERSISTENCE · σ(u0) est répartie entre α, β (et γ/2 pour GJR) par une
+    sigmoïde (GARCH) ou un softmax (GJR) : toute valeur de u respecte α, β, γ >= 0 et π < 1.
+    """
+    s0 = expit(u[0])
+    persistence = MAX_PERSISTENCE * s0
+    d_persistence = persistence * (1 - s0)
+    jac = np.zeros((3, len(u), u.shape[1]))
+    if not gjr:
+        s = expit(u[1])
+        alpha, beta, gamma = persistence * s, persistence * (1 - s), np.zeros_like(s)
+        jac[0, 0], jac[1, 0] = s * d_persistence, (1 - s) * d_persistence
+        jac[0, 1] = persistence * s * (1 - s)
+        jac[1, 1] = -jac[0, 1]
+        return alpha, beta, gamma, jac
+
+    # Softmax sur (u1, u2, 0) : parts de α, γ/2 et β dans la persistance
+    logits = np.stack([u[1], u[2], np.zeros_like(u[1])])
+    w = np.exp(logits - logits.max(axis=0))
+    w /= w.sum(axis=0)
+    alpha, gamma, beta = persistence * w[0], 2 * persistence * w[1], persistence * w[2]
+    scale = np.array([1.0, 2.0, 1.0])[:, None]
+    for row, i in ((0, 0), (2, 1), (1, 2)):
+        jac[row, 0] = scale[i] * w[i] * d_persistence
+        for j in (1, 2):
+            jac[row, j] = scale[i] * persistence * w[i] * ((i == j - 1) - w[j - 1])
+    return alpha, beta, gamma, jac
+
+
+def _to_unconstrained(alpha, beta, gamma, gjr):
+    persistence = np.clip(alpha + beta + gamma / 2, _EPS, MAX_PERSISTENCE * (1 - 1e-6))
+    u0 = _logit(persistence / MAX_PERSISTENCE)
+    if not gjr:
+        return np.stack([u0, _logit(alpha / (alpha + beta + _EPS))])
+    w = np.maximum(np.stack([alpha, gamma / 2, beta]) / persistence, _EPS)
+    return np.stack([u0, np.log(w[0] / w[2]), np.log(w[1] / w[2])])
+
+
+def _linear_recurrence(c, beta, y0):
+    """
+    y_0 = y0, y_t = β·y_{t-1} + c_t pour t = 1..n, sur toutes les colonnes à la fois (β propre à chaque colonne).
+
+    Le temps est découpé en blocs de √n dates : la récurrence est d'abord résolue à l'intérieur de chaque
+    bloc en partant de zéro (tous les blocs en parallèle), puis la valeur de départ de chaque bloc est
+    propagée (y_{b·L+i} += β^(i+1)·y_{b·L}). Environ 2·√n itérations Python au lieu de n, et seules des
+    puissances positives de β interviennent : le calcul reste stable.
+
+    Paramètres:
+        c (np.ndarray): Termes c_1..c_n, de forme (n, n_colonnes).
+        beta (np.ndarray): Coefficient de chaque colonne.
+        y0 (np.ndarray | float): Valeur initiale.
+
+    Retour:
+        np.ndarray: y_0..y_n, de forme (n + 1, n_colonnes).
+    """
+    n, m = c.shape
+    block = max(1, int(np.sqrt(n)))
+    n_blocks = -(-n // block)
+    padded = np.zeros((n_blocks * block, m))
+    padded[:n] = c
+    local = padded.reshape(n_blocks, block, m)
+    for i in range(1, block):
+        local[:, i] += beta * local[:, i - 1]
+    powers = beta ** np.arange(1, block + 1)[:, None]
+    start = np.empty((n_blocks, m))
+    carry = np.broadcast_to(y0, (m,)).astype(float)
+    for b in range(n_blocks):
+        start[b] = carry
+        carry = local[b, -1] + powers[-1] * carry
+    local += powers * start[:, None]
+    y = np.empty((n + 1, m))
+    y[0] = y0
+    y[1:] = padded[:n]
+    return y
+
+
+def _garch_likelihood(eps2, negative, valid, target, alpha, beta, gamma, gradient=False):
+    """
+    Log-vraisemblance gaussienne négative (moyenne par observation) de chaque actif, pour la récursion
+    σ²_t = ω + (α + γ·1{ε_{t-1} < 0})·ε²_{t-1} + β·σ²_{t-1}, avec ω = σ̄²·(1 - α - β - γ/2) et σ²_0 = σ̄².
+
+    Une observation manquante est remplacée par son espérance (ε² = σ̄², 1{ε < 0} = 1/2) dans la récursion
+    et n'entre pas dans la vraisemblance. Les dérivées de σ²_t par rapport à (α, β, γ) suivent des
+    récurrences linéaires de même coefficient β, résolues ensemble par _linear_recurrence.
+
+    Paramètres:
+        eps2, negative, valid (np.ndarray): ε², 1{ε < 0} et masque des observations, de forme (n_obs, n_actifs).
+        target (np.ndarray): Variance ciblée σ̄² de chaque actif.
+        gradient (bool): Calcule aussi le gradient et la matrice BHHH (somme des produits des scores).
+
+    Retour:
+        dict: 'nll' (n_actifs,), 'variance' (n_obs + 1, n_actifs), la dernière ligne étant la variance
+              prévue du jour suivant, et si gradient : 'grad' (3, n_actifs) et 'bhhh' (n_actifs, 3, 3).
+    """
+    n_obs, n = eps2.shape
+    weight = 0.5 / np.maximum(valid.sum(axis=0), 1)
+    omega = target * (1 - alpha - beta - gamma / 2)
+    variance = _linear_recurrence(omega + (alpha + gamma * negative) * eps2, beta, target)
+    h = variance[:-1]
+    result = {'nll': weight * np.where(valid, np.log(h) + eps2 / h, 0.0).sum(axis=0), 'variance': variance}
+    if gradient:
+        drivers = np.concatenate([eps2 - target, h - target, negative * eps2 - target / 2], axis=1)
+        dh = _linear_recurrence(drivers, np.tile(beta, 3), 0.0)[:-1].reshape(n_obs, 3, n)
+        dl = np.where(valid, (h - eps2) / (h * h), 0.0)
+        scores = dl[:, None] * dh
+        result['grad'] = weight * scores.sum(axis=0)
+        result['bhhh'] = (weight * 0.5)[:, None, None] * np.einsum('tjn,tkn->njk', scores, scores)
+    return result
+
+
+def _as_matrix(returns):
+    """
+    Rendements (dates x actifs) en tableau (n_obs, n_actifs), avec les noms des actifs et les dates.
+    Accepte les mêmes entrées que historical_var_es.
+    """
+    if isinstance(returns, ReturnPanel):
+        return returns.log_returns.astype(np.float64), list(returns.tickers), pd.DatetimeIndex(returns.dates)
+    if isinstance(returns, pd.DataFrame):
+        return returns.to_numpy(dtype=np.float64), list(returns.columns), returns.index
+    if isinstance(returns, pd.Series):
+        return returns.to_numpy(dtype=np.float64)[:, None], [returns.name], returns.index
+    values = np.asarray(returns, dtype=np.float64)
+    if values.ndim == 1:
+        return values[:, None], [0], None
+    # Tableau (n_actifs, n_obs), comme pour historical_var_es
+    return values.T, list(range(len(values))), None
+
+
+class GarchFit:
+    """
+    Modèles GARCH(1,1) ou GJR-GARCH(1,1) gaussiens ajustés sur un ensemble d'actifs, avec ciblage de
+    variance : ω = σ̄²·(1 - α - β - γ/2), où σ̄² est la variance empirique, de sorte que seuls α, β
+    (et γ) sont estimés. Conserve les résidus standardisés z_t = ε_t / σ_t utilisés par la simulation
+    historique filtrée, et la variance prévue pour le jour suivant.
+    """
+
+    def __init__(self, tickers, mean, target, alpha, beta, gamma, gjr=False, residuals=None, variance=None,
+                 forecast=None, nll=None, last_date=None, converged=None, n_iter=0):
+        """
+        Paramètres:
+            tickers (list): Actifs, dans l'ordre des tableaux.
+            mean (np.ndarray): Rendement moyen μ de chaque actif (ε_t = r_t - μ).
+            target (np.ndarray): Variance ciblée σ̄².
+            alpha, beta, gamma (np.ndarray): Paramètres de la récursion (gamma nul pour GARCH).
+            gjr (bool): Modèle GJR (effet de levier γ).
+            residuals (np.ndarray): Résidus standardisés (n_obs, n_actifs), NaN si l'observation manque.
+            variance (np.ndarray): Variances conditionnelles σ²_t (n_obs, n_actifs).
+            forecast (np.ndarray): Variance prévue pour le jour suivant la dernière observation.
+            nll (np.ndarray): Log-vraisemblance négative moyenne par actif.
+            last_date (pd.Timestamp): Date de la dernière observation.
+            converged (np.ndarray): Convergence de l'ajustement de chaque actif.
+            n_iter (int): Nombre d'itérations de l'optimiseur.
+        """
+        self.tickers = list(tickers)
+        self.mean = np.asarray(mean, dtype=float)
+        self.target = np.asarray(target, dtype=float)
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+        self.gamma = np.asarray(gamma, dtype=float)
+        self.gjr = gjr
+        self.residuals = residuals
+        self.variance = variance
+        self.forecast = forecast
+        self.nll = nll
+        self.last_date = pd.Timestamp(last_date) if last_date is not None else None
+        self.converged = converged
+        self.n_iter = n_iter
+
+    @property
+    def omega(self):
+        return self.target * (1 - self.alpha - self.beta - self.gamma / 2)
+
+    @property
+    def persistence(self):
+        return self.alpha + self.beta + self.gamma / 2
+
+    def params(self):
+        """
+        Retour:
+            pd.DataFrame: ω, α, β, γ, persistance, volatilité annualisée de long terme et prévue, par actif.
+        """
+        return pd.DataFrame({
+            'omega': self.omega, 'alpha': self.alpha, 'beta': self.beta, 'gamma': self.gamma,
+            'persistence': self.persistence,
+            'long_run_vol': np.sqrt(252 * self.target),
+            'forecast_vol': np.sqrt(252 * self.forecast) if self.forecast is not None else np.nan,
+            'nll': self.nll if self.nll is not None else np.nan,
+            'converged': self.converged if self.converged is not None else np.nan,
+        }, index=self.tickers)
+
+    def save(self, path):
+        """
+        Sauvegarde les paramètres (sans les résidus) pour démarrer l'ajustement du lendemain.
+        """
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, tickers=np.array(self.tickers, dtype=str), mean=self.mean, target=self.target,
+                 alpha=self.alpha, beta=self.beta, gamma=self.gamma, gjr=self.gjr,
+                 last_date=str(self.last_date) if self.last_date is not None else '')
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        # Les tableaux sont lus (copiés en mémoire) avant la fermeture du fichier
+        with np.load(path) as state:
+            last_date = str(state['last_date'])
+            return cls(state['tickers'].tolist(), state['mean'], state['target'], state['alpha'], state['beta'],
+                       state['gamma'], bool(state['gjr']), last_date=last_date or None)
+
+
+def _fit_bhhh(eps2, negative, valid, target, u, gjr, max_iter, tol):
+    """
+    Minimise la log-vraisemblance négative de chaque actif par des pas de Newton dont la hessienne est
+    approchée par la matrice BHHH (produits des scores, toujours définie positive), avec recherche
+    linéaire d'Armijo. Tous les actifs avancent ensemble : chaque itération ne coûte qu'une évaluation
+    vectorisée, les systèmes 3 x 3 sont résolus en un seul appel, et les actifs convergés sortent du lot.
+
+    Retour:
+        tuple: (u optimal, convergence par actif, nombre d'itérations).
+    """
+    n = u.shape[1]
+    u = u.copy()
+    converged = np.zeros(n, dtype=bool)
+    active = np.arange(n)
+
+    def evaluate(cols, params, gradient):
+        a, b, g, jac = _to_natural(params, gjr)
+        result = _garch_likelihood(eps2[:, cols], negative[:, cols], valid[:, cols], target[cols], a, b, g, gradient)
+        if not gradient:
+            return result['nll']
+        # Dérivation en chaîne vers les paramètres non contraints : g_u = Jᵀ·g, H_u ≈ Jᵀ·BHHH·J
+        grad = np.einsum('kn,kjn->jn', result['grad'], jac)
+        hess = np.einsum('kjn,nkl,lin->nji', jac, result['bhhh'], jac)
+        return result['nll'], grad, hess
+
+    n_iter = 0
+    while len(active) and n_iter < max_iter:
+        n_iter += 1
+        f, grad, hess = evaluate(active, u[:, active], True)
+        small = np.abs(grad).max(axis=0) < tol
+        converged[active[small]] = True
+        active, f, grad, hess = active[~small], f[~small], grad[:, ~small], hess[~small]
+        if not len(active):
+            break
+
+        diagonal = np.einsum('nii->ni', hess)
+        hess += (1e-8 * diagonal.max(axis=1) + 1e-12)[:, None, None] * np.eye(len(u))
+        step = -np.linalg.solve(hess, grad.T[..., None])[..., 0].T
+        slope = (grad * step).sum(axis=0)
+
+        start = u[:, active]
+        f_new = f.copy()
+        t = np.ones(len(active))
+        pending = np.arange(len(active))
+        for _ in range(20):
+            candidate = start[:, pending] + t[pending] * step[:, pending]
+            value = evaluate(active[pending], candidate, False)
+            ok = np.isfinite(value) & (value <= f[pending] + 1e-4 * t[pending] * slope[pending])
+            u[:, active[pending[ok]]] = candidate[:, ok]
+            f_new[pending[ok]] = value[ok]
+            pending = pending[~ok]
+            if not len(pending):
+                break
+            t[pending] *= 0.5
+
+        # Plus de progrès possible à la précision machine : l'actif est à son optimum numérique
+        stalled = (f - f_new) <= 1e-12 * (1 + np.abs(f))
+        converged[active[stalled]] = True
+        active = active[~stalled]
+    return u, converged, n_iter
+
+
+def fit_garch(returns, gjr=False, warm_start=None, max_iter=100, tol=1e-6):
+    """
+    Ajuste un GARCH(1,1) (ou GJR-GARCH(1,1)) par maximum de vraisemblance sur chaque actif, tous les
+    actifs à la fois : la récursion, la vraisemblance et son gradient analytique sont vectorisés sur les
+    actifs, et chaque actif suit ses propres pas de Newton-BHHH dans une boucle commune, au lieu d'un
+    appel à l'optimiseur scipy par actif.
+
+    Paramètres:
+        returns (array-like): Rendements logarithmiques ('log_return' de compute_returns) : série, DataFrame
+            dates x actifs, tableau (n_actifs, n_obs) ou ReturnPanel. Les NaN sont des observations manquantes.
+        gjr (bool): Ajoute l'effet de levier γ·1{ε < 0}·ε².
+        warm_start (GarchFit): Ajustement précédent (ex: celui de la veille) ; les actifs communs partent
+            de ses paramètres, ce qui réduit fortement le nombre d'itérations.
+        max_iter (int): Nombre maximal d'itérations.
+        tol (float): Tolérance sur le gradient (paramètres non contraints, vraisemblance moyenne par observation).
+
+    Retour:
+        GarchFit: Paramètres, résidus standardisés, variances conditionnelles et variance prévue.
+    """
+    values, tickers, dates = _as_matrix(returns)
+    valid = np.isfinite(values)
+    if (valid.sum(axis=0) < 10).any():
+        raise ValueError("Au moins 10 observations par actif sont nécessaires pour ajuster un GARCH.")
+    mean = np.nanmean(values, axis=0)
+    eps = np.where(valid, values - mean, 0.0)
+    target = np.nanvar(values, axis=0)
+    target = np.where(target > 0, target, _EPS)
+    eps2 = np.where(valid, eps * eps, target)
+    negative = np.where(valid, eps < 0, 0.5)
+
+    start = _START_GJR if gjr else _START
+    alpha, beta, gamma = (np.full(len(tickers), start[k]) for k in ('alpha', 'beta', 'gamma'))
+    if warm_start is not None:
+        previous = {t: i for i, t in enumerate(warm_start.tickers)}
+        for col, ticker in enumerate(tickers):
+            if ticker in previous:
+                i = previous[ticker]
+                alpha[col], beta[col] = warm_start.alpha[i], warm_start.beta[i]
+                gamma[col] = warm_start.gamma[i] if gjr else 0.0
+                if gjr and not warm_start.gjr:
+                    gamma[col] = _START_GJR['gamma'] * alpha[col] / (alpha[col] + _START_GJR['alpha'])
+
+    u, converged, n_iter = _fit_bhhh(eps2, negative, valid, target, _to_unconstrained(alpha, beta, gamma, gjr),
+                                     gjr, max_iter, tol)
+    alpha, beta, gamma, _ = _to_natural(u, gjr)
+    final = _garch_likelihood(eps2, negative, valid, target, alpha, beta, gamma)
+    variance = final['variance']
+    residuals = np.where(valid, eps / np.sqrt(variance[:-1]), np.nan)
+    return GarchFit(tickers, mean, target, alpha, beta, gamma, gjr, residuals, variance[:-1], variance[-1],
+                    final['nll'], dates[-1] if dates is not None and len(dates) else None, converged, n_iter)
+
+
+def simulate_fhs_returns(fit, horizon, n_paths=10_000, seed=0):
+    """
+    Rendements logarithmiques cumulés sur horizon jours par simulation historique filtrée : les vecteurs
+    de résidus standardisés d'une même date sont tirés avec remise (la corrélation entre actifs est
+    conservée), puis remis à l'échelle par la volatilité GARCH, mise à jour à chaque pas.
+
+    Retour:
+        np.ndarray: Rendements cumulés de forme (n_actifs, n_paths).
+    """
+    complete = np.flatnonzero(np.isfinite(fit.residuals).all(axis=1))
+    if not len(complete):
+        raise ValueError("Aucune date où tous les actifs ont un résidu : impossible de tirer des vecteurs de résidus.")
+    rng = np.random.default_rng(seed)
+    omega = fit.omega
+    h = np.broadcast_to(fit.forecast, (n_paths, len(fit.tickers))).copy()
+    cumulative = np.zeros_like(h)
+    for _ in range(horizon):
+        z = fit.residuals[rng.choice(complete, n_paths)]
+        e = np.sqrt(h) * z
+        cumulative += fit.mean + e
+        h = omega + (fit.alpha + fit.gamma * (e < 0)) * e * e + fit.beta * h
+    return cumulative.T
+
+
+def fhs_var_es(fit, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, horizons=(1,), n_paths=10_000, seed=0):
+    """
+    VaR et ES par simulation historique filtrée (FHS) : les résidus standardisés historiques, remis à
+    l'échelle de la volatilité prévue, remplacent les rendements bruts de la VaR historique. À 1 jour,
+    les rendements μ + σ_{T+1}·z_t sont exacts (aucun tirage) ; au-delà, ils sont simulés.
+
+    Paramètres:
+        fit (GarchFit): Résultat de fit_garch.
+        confidence_levels (tuple): Niveaux de confiance α.
+        horizons (tuple): Horizons en jours.
+        n_paths (int): Nombre de chemins simulés pour les horizons > 1.
+        seed (int): Graine.
+
+    Retour:
+        dict: Même format que historical_var_es ('var' et 'es' de forme (n_horizons, n_niveaux, n_actifs)),
+              utilisable avec var_es_table.
+    """
+    var, es = [], []
+    for horizon in horizons:
+        if horizon == 1:
+            samples = fit.mean[:, None] + np.sqrt(fit.forecast)[:, None] * fit.residuals.T
+        else:
+            samples = simulate_fhs_returns(fit, horizon, n_paths, seed)
+        result = historical_var_es(samples, confidence_levels)
+        var.append(result['var'][0])
+        es.append(result['es'][0])
+    return {
+        'var': np.stack(var),
+        'es': np.stack(es),
+        'confidence_levels': tuple(confidence_levels),
+        'horizons': tuple(horizons),
+        'assets': fit.tickers,
+    }
+
+
+def portfolio_fhs_var(assets, confidence_levels=DEFAULT_CONFIDENCE_LEVELS, horizon=1, gjr=False,
+                      n_paths=10_000, seed=0, state_path=None):
+    """
+    VaR par simulation historique filtrée du portefeuille stocké dans st.session_state.assets.
+
+    Chaque actif a son GARCH ; le P&L d'un scénario est Σ v_i · (e^{r_i} - 1), avec les résidus de tous
+    les actifs tirés à la même date. Si state_path contient l'ajustement précédent, il sert de point de
+    départ (warm start) ; le nouvel ajustement y est ensuite sauvegardé.
+
+    Paramètres:
+        assets (ReturnPanel | dict): Le panel de st.session_state.assets.
+        confidence_levels (tuple): Niveaux de confiance α.
+        horizon (int): Horizon en jours.
+        gjr (bool): Modèle GJR-GARCH.
+        n_paths (int): Nombre de chemins simulés si horizon > 1.
+        seed (int): Graine.
+        state_path (str): Fichier .npz des paramètres persistés, None pour ne rien persister.
+
+    Retour:
+        dict: 'var' et 'es' (Series par niveau), 'portfolio_value' et 'fit' (GarchFit).
+    """
+    returns = align_returns(assets, column='log_return')
+    values = position_values(assets)[returns.columns].to_numpy()
+    warm_start = GarchFit.load(state_path) if state_path is not None and os.path.exists(state_path) else None
+    fit = fit_garch(returns, gjr=gjr, warm_start=warm_start)
+    if state_path is not None:
+        fit.save(state_path)
+
+    if horizon == 1:
+        scenarios = fit.mean + np.sqrt(fit.forecast) * fit.residuals
+    else:
+        scenarios = simulate_fhs_returns(fit, horizon, n_paths, seed).T
+    pnl = np.expm1(scenarios) @ values
+    result = historical_var_es(pnl, confidence_levels)
+    return {
+        'var': pd.Series(result['var'][0], index=list(confidence_levels)),
+        'es': pd.Series(result['es'][0], index=list(confidence_levels)),
+        'portfolio_value': float(values.sum()),
+        'fit': fit,
+    }
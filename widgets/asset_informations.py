@@ -1,105 +1,140 @@
 import streamlit as st
-import plotly.express as px
-from data.data_loader import tickerf, get_fundamental_info
-from utilities.graphs_plots import plot_return_distribution
+import pandas as pd
+from data.data_loader import tickerf, get_fundamental_info, data_version, get_option_chain, get_option_expirations
+from data.option_chains import parse_occ_symbols
 from utilities.base_tools import compute_returns
+from utilities.memo import ANALYTICS, RerunTimings
+from utilities.return_panel import ReturnPanel
+from utilities.var_methods import historical_var_es, var_es_table
 
-def show_stock_informations():
-    if 'resultats' in st.session_state:
-        st.divider()
-        st.write("### Liste des resultats les plus pertinents:")
-        st.dataframe(st.session_state['resultats'], width=1000)
-        
-        # Création d'une liste d'options pour le sélecteur
-        options = st.session_state['resultats'].apply(lambda row: f"{row['Ticker']} - {row['Name']}", axis=1).tolist()
-        st.selectbox("Sélectionnez l'actif qui vous intéresse :", options, key="selected_asset")
-        
-        # Affichage des informations historiques si le bouton est cliqué ou si déjà affiché
-        if st.button("Afficher les informations historiques") or st.session_state.get("display_history", False):
-            st.session_state.display_history = True
-            
-            # Extraction du ticker et du nom depuis la sélection (format "TICKER - Name")
-            ticker_selected = st.session_state.selected_asset.split(" - ")[0]
-            asset_name = st.session_state.selected_asset.split(" - ")[1] if " - " in st.session_state.selected_asset else ticker_selected
-            
-            st.markdown(f"## Informations fondamentales pour **{ticker_selected}**")
-            fundamental_info = get_fundamental_info(ticker_selected)
-            
-            # Affichage des informations fondamentales dans des expandeurs
-            for key, value in fundamental_info.items():
-                with st.expander(f"{key}", expanded=True):
-                    if key == "Capitalisation boursière":
-                        formatted_value = f"<span style='color:green'>{format(int(value), ',')} $</span>"
-                        st.markdown(formatted_value, unsafe_allow_html=True)
-                    else:
-                        st.write(value)
-            
-            st.divider()
-            hist_data = tickerf(ticker_selected)
-            if hist_data is not None:
-                st.markdown(f"## Historique du cours pour **{ticker_selected}**")
-                st.dataframe(hist_data)
-                
-                st.markdown("## Paramètres des graphiques")
-                # Formulaire global pour les deux graphiques
-                with st.form(key="all_graphs"):
-                    st.markdown("### Distribution des returns")
-                    days_dist = st.slider("Nombre de jours à prendre en compte (distribution)",
-                                          min_value=1, 
-                                          max_value=len(hist_data), 
-                                          value=min(252, len(hist_data)))
-                    return_type = st.radio("Type de returns", options=["simple", "log"], index=0, key="dist_return_type")
-                    nbins = st.number_input("Nombre de bins", min_value=10, max_value=1000, value=300, step=10, key="dist_nbins")
-                    
-                    st.markdown("### Evolution du cours")
-                    days_evol = st.slider("Nombre de jours d'évolution à afficher",
-                                          min_value=1, 
-                                          max_value=len(hist_data), 
-                                          value=min(252, len(hist_data)))
-                    moving_averages = st.multiselect("Sélectionnez les moyennes mobiles à afficher", 
-                                                     options=["MA20", "MA50", "MA100"],
-                                                     default=["MA20"])
-                    
-                    submit_all = st.form_submit_button("Mettre à jour les graphiques")
-                    
-                    if submit_all:
-                        # Graphique 1 : Distribution des returns
-                        filtered_data = hist_data.tail(days_dist)
-                        returns = compute_returns(filtered_data)
-                        fig1 = plot_return_distribution(returns, nbins=nbins, return_type=return_type)
-                        st.plotly_chart(fig1, use_container_width=True)
-                        
-                        st.divider()
-                        # Graphique 2 : Evolution du cours
-                        evolution_data = hist_data.tail(days_evol).copy()
-                        x_axis = evolution_data['Date'] if 'Date' in evolution_data.columns else evolution_data.index
-                        fig2 = px.line(evolution_data, x=x_axis, y='Close', 
-                                       title=f"Evolution du cours sur les {days_evol} derniers jours")
-                        # Ajout des moyennes mobiles sélectionnées
-                        if "MA20" in moving_averages:
-                            evolution_data["MA20"] = evolution_data["Close"].rolling(window=20).mean()
-                            fig2.add_scatter(x=x_axis, y=evolution_data["MA20"], mode="lines", name="MA20")
-                        if "MA50" in moving_averages:
-                            evolution_data["MA50"] = evolution_data["Close"].rolling(window=50).mean()
-                            fig2.add_scatter(x=x_axis, y=evolution_data["MA50"], mode="lines", name="MA50")
-                        if "MA100" in moving_averages:
-                            evolution_data["MA100"] = evolution_data["Close"].rolling(window=100).mean()
-                            fig2.add_scatter(x=x_axis, y=evolution_data["MA100"], mode="lines", name="MA100")
-                        st.plotly_chart(fig2, use_container_width=True)
-                
-                # Bouton pour ajouter l'actif au portefeuille
-                if st.button("Ajouter cet actif au portefeuille", key="add_to_portfolio_button"):
-                    # Initialiser le dictionnaire assets dans session_state si inexistant
-                    if 'assets' not in st.session_state:
-                        st.session_state.assets = {}
-                    st.session_state.assets[ticker_selected] = {
-                        "nom": asset_name,
-                        "df": hist_data,
-                        "quantity": 0
-                    }
-                    st.success(f"L'actif {ticker_selected} a été ajouté au portefeuille")
-            else:
-                st.write(f"Aucune donnée trouvée pour le ticker : {ticker_selected}")
+
+@st.fragment
+def distribution_fragment(ticker, version, hist_data):
+    """
+    Distribution des returns et VaR historique : seul ce fragment est réexécuté quand ses paramètres changent.
+    Les résultats sont mémoïsés par (ticker, version des données, paramètres).
+    """
+    timings = RerunTimings("Distribution")
+    st.markdown("### Distribution des returns")
+    days_dist = st.slider("Nombre de jours à prendre en compte (distribution)",
+                          min_value=2,
+                          max_value=len(hist_data),
+                          value=min(252, len(hist_data)))
+    return_type = st.radio("Type de returns", options=["simple", "log"], index=0, key="dist_return_type")
+    nbins = st.number_input("Nombre de bins", min_value=10, max_value=1000, value=300, step=10, key="dist_nbins")
+
+    # Import différé : plotly et scipy ne sont chargés qu'à l'affichage des graphiques
+    from utilities.graphs_plots import plot_return_distribution
+
+    returns = ANALYTICS.get('returns', ticker, version, {'days': days_dist},
+                            lambda: compute_returns(hist_data.tail(days_dist)), timings)
+    fig1 = ANALYTICS.get('return_distribution', ticker, version,
+                         {'days': days_dist, 'return_type': return_type, 'nbins': nbins},
+                         lambda: plot_return_distribution(returns, nbins=nbins, return_type=return_type), timings)
+    st.plotly_chart(fig1, use_container_width=True)
+
+    method = st.radio("Méthode de VaR", options=["historique", "historique filtrée (GARCH)", "historique filtrée (GJR)"],
+                      index=0, key="var_method", horizontal=True)
+    if method == "historique":
+        column = 'simple_return' if return_type == 'simple' else 'log_return'
+        var_table = ANALYTICS.get('historical_var', ticker, version, {'days': days_dist, 'column': column},
+                                  lambda: var_es_table(historical_var_es(returns[column].dropna())), timings)
+        st.markdown("### VaR historique (pertes, en rendement)")
+        st.dataframe(var_table)
+    elif len(returns) < 100:
+        st.info("Au moins 100 rendements sont nécessaires pour ajuster un modèle GARCH : augmentez le nombre de jours.")
+    else:
+        # Import différé : scipy n'est chargé qu'au premier ajustement GARCH
+        from utilities.volatility import fhs_var_es, fit_garch
+
+        # Résidus standardisés du GARCH remis à l'échelle de la volatilité prévue pour demain
+        gjr = method.endswith("(GJR)")
+        var_table = ANALYTICS.get('fhs_var', ticker, version, {'days': days_dist, 'gjr': gjr},
+                                  lambda: var_es_table(fhs_var_es(fit_garch(returns['log_return'].rename(ticker), gjr=gjr),
+                                                                  horizons=(1, 10))), timings)
+        st.markdown("### VaR historique filtrée (pertes, en rendement logarithmique)")
+        st.dataframe(var_table)
+    st.caption(timings.caption())
+
+
+@st.fragment
+def price_fragment(ticker, version, hist_data):
+    """
+    Evolution du cours : changer days_evol ou les moyennes mobiles ne reconstruit que ce graphique.
+    """
+    timings = RerunTimings("Evolution du cours")
+    st.markdown("### Evolution du cours")
+    days_evol = st.slider("Nombre de jours d'évolution à afficher",
+                          min_value=1,
+                          max_value=len(hist_data),
+                          value=min(252, len(hist_data)))
+    moving_averages = st.multiselect("Sélectionnez les moyennes mobiles à afficher",
+                                     options=["MA20", "MA50", "MA100"],
+                                     default=["MA20"])
+
+    from utilities.graphs_plots import plot_price_evolution
+
+    # Sous-échantillonné, moyennes mobiles en une passe
+    windows = tuple(int(ma[2:]) for ma in moving_averages)
+    fig2 = ANALYTICS.get('price_evolution', ticker, version, {'days': days_evol, 'windows': windows},
+                         lambda: plot_price_evolution(hist_data, days_evol, windows), timings)
+    st.plotly_chart(fig2, use_container_width=True)
+    st.caption(timings.caption())
+
+
+@st.fragment
+def options_fragment(ticker, hist_data):
+    """
+    Chaîne d'options du sous-jacent (volatilités implicites et sensibilités calculées sur toute la chaîne
+    à la fois) et VaR d'une position, par approximation delta-gamma et par réévaluation complète sur
+    les chocs historiques du sous-jacent. Si ticker est un contrat (symbole OCC), son sous-jacent est utilisé.
+    """
+    # Import différé : scipy n'est chargé qu'à l'affichage des options
+    from utilities.options import OptionBook, chain_analytics, historical_shocks, option_var
+
+    timings = RerunTimings("Options")
+    contract = parse_occ_symbols(ticker).iloc[0]
+    underlying = contract['underlying'] if pd.notna(contract['underlying']) else ticker
+    st.markdown(f"### Options sur **{underlying}**")
+    expirations = get_option_expirations(underlying)
+    if not expirations:
+        st.info(f"Aucune option cotée pour {underlying}.")
+        return
+
+    default = f"{contract['expiration']:%Y-%m-%d}" if pd.notna(contract['expiration']) else None
+    expiration = st.selectbox("Échéance", expirations, index=expirations.index(default) if default in expirations else 0,
+                              key="option_expiration")
+    rate = st.number_input("Taux sans risque (%)", value=4.0, step=0.25, key="option_rate") / 100
+    chain = get_option_chain(underlying, [expiration])
+    underlying_hist = hist_data if underlying == ticker else tickerf(underlying)
+    if chain is None or chain.empty or underlying_hist is None:
+        st.warning(f"Chaîne d'options ou historique indisponible pour {underlying}.")
+        return
+
+    spot = float(underlying_hist['Close'].dropna().iloc[-1])
+    analytics = chain_analytics(chain, spot, r=rate)
+    st.dataframe(analytics[['contractSymbol', 'is_call', 'strike', 'bid', 'ask', 'mid', 'iv', 'delta', 'gamma', 'vega', 'theta']],
+                 hide_index=True)
+
+    st.markdown("#### VaR d'une position")
+    symbols = analytics['contractSymbol'].tolist()
+    selected = st.selectbox("Contrat", symbols, index=symbols.index(ticker) if ticker in symbols else 0, key="option_contract")
+    quantity = st.number_input("Nombre de contrats (négatif pour une vente)", value=1.0, step=1.0, key="option_quantity")
+    horizon = int(st.number_input("Horizon (jours de bourse)", min_value=1, max_value=20, value=1, key="option_horizon"))
+    position = analytics[analytics['contractSymbol'] == selected].assign(quantity=quantity)
+    if position['iv'].isna().all():
+        st.warning("Volatilité implicite indisponible pour ce contrat (prix hors des bornes de non-arbitrage).")
+        return
+
+    version = data_version(underlying)
+    shocks = ANALYTICS.get('option_shocks', underlying, version, {'horizon': horizon},
+                           lambda: historical_shocks(compute_returns(underlying_hist).set_index('Date')[['log_return']]
+                                                     .rename(columns={'log_return': underlying}).dropna(), horizon), timings)
+    # Décroissance temporelle en jours calendaires : 5 jours de bourse ≈ 7 jours
+    result = option_var(OptionBook(position, {underlying: spot}, r=rate), shocks, horizon_days=horizon * 7 / 5)
+    st.write(f"Valeur de la position : **{result['value']:,.2f} $**")
+    st.dataframe(result['table'])
+    st.caption(timings.caption())
 
 
 def show_stock_informations():
@@ -107,22 +142,22 @@ def show_stock_informations():
         st.divider()
         st.write("### Liste des resultats les plus pertinents:")
         st.dataframe(st.session_state['resultats'], width=1000)
-        
+
         # Création d'une liste d'options pour le sélecteur
         options = st.session_state['resultats'].apply(lambda row: f"{row['Ticker']} - {row['Name']}", axis=1).tolist()
         st.selectbox("Sélectionnez l'actif qui vous intéresse :", options, key="selected_asset")
-        
+
         # Affichage des informations historiques si le bouton est cliqué ou si déjà affiché
         if st.button("Afficher les informations historiques") or st.session_state.get("display_history", False):
             st.session_state.display_history = True
-            
+
             # Extraction du ticker et du nom depuis la sélection (format "TICKER - Name")
             ticker_selected = st.session_state.selected_asset.split(" - ")[0]
             asset_name = st.session_state.selected_asset.split(" - ")[1] if " - " in st.session_state.selected_asset else ticker_selected
-            
+
             st.markdown(f"## Informations fondamentales pour **{ticker_selected}**")
             fundamental_info = get_fundamental_info(ticker_selected)
-            
+
             # Affichage des informations fondamentales dans des expandeurs
             for key, value in fundamental_info.items():
                 with st.expander(f"{key}", expanded=True):
@@ -131,71 +166,33 @@ def show_stock_informations():
                         st.markdown(formatted_value, unsafe_allow_html=True)
                     else:
                         st.write(value)
-            
+
             st.divider()
             hist_data = tickerf(ticker_selected)
             if hist_data is not None:
+                version = data_version(ticker_selected)
                 st.markdown(f"## Historique du cours pour **{ticker_selected}**")
                 st.dataframe(hist_data)
-                
-                st.markdown("## Paramètres des graphiques")
-                # Formulaire global pour les deux graphiques
-                with st.form(key="all_graphs"):
-                    st.markdown("### Distribution des returns")
-                    days_dist = st.slider("Nombre de jours à prendre en compte (distribution)",
-                                          min_value=1, 
-                                          max_value=len(hist_data), 
-                                          value=min(252, len(hist_data)))
-                    return_type = st.radio("Type de returns", options=["simple", "log"], index=0, key="dist_return_type")
-                    nbins = st.number_input("Nombre de bins", min_value=10, max_value=1000, value=300, step=10, key="dist_nbins")
-                    
-                    st.markdown("### Evolution du cours")
-                    days_evol = st.slider("Nombre de jours d'évolution à afficher",
-                                          min_value=1, 
-                                          max_value=len(hist_data), 
-                                          value=min(252, len(hist_data)))
-                    moving_averages = st.multiselect("Sélectionnez les moyennes mobiles à afficher", 
-                                                     options=["MA20", "MA50", "MA100"],
-                                                     default=["MA20"])
-                    
-                    submit_all = st.form_submit_button("Mettre à jour les graphiques")
-                    
-                    if submit_all:
-                        # Graphique 1 : Distribution des returns
-                        filtered_data = hist_data.tail(days_dist)
-                        returns = compute_returns(filtered_data)
-                        fig1 = plot_return_distribution(returns, nbins=nbins, return_type=return_type)
-                        st.plotly_chart(fig1, use_container_width=True)
-                        
-                        st.divider()
-                        # Graphique 2 : Evolution du cours
-                        evolution_data = hist_data.tail(days_evol).copy()
-                        x_axis = evolution_data['Date'] if 'Date' in evolution_data.columns else evolution_data.index
-                        fig2 = px.line(evolution_data, x=x_axis, y='Close', 
-                                       title=f"Evolution du cours sur les {days_evol} derniers jours")
-                        # Ajout des moyennes mobiles sélectionnées
-                        if "MA20" in moving_averages:
-                            evolution_data["MA20"] = evolution_data["Close"].rolling(window=20).mean()
-                            fig2.add_scatter(x=x_axis, y=evolution_data["MA20"], mode="lines", name="MA20")
-                        if "MA50" in moving_averages:
-                            evolution_data["MA50"] = evolution_data["Close"].rolling(window=50).mean()
-                            fig2.add_scatter(x=x_axis, y=evolution_data["MA50"], mode="lines", name="MA50")
-                        if "MA100" in moving_averages:
-                            evolution_data["MA100"] = evolution_data["Close"].rolling(window=100).mean()
-                            fig2.add_scatter(x=x_axis, y=evolution_data["MA100"], mode="lines", name="MA100")
-                        st.plotly_chart(fig2, use_container_width=True)
-                
+
+                # Chaque graphique est un fragment : ses widgets ne réexécutent que lui, pas la page entière
+                st.markdown("## Graphiques")
+                distribution_fragment(ticker_selected, version, hist_data)
+                st.divider()
+                price_fragment(ticker_selected, version, hist_data)
+
+                # Chaîne d'options : chargée d'office pour un contrat, à la demande pour les autres actifs
+                is_contract = parse_occ_symbols(ticker_selected)['underlying'].notna().iloc[0]
+                if st.checkbox("Afficher les options", value=bool(is_contract), key="show_options"):
+                    st.divider()
+                    options_fragment(ticker_selected, hist_data)
+
                 # Bouton pour ajouter l'actif au portefeuille
                 if st.button("Ajouter cet actif au portefeuille", key="add_to_portfolio_button"):
-                    # Initialiser le dictionnaire assets dans session_state si inexistant
+                    # Initialiser le panel du portefeuille dans session_state si inexistant
                     if 'assets' not in st.session_state:
-                        st.session_state.assets = {}
-                    st.session_state.assets[ticker_selected] = {
-                        "nom": asset_name,
-                        "df": hist_data,
-                        "quantity": 0
-                    }
+                        st.session_state.assets = ReturnPanel()
+                    # Seules les clôtures sont gardées, alignées avec celles des autres actifs
+                    st.session_state.assets.add_asset(ticker_selected, hist_data, name=asset_name, quantity=0)
                     st.success(f"L'actif {ticker_selected} a été ajouté au portefeuille")
             else:
                 st.write(f"Aucune donnée trouvée pour le ticker : {ticker_selected}")
-
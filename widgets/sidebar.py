@@ -1,19 +1,52 @@
 import streamlit as st
+import pandas as pd
+from utilities.metrics import METRICS
 
-def sidebar_widgets():
-    st.sidebar.title("Menu latéral")
-    st.sidebar.write("Widgets factices pour le moment :")
-    
-    # Exemple de slider
-    dummy_slider = st.sidebar.slider("Slider factice", min_value=0, max_value=100, value=50)
-    
-    # Exemple de sélecteur
-    dummy_select = st.sidebar.selectbox("Sélection factice", options=["Option 1", "Option 2", "Option 3"])
-    
-    # Exemple de checkbox
-    dummy_checkbox = st.sidebar.checkbox("Case à cocher factice")
-    
-    # Ces widgets n'ont pour l'instant aucun effet fonctionnel.
-    st.sidebar.write("Valeur du slider :", dummy_slider)
-    st.sidebar.write("Option sélectionnée :", dummy_select)
-    st.sidebar.write("Checkbox activée :", dummy_checkbox)
\ No newline at end of file
+
+def _hit_rates(collectors):
+    """
+    Taux de hit et taille de chaque cache à partir des statistiques des collecteurs.
+    """
+    rows = {}
+    for source, stats in collectors.items():
+        # Les statistiques LRUCache sont au premier niveau ou dans une sous-clé ('memory', 'query_embeddings')
+        for name, cache in [(source, stats)] + [(f"{source}.{k}", v) for k, v in stats.items() if isinstance(v, dict)]:
+            if isinstance(cache, dict) and 'hit_rate' in cache:
+                rows[name] = {"hit rate": f"{cache['hit_rate']:.0%}", "entrées": cache['entries'],
+                              "Mo": cache['bytes'] / 2 ** 20 if cache.get('max_bytes') else None}
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def sidebar_widgets(rerun=None):
+    """
+    Panneau de performances : détail de la dernière exécution de la page, taux de hit des caches,
+    latences agrégées par opération et export des métriques (JSON / Prometheus).
+
+    Paramètres:
+        rerun (dict): Résultat de METRICS.end_rerun() pour l'exécution courante.
+    """
+    st.sidebar.title("Performances")
+
+    if rerun is not None:
+        st.sidebar.write(f"Dernière exécution : **{rerun['total_ms']:.0f} ms**")
+        if rerun['spans']:
+            spans = pd.DataFrame(rerun['spans'])
+            # Indentation selon la profondeur d'imbrication des spans
+            spans['operation'] = ["· " * d + op for d, op in zip(spans['depth'], spans['operation'])]
+            st.sidebar.dataframe(spans[['operation', 'ms']].round(1), hide_index=True)
+        else:
+            st.sidebar.caption("Aucune opération instrumentée pendant cette exécution.")
+
+    snapshot = METRICS.snapshot()
+    st.sidebar.subheader("Caches")
+    hit_rates = _hit_rates(snapshot['collectors'])
+    if len(hit_rates):
+        st.sidebar.dataframe(hit_rates)
+
+    st.sidebar.subheader("Opérations")
+    if snapshot['operations']:
+        operations = pd.DataFrame.from_dict(snapshot['operations'], orient='index')
+        st.sidebar.dataframe(operations[['count', 'errors', 'p50_ms', 'p95_ms', 'max_ms']].round(1))
+
+    st.sidebar.download_button("Exporter (JSON)", METRICS.to_json(), file_name="metrics.json", mime="application/json")
+    st.sidebar.download_button("Exporter (Prometheus)", METRICS.to_prometheus(), file_name="metrics.prom", mime="text/plain")